@@ -1,11 +1,20 @@
 """Unified AI provider interface for Claude, OpenAI, and Google Gemini."""
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterator
 import os
 import logging
 import time
+from tracing import traced, annotate
 
 logger = logging.getLogger("valtrilabs.ai_provider")
 
+# offline stand-ins (see mock_provider.py): no SDK, no key, no quota
+MOCK_PROVIDERS = ("mock", "local")
+
+SETTINGS_KEYS = {
+    "AI_PROVIDER", "ANTHROPIC_API_KEY", "OPENAI_API_KEY", "GOOGLE_API_KEY",
+    "MOCK_LATENCY", "MOCK_TOKENS_PER_SEC", "MOCK_ERROR_RATE", "MOCK_ERROR", "MOCK_SEED",
+}
+
 
 class AIProvider:
     def __init__(self, provider: Optional[str] = None):
@@ -13,6 +22,17 @@ class AIProvider:
         logger.info("AI provider set to: %s (env=%s, param=%s)", self.provider, os.getenv("AI_PROVIDER", "NOT_SET"), provider)
         # lazy imports
         self._client = None
+        self._explicit = provider
+        self._stale = False
+        from settings import get_settings
+        get_settings().subscribe(self._on_settings, keys=SETTINGS_KEYS)
+
+    def _on_settings(self, snapshot, changed) -> None:
+        """Provider or API key changed in .env: switch provider and rebuild the client lazily."""
+        if not self._explicit:
+            self.provider = os.getenv("AI_PROVIDER", "google").lower()
+        self._stale = True
+        logger.info("AI settings changed (%s); provider is now %s", ", ".join(sorted(changed)), self.provider)
 
     def _init_anthropic(self):
         try:
@@ -50,8 +70,9 @@ class AIProvider:
         self._client = gai
 
     def _ensure_client(self):
-        if self._client:
+        if self._client and not self._stale:
             return
+        self._stale = False
         try:
             if self.provider == "claude":
                 self._init_anthropic()
@@ -59,6 +80,9 @@ class AIProvider:
                 self._init_openai()
             elif self.provider in ("google", "gemini"):
                 self._init_google()
+            elif self.provider in MOCK_PROVIDERS:
+                from mock_provider import MockLLM
+                self._client = MockLLM.from_env()
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
         except Exception as e:
@@ -67,10 +91,14 @@ class AIProvider:
             self.provider = "google"
             self._init_google()
 
+    @traced("ai.generate")
     def generate(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Dict[str, str]:
         """Generate text from selected provider; returns dict with 'text' and metadata."""
         self._ensure_client()
+        annotate(provider=self.provider, prompt_chars=len(prompt), max_tokens=max_tokens)
         try:
+            if self.provider in MOCK_PROVIDERS:
+                return self._client.generate(prompt, max_tokens=max_tokens, temperature=temperature)
             if self.provider == "claude":
                 # Use Messages API (new)
                 resp = self._client.messages.create(
@@ -137,6 +165,14 @@ class AIProvider:
             logger.exception("AI generation failed for provider %s", self.provider)
             raise
 
+    def generate_stream(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Iterator[str]:
+        """Yield text as it is produced; providers without streaming here yield the whole text once."""
+        self._ensure_client()
+        if self.provider in MOCK_PROVIDERS:
+            yield from self._client.stream(prompt, max_tokens=max_tokens, temperature=temperature)
+        else:
+            yield self.generate(prompt, max_tokens=max_tokens, temperature=temperature)["text"]
+
 
 if __name__ == "__main__":
     import dotenv, logging
@@ -1,62 +1,143 @@
 """
 Simple web dashboard for non-technical LinkedIn automation management.
-Run: python app.py
+Run: python app.py   (production: gunicorn -c gunicorn.conf.py app:app)
 Then open: http://localhost:5000
 """
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 import os
 import json
+import threading
 from datetime import datetime
-from dotenv import load_dotenv
+from jobs import JobRegistry
+from settings import get_settings
 
-load_dotenv()
+settings = get_settings()
 
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
 
 # ============= CONFIGURATION HELPERS =============
 
+_config_cache = {'version': None, 'config': None}
+
 def load_config():
-    """Load configuration from .env file"""
-    config = {
-        'AI_PROVIDER': os.getenv('AI_PROVIDER', 'google'),
-        'GOOGLE_API_KEY': os.getenv('GOOGLE_API_KEY', ''),
-        'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY', ''),
-        'LINKEDIN_ACCESS_TOKEN': os.getenv('LINKEDIN_ACCESS_TOKEN', ''),
-        'LINKEDIN_PERSON_ID': os.getenv('LINKEDIN_PERSON_ID', ''),
-        'LINKEDIN_CLIENT_ID': os.getenv('LINKEDIN_CLIENT_ID', ''),
-        'LINKEDIN_CLIENT_SECRET': os.getenv('LINKEDIN_CLIENT_SECRET', ''),
-        'TEST_MODE': os.getenv('TEST_MODE', 'true').lower() in ('true', '1'),
-        'CONTENT_PROFILE': os.getenv('CONTENT_PROFILE', 'arab_global_crypto'),
-        'POST_TIME_HOUR': int(os.getenv('POST_TIME_HOUR', '11')),
-        'POST_TIME_MINUTE': int(os.getenv('POST_TIME_MINUTE', '0')),
-        'TIMEZONE': os.getenv('TIMEZONE', 'Asia/Kolkata'),
-        'MIN_POST_LENGTH': int(os.getenv('MIN_POST_LENGTH', '150')),
-        'MAX_POST_LENGTH': int(os.getenv('MAX_POST_LENGTH', '1000')),
-        'ENABLE_MARKET_GROUNDING': os.getenv('ENABLE_MARKET_GROUNDING', 'true').lower() in ('true', '1'),
-    }
-    return config
+    """Dashboard configuration, re-derived only when the .env snapshot changes"""
+    import config as cfg
+    snapshot = settings.snapshot()
+    if _config_cache['version'] != snapshot.version:
+        _config_cache['config'] = {
+            'AI_PROVIDER': os.getenv('AI_PROVIDER', 'google'),
+            'GOOGLE_API_KEY': os.getenv('GOOGLE_API_KEY', ''),
+            'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY', ''),
+            'LINKEDIN_ACCESS_TOKEN': os.getenv('LINKEDIN_ACCESS_TOKEN', ''),
+            'LINKEDIN_PERSON_ID': os.getenv('LINKEDIN_PERSON_ID', ''),
+            'LINKEDIN_CLIENT_ID': os.getenv('LINKEDIN_CLIENT_ID', ''),
+            'LINKEDIN_CLIENT_SECRET': os.getenv('LINKEDIN_CLIENT_SECRET', ''),
+            'TEST_MODE': os.getenv('TEST_MODE', 'true').lower() in ('true', '1'),
+            'CONTENT_PROFILE': os.getenv('CONTENT_PROFILE', 'arab_global_crypto'),
+            'POST_TIME_HOUR': int(os.getenv('POST_TIME_HOUR', '11')),
+            'POST_TIME_MINUTE': int(os.getenv('POST_TIME_MINUTE', '0')),
+            'TIMEZONE': os.getenv('TIMEZONE', 'Asia/Kolkata'),
+            'MIN_POST_LENGTH': int(os.getenv('MIN_POST_LENGTH', str(cfg.MIN_POST_LENGTH))),
+            'MAX_POST_LENGTH': int(os.getenv('MAX_POST_LENGTH', str(cfg.MAX_POST_LENGTH))),
+            'ENABLE_MARKET_GROUNDING': os.getenv('ENABLE_MARKET_GROUNDING', 'true').lower() in ('true', '1'),
+        }
+        _config_cache['version'] = snapshot.version
+    # callers mask or edit the dict, so hand out a copy
+    return dict(_config_cache['config'])
 
 def save_config(config):
-    """Save configuration to .env file"""
-    env_content = f"""AI_PROVIDER={config['AI_PROVIDER']}
-GOOGLE_API_KEY={config['GOOGLE_API_KEY']}
-ANTHROPIC_API_KEY={config['ANTHROPIC_API_KEY']}
-LINKEDIN_ACCESS_TOKEN={config['LINKEDIN_ACCESS_TOKEN']}
-LINKEDIN_PERSON_ID={config['LINKEDIN_PERSON_ID']}
-LINKEDIN_CLIENT_ID={config['LINKEDIN_CLIENT_ID']}
-LINKEDIN_CLIENT_SECRET={config['LINKEDIN_CLIENT_SECRET']}
-TEST_MODE={'true' if config['TEST_MODE'] else 'false'}
-CONTENT_PROFILE={config['CONTENT_PROFILE']}
-POST_TIME_HOUR={config['POST_TIME_HOUR']}
-POST_TIME_MINUTE={config['POST_TIME_MINUTE']}
-TIMEZONE={config['TIMEZONE']}
-MIN_POST_LENGTH={config['MIN_POST_LENGTH']}
-MAX_POST_LENGTH={config['MAX_POST_LENGTH']}
-ENABLE_MARKET_GROUNDING={'true' if config['ENABLE_MARKET_GROUNDING'] else 'false'}
-"""
-    with open('.env', 'w') as f:
-        f.write(env_content)
+    """Write configuration to .env atomically; other keys and comments in the file are kept"""
+    values = {k: ('true' if v else 'false') if isinstance(v, bool) else v for k, v in config.items()}
+    settings.update(values)
+
+# ============= WARM PIPELINE =============
+# One embedding model, provider client and history index per worker process, built on
+# first use and shared by every request. Under gunicorn (gunicorn.conf.py) the embedding
+# model is loaded once in the master by preload() and shared with the workers via fork.
+
+_warm_lock = threading.Lock()
+_warm = {'rag': None, 'ai': None, 'history': None, 'generators': {}, 'pool': None}
+jobs = JobRegistry()
+
+def preload_enabled():
+    return os.getenv('PRELOAD_MODEL', 'true').lower() in ('true', '1', 'yes')
+
+def preload():
+    """Load the embedding model before serving. Only the weights: Chroma and SQLite handles
+    must not cross a fork, so the RAG store itself is still opened per worker."""
+    if preload_enabled():
+        from rag_system import load_embedding_model
+        load_embedding_model()
+        from reranker import get_reranker, rerank_enabled
+        if rerank_enabled():
+            get_reranker().warm()
+
+def get_ai():
+    """Shared AIProvider for this worker"""
+    with _warm_lock:
+        if _warm['ai'] is None:
+            from ai_provider import AIProvider
+            _warm['ai'] = AIProvider()
+        return _warm['ai']
+
+def get_generator(profile_key):
+    """Shared ContentGenerator for a profile (RAG store, provider and history built once)"""
+    ai = get_ai()
+    with _warm_lock:
+        gen = _warm['generators'].get(profile_key)
+        if gen is None:
+            from rag_system import RAGStore
+            from content_generator import ContentGenerator
+            from post_history import HistoryIndex
+            from post_store import get_store
+            if _warm['rag'] is None:
+                _warm['rag'] = RAGStore()
+                _warm['history'] = HistoryIndex(get_store(), _warm['rag'].embed)
+            gen = ContentGenerator(_warm['rag'], ai, profile=profile_key, history=_warm['history'])
+            _warm['generators'][profile_key] = gen
+        return gen
+
+def run_preview(profile_key, exclude_themes=()):
+    """Generate a preview with the production pipeline (RAG, lint, de-dup) without saving it"""
+    from pipeline import generate_for_profile
+    from tracing import span
+    with span('app.preview', profile=profile_key):
+        post = generate_for_profile(get_generator(profile_key), save=False, exclude_themes=exclude_themes)
+    return {'status': 'done', 'success': True, 'post': post['content'], 'hashtags': post['hashtags'],
+            'theme': post['theme'], 'profile': profile_key}
+
+def get_pool():
+    """Preview pool for the active profiles, started on first use (PREVIEW_POOL_DEPTH=0 disables)"""
+    with _warm_lock:
+        if _warm['pool'] is None:
+            from preview_pool import PreviewPool
+            from utils import active_profiles
+            profiles = active_profiles()
+            if resolve_profile() not in profiles:
+                profiles.insert(0, resolve_profile())
+            _warm['pool'] = PreviewPool(run_preview, profiles).start()
+            # drafts made under the old settings are discarded on any .env change
+            settings.subscribe(lambda snapshot, changed: _warm['pool'].invalidate())
+        return _warm['pool']
+
+def job_payload(job):
+    """JSON body for a preview job; finished jobs carry the preview fields at top level"""
+    payload = {'job_id': job.id, 'status': job.status}
+    if job.status == 'done':
+        payload.update(job.result)
+    elif job.status == 'error':
+        payload.update({'success': False, 'message': f"Generation Error: {job.error}"})
+    return payload
+
+def submit_preview(profile_key=None):
+    """Queue a preview job; identical in-flight requests for a profile share one job"""
+    return jobs.submit(f"preview:{profile_key}", lambda: run_preview(profile_key))
+
+def resolve_profile(profile_key=None):
+    import config as cfg
+    profile_key = profile_key or load_config()['CONTENT_PROFILE']
+    return profile_key if profile_key in cfg.PROFILES else cfg.DEFAULT_PROFILE
 
 # ============= ROUTES =============
 
@@ -77,6 +158,32 @@ def dashboard():
                          is_configured=is_configured,
                          current_time=datetime.now().isoformat())
 
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is serving requests (no I/O, safe to poll often)"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: embedding model loaded (when preloading) and the post store answers"""
+    checks = {}
+    try:
+        if preload_enabled():
+            from rag_system import embedding_model_loaded
+            checks['embedding_model'] = embedding_model_loaded()
+        else:
+            checks['embedding_model'] = True
+    except Exception:
+        checks['embedding_model'] = False
+    try:
+        from post_store import get_store
+        get_store().count()
+        checks['post_store'] = True
+    except Exception:
+        checks['post_store'] = False
+    ready = all(checks.values())
+    return jsonify({'status': 'ready' if ready else 'starting', 'checks': checks}), (200 if ready else 503)
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get current configuration"""
@@ -108,9 +215,7 @@ def update_config():
 def test_api():
     """Test AI API configuration"""
     try:
-        from ai_provider import AIProvider
-        ai = AIProvider()
-        result = ai.generate("Say 'API is working' in 5 words", max_tokens=50)
+        result = get_ai().generate("Say 'API is working' in 5 words", max_tokens=50)
         return jsonify({'success': True, 'message': f"API Working! Response: {result['text'][:100]}"})
     except Exception as e:
         return jsonify({'success': False, 'message': f"API Error: {str(e)}"})
@@ -125,63 +230,111 @@ def test_linkedin():
     except Exception as e:
         return jsonify({'success': False, 'message': f"LinkedIn Error: {str(e)}"})
 
-@app.route('/api/generate-preview', methods=['GET'])
-def generate_preview():
-    """Generate a preview post"""
-    try:
-        from ai_provider import AIProvider
-        import random
-        import config as cfg
-        
-        ai = AIProvider()
-        config_obj = load_config()
-        profile_key = config_obj['CONTENT_PROFILE']
-        profile = cfg.PROFILES.get(profile_key, cfg.PROFILES[cfg.DEFAULT_PROFILE])
-        theme = random.choice(profile.get('content_themes', []))
-        fmt = random.choice(cfg.POST_FORMATS)
-        services = profile.get('company_info', {}).get('services', '')
-        
-        # Simple prompt for preview generation
-        prompt = f"""Generate a LinkedIn post about: {theme}
+@app.route('/api/generate-preview', methods=['POST'])
+def start_preview():
+    """Start a preview job; poll /api/generate-preview/<job_id> for the result"""
+    data = request.get_json(silent=True) or {}
+    profile_key = resolve_profile(data.get('profile'))
+    pooled = get_pool().take(profile_key)
+    if pooled:
+        return jsonify(dict(pooled, job_id=None, pooled=True))
+    job = submit_preview(profile_key)
+    return jsonify(job_payload(job)), 202
 
-Company context: {services}
+@app.route('/api/generate-preview/<job_id>', methods=['GET'])
+def preview_status(job_id):
+    """Poll a preview job; ?wait=N long-polls for up to N seconds"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown or expired job'}), 404
+    wait = min(float(request.args.get('wait', 0) or 0), 30)
+    if wait > 0:
+        job = jobs.wait(job, wait)
+    return jsonify(job_payload(job)), (200 if job.done.is_set() else 202)
 
-Post format: {fmt}
+@app.route('/api/generate-preview/<job_id>/stream', methods=['GET'])
+def preview_stream(job_id):
+    """Server-sent events: heartbeats while the job runs, then one `result` event"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown or expired job'}), 404
 
-Make it engaging, professional, and include relevant hashtags. Keep it between {config_obj['MIN_POST_LENGTH']} and {config_obj['MAX_POST_LENGTH']} characters."""
+    def events():
+        current = jobs.wait(job, 15)
+        while not current.done.is_set():
+            yield ': keep-alive\n\n'
+            current = jobs.wait(current, 15)
+        yield f"event: result\ndata: {json.dumps(job_payload(current))}\n\n"
 
-        result = ai.generate(prompt, max_tokens=500)
-        content = result['text'].strip()
-        
-        # Generate some basic hashtags
-        hashtags = ['#LinkedIn', '#Business', '#Innovation']
-        if 'crypto' in theme.lower():
-            hashtags.extend(['#Crypto', '#Blockchain', '#DigitalAssets'])
-        if 'arab' in theme.lower():
-            hashtags.extend(['#MiddleEast', '#UAE', '#Dubai'])
-        
-        return jsonify({
-            'success': True,
-            'post': content,
-            'hashtags': hashtags,
-            'theme': theme
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'message': f"Generation Error: {str(e)}"})
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/generate-preview', methods=['GET'])
+def generate_preview():
+    """Generate a preview post (blocking; kept for scripts that predate the job API)"""
+    profile_key = resolve_profile(request.args.get('profile'))
+    pooled = get_pool().take(profile_key)
+    if pooled:
+        return jsonify(dict(pooled, pooled=True))
+    job = submit_preview(profile_key)
+    job = jobs.wait(job, float(os.getenv('PREVIEW_TIMEOUT', '120')))
+    payload = job_payload(job)
+    if not job.done.is_set():
+        payload.update({'success': False, 'message': 'Generation still running; poll the job id'})
+    return jsonify(payload)
+
+def _date_param(value, until=False):
+    """Validate an ISO date/datetime filter (ValueError -> 400); a date-only `until` includes that whole day"""
+    if not value:
+        return None
+    if len(value) == 10:
+        from datetime import date, timedelta
+        day = date.fromisoformat(value)
+        return (day + timedelta(days=1)).isoformat() if until else value
+    datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    return value
 
 @app.route('/api/posts', methods=['GET'])
 def get_posts():
-    """Get recently generated posts"""
+    """Post history, newest first.
+
+    Filters: profile, theme, provider, status, since, until (ISO dates), q (full-text).
+    Pass the returned next_cursor back as ?cursor= for the next page.
+    """
     try:
-        if os.path.exists('data/posts.json'):
-            with open('data/posts.json', 'r') as f:
-                posts = json.load(f)
-                # Return last 10 posts
-                return jsonify({'success': True, 'posts': posts[-10:][::-1]})
-        return jsonify({'success': True, 'posts': []})
+        from post_store import get_store
+        args = request.args
+        cursor = args.get('cursor')
+        posts, next_cursor = get_store().search(
+            profile=args.get('profile'),
+            theme=args.get('theme'),
+            provider=args.get('provider'),
+            status=args.get('status'),
+            since=_date_param(args.get('since')),
+            until=_date_param(args.get('until'), until=True),
+            text=args.get('q'),
+            before_id=int(cursor) if cursor else None,
+            limit=max(1, min(int(args.get('limit', 10)), 100)),
+        )
+        return jsonify({'success': True, 'posts': posts, 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f"Bad parameter: {e}"}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/posts/<int:post_id>', methods=['GET'])
+def get_post(post_id):
+    """Single post by id"""
+    from post_store import get_store
+    post = get_store().get(post_id)
+    if post is None:
+        return jsonify({'success': False, 'message': 'Post not found'}), 404
+    return jsonify({'success': True, 'post': post})
+
+@app.route('/api/preview-pool', methods=['GET'])
+def preview_pool_status():
+    """Ready preview drafts per profile"""
+    return jsonify({'depth': get_pool().depth, 'ready': get_pool().stats()})
+
 @app.route('/api/scheduler/status', methods=['GET'])
 def scheduler_status():
     """Get scheduler status"""
@@ -195,4 +348,8 @@ def scheduler_status():
 if __name__ == '__main__':
     # Disable debug mode in production
     debug_mode = os.getenv('FLASK_ENV') != 'production'
+    # load in the background so the dev server answers at once; /readyz reports when done
+    # (with the debug reloader only the child process that serves requests loads it)
+    if not debug_mode or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        threading.Thread(target=preload, name='preload', daemon=True).start()
     app.run(debug=debug_mode, port=int(os.getenv('PORT', 5000)), host='0.0.0.0')
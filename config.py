@@ -3,6 +3,8 @@ from typing import List, Dict
 
 PROFILES = {
     "valtrilabs": {
+        # knowledge-base shard; documents under data/pdfs/valtrilabs/ are ingested here
+        "collection": "kb_valtrilabs",
         "company_info": {
             "name": "ValtriLabs",
             "services": "Virtual assistant services: admin support, calendar management, lead qualification, research, and operations",
@@ -26,6 +28,7 @@ PROFILES = {
         ],
     },
     "arab_global_crypto": {
+        "collection": "kb_arab_global_crypto",
         "company_info": {
             "name": "Arab Global Crypto Exchange",
             "services": "Centralized exchange: Crypto trading, custody, KYC, liquidity, and institutional-grade security (Fireblocks)",
@@ -94,10 +97,52 @@ LINKEDIN_BEST_PRACTICES: Dict[str, int] = {
     "max_length": 300,
 }
 
+# Post lint rules enforced after generation (see post_lint.py).
+# Banned term -> deterministic replacement; matched case-insensitively on word boundaries.
+# "leverage" is deliberately absent: it is a legitimate trading term for the crypto profile.
+BANNED_TERMS: Dict[str, str] = {
+    "delve": "dig",
+    "delves": "digs",
+    "delved": "dug",
+    "delving": "digging",
+    "unleash": "unlock",
+    "unleashes": "unlocks",
+    "unleashed": "unlocked",
+    "unleashing": "unlocking",
+    "dive deep": "dig",
+    "deep dive": "close look",
+    "empower": "enable",
+    "empowers": "enables",
+    "empowering": "enabling",
+    "synergy": "fit",
+    "synergies": "overlaps",
+    "landscape": "space",
+    "landscapes": "spaces",
+    "paradigm": "model",
+    "paradigms": "models",
+    "innovative": "new",
+    "disruptive": "novel",
+}
+
+POST_LINT: Dict[str, int] = {
+    "max_emojis": 3,
+    "max_hashtags": 8,
+}
+
+# Post length bounds; MIN_POST_LENGTH / MAX_POST_LENGTH in .env override them. LinkedIn
+# cuts the feed preview near 1300 characters, which the prompt also asks for.
+MIN_POST_LENGTH = 150
+MAX_POST_LENGTH = 1300
+
 DEFAULT_SCHEDULE = {"hour": 11, "minute": 0}
 
 # Default profile key to use. Can be overridden by env var CONTENT_PROFILE
 DEFAULT_PROFILE = "valtrilabs"
 
+# Knowledge base: material every profile may use (data/pdfs/shared/ and top-level files),
+# and the single collection older installs ingested everything into
+SHARED_COLLECTION = "kb_shared"
+LEGACY_COLLECTION = "valtrilabs"
+
 
 DEFAULT_SCHEDULE = {"hour": 11, "minute": 0}
@@ -1,36 +1,79 @@
 """Generate LinkedIn posts using RAG retrieval and AI providers."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import json
 import re
+import numpy as np
 from rag_system import RAGStore
 from ai_provider import AIProvider
+from post_store import PostStore, get_store
+from post_history import HistoryIndex
+from market_data import get_market_service
+from post_lint import PostLinter, LintResult
+from reranker import get_reranker, rerank_enabled
+from theme_cache import CONTEXT_K, get_theme_cache, cache_enabled
+from tracing import span, traced, annotate, bind
 import config
 
 logger = logging.getLogger("valtrilabs.content_generator")
 
 
+class DuplicatePostError(RuntimeError):
+    """Raised when every regenerated draft is still a near-copy of a saved post."""
+
+
+class PostLintError(RuntimeError):
+    """Raised when a draft still breaks a rule lint cannot repair after regeneration."""
+
+
+# a draft that is only too long or too short is still publishable once retries run out
+LENGTH_RULES = ("too_short", "too_long")
+
+
 class ContentGenerator:
-    def __init__(self, rag: RAGStore, ai: AIProvider, save_path: str = "data/posts.json"):
+    def __init__(
+        self,
+        rag: RAGStore,
+        ai: AIProvider,
+        store: Optional[PostStore] = None,
+        profile: Optional[str] = None,
+        history: Optional[HistoryIndex] = None,
+    ):
         self.rag = rag
         self.ai = ai
-        self.save_path = save_path
-        try:
-            os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
-        except Exception:
-            pass
+        self.store = store or get_store()
+        # generators for several profiles can share one history index (and its matrix)
+        self.history = history or HistoryIndex(self.store, self.rag.embed)
+        self.linter = PostLinter()
+        self.profile_key = profile or os.getenv("CONTENT_PROFILE", config.DEFAULT_PROFILE)
+        if self.profile_key not in config.PROFILES:
+            self.profile_key = config.DEFAULT_PROFILE
+        self.profile = config.PROFILES[self.profile_key]
+
+    def retrieve(self, query: str, k: int = 4) -> List[dict]:
+        """Context for `query`; with RERANK=true over-fetch and let the cross-encoder pick the top k.
 
+        Configured theme queries are answered from the precomputed theme cache when it is current.
+        """
+        if cache_enabled() and k <= CONTEXT_K:
+            cached = get_theme_cache(self.rag).lookup(self.profile_key, query)
+            if cached is not None:
+                annotate(context="theme_cache")
+                return cached[:k]
+        if not rerank_enabled():
+            return self.rag.search_profile(query, self.profile_key, k=k)
+        fetch = k * int(os.getenv("RERANK_OVERFETCH", "5"))
+        return get_reranker().rerank(query, self.rag.search_profile(query, self.profile_key, k=fetch), k=k)
+
+    @traced("generate.build_prompt")
     def build_prompt(self, theme: str, fmt: str, query: str, context_docs: List[dict]) -> str:
         # Compose prompt with retrieved context and brand info
         ctx_text = "\n---\n".join([d.get("document", "") for d in context_docs[:4]])
-        # determine profile info
-        profile_key = os.getenv("CONTENT_PROFILE", config.DEFAULT_PROFILE)
-        profile = config.PROFILES.get(profile_key, config.PROFILES[config.DEFAULT_PROFILE])
-        company_name = profile["company_info"]["name"]
+        company_name = self.profile["company_info"]["name"]
 
-        # Optionally fetch a short market snapshot (CoinGecko) to ground recent prices
+        # Optionally add a short market snapshot (CoinGecko) to ground recent prices
         # But only if the query seems to be about trading/prices/market
         market_snippet = ""
         try:
@@ -41,23 +84,11 @@ class ContentGenerator:
                 include_market = any(kw in query_lower for kw in market_related_keywords)
                 
                 if include_market:
-                    import requests
+                    # cached snapshot refreshed in the background; never waits on CoinGecko
                     ids = os.getenv("GROUND_TOKENS", "bitcoin,ethereum")
-                    r = requests.get(
-                        f"https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies=usd&include_24hr_change=true",
-                        timeout=10,
-                    )
-                    if r.ok:
-                        data = r.json()
-                        parts = []
-                        for tk in ids.split(","):
-                            if tk in data:
-                                p = data[tk]
-                                parts.append(f"{tk.upper()}: ${p.get('usd'):,} ({p.get('usd_24h_change'):+.2f}% 24h)")
-                        if parts:
-                            market_snippet = "Recent market snapshot: " + "; ".join(parts) + "."
+                    market_snippet = get_market_service().get_snippet(ids)
         except Exception:
-            logger.exception("Market grounding fetch failed")
+            logger.exception("Market grounding lookup failed")
 
         # MASTER PROMPT — Crypto Protocol Professional (technical depth with visual polish)
         prompt = (
@@ -117,53 +148,153 @@ class ContentGenerator:
         )
         return prompt
 
-    def generate_post(self, theme: str, fmt: str, query: str) -> Dict[str, Any]:
-        docs = self.rag.similarity_search(query, k=4)
+    def _generate_candidates(self, prompt: str, n: int, temperature: float) -> List[Tuple[Dict[str, str], LintResult]]:
+        """Sample `n` drafts concurrently (provider calls are I/O bound) and lint each one."""
+        def one(i: int) -> Tuple[Dict[str, str], LintResult]:
+            resp = self.ai.generate(prompt, max_tokens=600, temperature=temperature + 0.1 * (i % 3))
+            with span("generate.lint") as s:
+                lint = self.linter.lint(resp.get("text", ""))
+                s.set(ok=lint.ok, repairs=lint.repairs)
+            return resp, lint
+
+        if n <= 1:
+            return [one(0)]
+        results, errors = [], []
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            # bind() keeps the candidates' spans inside the caller's trace
+            for fut in as_completed([pool.submit(bind(one), i) for i in range(n)]):
+                try:
+                    results.append(fut.result())
+                except Exception as e:
+                    logger.warning("Candidate generation failed: %s", e)
+                    errors.append(e)
+        if not results:
+            raise errors[0]
+        return results
+
+    def _rank_candidates(self, lints: List[LintResult], vectors: np.ndarray, doc_vectors: Optional[np.ndarray]) -> List[int]:
+        """Order candidates by groundedness in the retrieved context, lint score and length fit."""
+        if doc_vectors is not None and len(doc_vectors):
+            # cosine (vectors are normalised) of each candidate against each context chunk
+            grounded = (vectors @ doc_vectors.T).mean(axis=1)
+        else:
+            grounded = np.zeros(len(lints), dtype=np.float32)
+        target = (self.linter.min_length + self.linter.max_length) / 2
+        lengths = np.array([len(l.text) for l in lints], dtype=np.float32)
+        length_fit = np.clip(1.0 - np.abs(lengths - target) / target, 0.0, 1.0)
+        lint_score = np.array([l.score for l in lints], dtype=np.float32)
+        scores = 0.6 * grounded + 0.25 * lint_score + 0.15 * length_fit
+        logger.debug("Candidate scores: %s", np.round(scores, 3).tolist())
+        return [int(i) for i in np.argsort(-scores)]
+
+    @traced("generate.post")
+    def generate_post(
+        self, theme: str, fmt: str, query: str, candidates: Optional[int] = None, save: bool = True
+    ) -> Dict[str, Any]:
+        """Generate, lint and de-duplicate a post; `save=False` (previews) leaves store and history untouched."""
+        annotate(profile=self.profile_key, theme=theme, format=fmt)
+        docs = self.retrieve(query, k=4)
         prompt = self.build_prompt(theme, fmt, query, docs)
         logger.debug("Prompt length: %d", len(prompt))
-        resp = self.ai.generate(prompt, max_tokens=600, temperature=0.5)
-        text = resp.get("text", "").strip()
-        # Post-process to remove stray markdown/asterisks and clean formatting
-        try:
-            # remove runs of asterisks inside text
-            text = re.sub(r"\*{2,}", "", text)
-            # strip leading/trailing asterisks/spaces on each line and remove empty lines
-            lines = text.splitlines()
-            cleaned = []
-            for ln in lines:
-                ln2 = re.sub(r"^[\s\*]+|[\s\*]+$", "", ln)
-                if ln2:
-                    cleaned.append(ln2)
-            text = "\n".join(cleaned)
-        except Exception:
-            logger.exception("Post-processing cleanup failed")
+        n = candidates or int(os.getenv("GENERATION_CANDIDATES", "1"))
+        threshold = float(os.getenv("DUPLICATE_SIMILARITY_THRESHOLD", "0.9"))
+        dup_retries = int(os.getenv("DUPLICATE_MAX_RETRIES", "2"))
+        lint_retries = int(os.getenv("LINT_MAX_RETRIES", "1"))
+        doc_vectors = None
+        if n > 1 and docs:
+            doc_vectors = self.rag.embed([d.get("document", "") for d in docs])
+        attempt_prompt = prompt
+        attempt = 0
+        while True:
+            results = self._generate_candidates(attempt_prompt, n, 0.5 + 0.15 * min(attempt, 2))
+            attempt += 1
+            # lint repairs banned terms, hashtags, emojis and markdown deterministically
+            valid = [(resp, lint) for resp, lint in results if lint.ok]
+            for _, lint in results:
+                if lint.issues:
+                    logger.info("Lint: %s", lint.issues)
+            if not valid and lint_retries <= 0:
+                usable = [(resp, lint) for resp, lint in results
+                          if lint.text and all(rule in LENGTH_RULES for rule, _, _ in lint.errors)]
+                if not usable:
+                    raise PostLintError("; ".join(msg for _, _, msg in results[0][1].errors))
+                best = max(usable, key=lambda r: r[1].score)
+                logger.warning("Draft still fails lint after retries (%s); using the best repaired draft",
+                               "; ".join(msg for _, _, msg in best[1].errors))
+                valid = [best]
+            if not valid:
+                errors = results[0][1].errors
+                lint_retries -= 1
+                logger.warning("Draft failed lint, regenerating: %s", errors)
+                attempt_prompt = (
+                    prompt
+                    + "\n\nA previous draft was rejected for: "
+                    + "; ".join(msg for _, _, msg in errors)
+                    + f". Keep the post between {self.linter.min_length} and {self.linter.max_length} characters."
+                )
+                continue
+            with span("generate.dedup", candidates=len(valid)) as s:
+                vectors = self.rag.embed([lint.text for _, lint in valid])
+                order = self._rank_candidates([lint for _, lint in valid], vectors, doc_vectors) if len(valid) > 1 else [0]
+                chosen = None
+                for i in order:
+                    dup_id, score = self.history.nearest(vectors[i])
+                    if score < threshold:
+                        chosen = i
+                        break
+                s.set(similarity=round(float(score), 4), duplicate=chosen is None)
+            if chosen is not None:
+                resp, text, vector = valid[chosen][0], valid[chosen][1].text, vectors[chosen]
+                break
+            if dup_retries <= 0:
+                raise DuplicatePostError(
+                    f"Draft stayed {score:.3f} similar to post {dup_id} (threshold {threshold:.2f}) after retries"
+                )
+            dup_retries -= 1
+            logger.warning(
+                "Draft is %.3f similar to post %s (threshold %.2f), regenerating", score, dup_id, threshold
+            )
+            previous = (self.store.get(dup_id) or {}).get("content", "")
+            attempt_prompt = (
+                prompt
+                + "\n\nThis recent post already covers a similar angle — take a clearly different hook, "
+                "example and takeaway:\n"
+                + previous[:600]
+            )
 
         # improved hashtag extraction (find all hashtags anywhere in the text)
         hashtags = re.findall(r"#[-_A-Za-z0-9]+", text) if text else []
         post = {
+            "profile": self.profile_key,
             "theme": theme,
             "format": fmt,
             "query": query,
             "content": text,
             "hashtags": hashtags,
             "provider": resp.get("provider"),
+            "status": "drafted",
             "created_at": datetime.utcnow().isoformat() + "Z",
         }
+        annotate(attempts=attempt, chars=len(text), provider=post["provider"])
+        if not save:
+            return post
         self._save_post(post)
+        try:
+            self.history.add(post["id"], vector)
+        except Exception:
+            logger.exception("Failed to index post %s for duplicate detection", post["id"])
         return post
 
+    @traced("store.save_post")
     def _save_post(self, post: Dict[str, Any]) -> None:
+        """Store the post and set post["id"]; a failed save raises, since nothing can enqueue an unsaved post."""
         try:
-            data = []
-            if os.path.exists(self.save_path):
-                with open(self.save_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            data.append(post)
-            with open(self.save_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            logger.info("Saved post to %s", self.save_path)
+            post["id"] = self.store.append(post)
+            annotate(post_id=post["id"])
+            logger.info("Saved post %d to %s", post["id"], self.store.path)
         except Exception:
             logger.exception("Failed to save post")
+            raise
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+"""Near-duplicate chunk elimination at ingest: MinHash signatures over word shingles with LSH banding.
+
+    kept, metadatas, stats = dedupe_chunks(chunks)   # chunks: [(source, text), ...]
+
+Chunks whose estimated Jaccard similarity to an earlier chunk reaches the threshold are
+merged into it (the first copy is kept; the other sources are listed in its metadata), so
+the index stores one vector per passage and retrieval slots are not spent on copies.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import re
+import zlib
+import hashlib
+import logging
+import numpy as np
+
+logger = logging.getLogger("valtrilabs.dedup")
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MASK32 = np.uint64(0xFFFFFFFF)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """32-bit hashes of the word `size`-grams of normalised text (a short text is one shingle)."""
+    words = _TOKEN.findall(text.lower())
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)))
+
+
+def _bands_for(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve midpoint (1/b)^(1/r) is closest to the threshold."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        err = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or err < best[0]:
+            best = (err, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        # a, b < 2^32 and shingle hashes < 2^32, so a*x + b stays below 2^64
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def signature(self, text: str) -> np.ndarray:
+        x = shingles(text, self.shingle_size)[:, None]
+        return (((x * self.a + self.b) % _MERSENNE) & _MASK32).min(axis=0).astype(np.uint32)
+
+
+class MinHashLSH:
+    """Banded LSH index: signatures sharing any band are candidate near-duplicates."""
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128):
+        self.threshold = threshold
+        self.bands, self.rows = _bands_for(threshold, num_perm)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, sig: np.ndarray) -> Optional[Tuple[int, float]]:
+        """Best indexed match at or above the threshold: (index, estimated Jaccard)."""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            candidates.update(bucket.get(key, ()))
+        best = None
+        for i in candidates:
+            # banding only proposes pairs; the signature agreement estimates Jaccard
+            score = float(np.mean(self._signatures[i] == sig))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (i, score)
+        return best
+
+    def insert(self, sig: np.ndarray) -> int:
+        index = len(self._signatures)
+        self._signatures.append(sig)
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(key, []).append(index)
+        return index
+
+
+def dedup_enabled() -> bool:
+    return os.getenv("INGEST_DEDUP", "true").lower() in ("1", "true", "yes")
+
+
+def dedupe_chunks(
+    docs: List[Tuple[str, str]],
+    threshold: Optional[float] = None,
+    num_perm: int = 128,
+    shingle_size: int = 5,
+) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]], Dict[str, int]]:
+    """Merge near-duplicate (source, text) chunks, keeping the first copy of each.
+
+    Returns the kept chunks, a metadata dict per kept chunk (duplicate_sources / duplicates
+    when copies were merged into it) and stats: chunks, kept, exact, near, saved.
+    """
+    threshold = threshold if threshold is not None else float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+    hasher = MinHasher(num_perm, shingle_size)
+    lsh = MinHashLSH(threshold, num_perm)
+    exact: Dict[str, int] = {}
+    kept: List[Tuple[str, str]] = []
+    merged: List[List[str]] = []
+    stats = {"chunks": len(docs), "kept": 0, "exact": 0, "near": 0, "saved": 0}
+    for src, text in docs:
+        digest = hashlib.sha1(" ".join(_TOKEN.findall(text.lower())).encode("utf-8")).hexdigest()
+        if digest in exact:
+            merged[exact[digest]].append(src)
+            stats["exact"] += 1
+            continue
+        sig = hasher.signature(text)
+        match = lsh.query(sig)
+        if match is not None:
+            merged[match[0]].append(src)
+            stats["near"] += 1
+            continue
+        exact[digest] = lsh.insert(sig)
+        kept.append((src, text))
+        merged.append([])
+    metadatas = []
+    for (src, _), others in zip(kept, merged):
+        meta: Dict[str, Any] = {}
+        if others:
+            # Chroma metadata values are scalars, so the sources are stored as one string
+            meta["duplicate_sources"] = "; ".join(sorted(set(others) - {src}))
+            meta["duplicates"] = len(others)
+        metadatas.append(meta)
+    stats["kept"] = len(kept)
+    stats["saved"] = stats["exact"] + stats["near"]
+    return kept, metadatas, stats
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    logging.basicConfig(level=logging.INFO)
+    from pdf_processor import load_chunks
+    chunks = list(load_chunks(sys.argv[1] if len(sys.argv) > 1 else "data/pdfs"))
+    started = time.perf_counter()
+    _, _, stats = dedupe_chunks(chunks)
+    print(f"{stats['chunks']} chunks -> {stats['kept']} kept ({stats['exact']} exact, {stats['near']} near); "
+          f"{stats['saved']} embedding calls saved in {time.perf_counter() - started:.2f}s")
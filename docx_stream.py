@@ -0,0 +1,147 @@
+"""Streaming DOCX text extraction: word/document.xml is read from the zip with iterparse.
+
+Unlike python-docx no object tree is built; each paragraph, heading or table row is yielded
+as soon as its closing tag is parsed and its elements are freed, so memory stays flat on
+large files and the chunker can consume blocks as they arrive.
+
+    for block in iter_blocks("data/pdfs/Knowledge Base.docx"):
+        print(block.kind, block.level, block.text)
+    chunks = list(iter_chunks(path, chunk_size=1000, overlap=200))
+"""
+from typing import Iterator, List, Optional
+import re
+import zipfile
+import logging
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger("valtrilabs.docx_stream")
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_HEADING_STYLE = re.compile(r"^(?:heading|titre|berschrift|encabezado)\s*(\d)$", re.IGNORECASE)
+
+
+class Block:
+    __slots__ = ("kind", "text", "level", "headings")
+
+    def __init__(self, kind: str, text: str, level: int = 0, headings: Optional[List[str]] = None):
+        self.kind = kind  # "heading" | "paragraph" | "table_row"
+        self.text = text
+        self.level = level  # heading level (1 = top), 0 otherwise
+        self.headings = headings or []  # enclosing heading trail, outermost first
+
+    def __repr__(self) -> str:
+        return f"Block({self.kind!r}, {self.text[:40]!r}, level={self.level})"
+
+
+def _heading_level(ppr: Optional[ET.Element]) -> int:
+    """Heading level from the paragraph style (Heading1, Title) or an explicit outline level."""
+    if ppr is None:
+        return 0
+    style = ppr.find(f"{W}pStyle")
+    if style is not None:
+        name = style.get(f"{W}val", "")
+        if name.lower() == "title":
+            return 1
+        m = _HEADING_STYLE.match(name.replace("_", ""))
+        if m:
+            return int(m.group(1))
+    outline = ppr.find(f"{W}outlineLvl")
+    if outline is not None and outline.get(f"{W}val", "").isdigit():
+        level = int(outline.get(f"{W}val")) + 1
+        return level if level < 10 else 0  # 9 means body text
+    return 0
+
+
+def _paragraph_text(p: ET.Element) -> str:
+    parts = []
+    for el in p.iter():
+        if el.tag == f"{W}t":
+            parts.append(el.text or "")
+        elif el.tag == f"{W}tab":
+            parts.append("\t")
+        elif el.tag in (f"{W}br", f"{W}cr"):
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def iter_blocks(path: str) -> Iterator[Block]:
+    """Yield the document body in order: headings, paragraphs and table rows ("a | b | c")."""
+    headings: List[str] = []
+    table_depth = 0
+    p_depth = 0  # text boxes nest paragraphs inside a paragraph; only the outer one is a block
+    body: Optional[ET.Element] = None
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as xml:
+        for event, el in ET.iterparse(xml, events=("start", "end")):
+            tag = el.tag
+            if event == "start":
+                if tag == f"{W}body":
+                    body = el
+                elif tag == f"{W}tbl":
+                    table_depth += 1
+                elif tag == f"{W}p":
+                    p_depth += 1
+                continue
+            if tag == f"{W}p":
+                p_depth -= 1
+                if p_depth or table_depth:
+                    continue
+                text = _paragraph_text(el)
+                if text:
+                    level = _heading_level(el.find(f"{W}pPr"))
+                    if level:
+                        del headings[level - 1:]
+                        headings.append(text)
+                        yield Block("heading", text, level, list(headings[:-1]))
+                    else:
+                        yield Block("paragraph", text, 0, list(headings))
+            elif tag == f"{W}tr" and table_depth == 1:
+                cells = []
+                for tc in el.findall(f"{W}tc"):
+                    cell = " ".join(t for t in (_paragraph_text(p) for p in tc.iter(f"{W}p")) if t)
+                    cells.append(cell)
+                if any(cells):
+                    yield Block("table_row", " | ".join(cells), 0, list(headings))
+            elif tag == f"{W}tbl":
+                table_depth -= 1
+            else:
+                continue
+            # the block is consumed; drop everything parsed so far under <w:body>
+            if body is not None and table_depth == 0:
+                body.clear()
+
+
+def extract_text(path: str) -> str:
+    """Whole document as text, one block per line."""
+    return "\n".join(block.text for block in iter_blocks(path))
+
+
+def iter_chunks(path: str, chunk_size: int = 1000, overlap: int = 200) -> Iterator[str]:
+    """Chunk the document while it is being parsed (same sizes as pdf_processor.chunk_text).
+
+    Cuts prefer a block boundary inside the window, so paragraphs and table rows are split
+    only when a single block is longer than the chunk.
+    """
+    if chunk_size <= overlap:
+        raise ValueError("chunk_size must be larger than overlap")
+    buf = ""
+    carried = 0  # length of the overlap at the start of buf, already emitted once
+    for block in iter_blocks(path):
+        buf = f"{buf}\n{block.text}" if buf else block.text
+        while len(buf) >= chunk_size:
+            cut = buf.rfind("\n", overlap + 1, chunk_size)
+            if cut <= overlap:
+                cut = chunk_size
+            yield buf[:cut]
+            rest = buf[cut - overlap:]
+            buf = rest.lstrip("\n")
+            carried = max(overlap - (len(rest) - len(buf)), 0)
+    if len(buf) > carried:
+        yield buf
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    for block in iter_blocks(sys.argv[1] if len(sys.argv) > 1 else "data/pdfs/Knowledge Base.docx"):
+        indent = "  " * max(block.level - 1, 0) if block.kind == "heading" else "    "
+        print(f"{indent}[{block.kind}] {block.text[:100]}")
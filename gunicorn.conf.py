@@ -0,0 +1,37 @@
+"""
+Production server settings for the dashboard:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app (and the embedding model) is imported once in the master and the workers are
+forked from it, so the model weights are shared copy-on-write instead of loaded per worker
+and a restarted worker is serving again in milliseconds.
+
+Preview jobs (/api/generate-preview/<job_id>) are stored in posts.db (jobs.py), so a poll
+can land on any worker and WEB_CONCURRENCY can be raised freely.
+"""
+import os
+import gc
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+# the legacy blocking preview route waits up to PREVIEW_TIMEOUT (120 s) by default
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "150"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # runs in the master after the app import and before the socket is bound, so the port
+    # only opens once the model is in memory
+    import app
+
+    app.preload()
+    # keep the collector from touching (and so copying) the preloaded objects in each worker
+    gc.freeze()
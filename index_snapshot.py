@@ -0,0 +1,226 @@
+"""Portable, versioned snapshots of the vector index for CI and ephemeral runners.
+
+    python main.py snapshot export data/index_snapshot     # after `python main.py ingest`
+    RAG_SNAPSHOT=data/index_snapshot python main.py generate
+
+A snapshot is a directory:
+
+    manifest.json      format version, embedding model name and weights hash, per-collection row ranges
+    vectors.npy        every collection's embeddings as one contiguous float16 matrix
+    chunks.jsonl.gz    one {"id", "collection", "document", "metadata"} line per row, same order
+    theme_context.json the precomputed theme context (if it was built), so scheduled posts need no model
+    ingest_generation.json  the digest of the indexed text that the theme context was built against
+
+Loading memory-maps vectors.npy and never touches chromadb, so a fresh checkout can search
+as soon as the query is embedded; RAGStore.import_snapshot copies it into Chroma instead.
+"""
+from typing import Any, Dict, List, Optional
+import os
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+import numpy as np
+
+logger = logging.getLogger("valtrilabs.index_snapshot")
+
+FORMAT = "valtrilabs-index"
+FORMAT_VERSION = 1
+
+_hashes: Dict[int, str] = {}
+_hashes_lock = threading.Lock()
+
+
+def model_hash(model) -> str:
+    """sha256 over the model's weights, so a snapshot is only searched with the model that built it."""
+    with _hashes_lock:
+        cached = _hashes.get(id(model))
+        if cached is None:
+            h = hashlib.sha256()
+            for name, tensor in sorted(model.state_dict().items()):
+                h.update(name.encode("utf-8"))
+                h.update(tensor.detach().cpu().numpy().tobytes())
+            cached = _hashes[id(model)] = h.hexdigest()
+        return cached
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def export_snapshot(rag, path: str, collections: List[str], page: int = 5000) -> Dict[str, Any]:
+    """Write the named Chroma collections of `rag` to a snapshot directory; returns the manifest.
+
+    Stored embeddings are copied, nothing is re-encoded. The directory is replaced atomically.
+    """
+    from rag_system import EMBEDDING_MODEL, GENERATION_FILE
+    started = time.perf_counter()
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".snapshot.", dir=parent)
+    try:
+        blocks: List[np.ndarray] = []
+        ranges: Dict[str, Dict[str, int]] = {}
+        rows = 0
+        with gzip.open(os.path.join(tmp, "chunks.jsonl.gz"), "wt", encoding="utf-8") as out:
+            for name in collections:
+                collection = rag._collection(name, create=False)
+                total = collection.count() if collection is not None else 0
+                if not total:
+                    continue
+                start = rows
+                for offset in range(0, total, page):
+                    got = collection.get(include=["embeddings", "documents", "metadatas"], limit=page, offset=offset)
+                    blocks.append(np.asarray(got["embeddings"], dtype=np.float16))
+                    for id_, doc, meta in zip(got["ids"], got["documents"], got["metadatas"]):
+                        out.write(json.dumps({"id": id_, "collection": name, "document": doc, "metadata": meta or {}},
+                                             ensure_ascii=False) + "\n")
+                    rows += len(got["ids"])
+                ranges[name] = {"offset": start, "count": rows - start}
+        vectors = np.ascontiguousarray(np.concatenate(blocks)) if blocks else np.zeros((0, 0), dtype=np.float16)
+        np.save(os.path.join(tmp, "vectors.npy"), vectors)
+        for extra in ("theme_context.json", GENERATION_FILE):
+            if os.path.exists(os.path.join(rag.persist_dir, extra)):
+                shutil.copyfile(os.path.join(rag.persist_dir, extra), os.path.join(tmp, extra))
+        manifest = {
+            "format": FORMAT,
+            "version": FORMAT_VERSION,
+            "created_at": time.time(),
+            "model": EMBEDDING_MODEL,
+            "model_hash": model_hash(rag.model),
+            "space": "l2",  # Chroma's default; distances match the live index
+            "dim": int(vectors.shape[1]) if vectors.size else 0,
+            "dtype": "float16",
+            "rows": rows,
+            "collections": ranges,
+            "files": {f: _file_sha256(os.path.join(tmp, f)) for f in sorted(os.listdir(tmp))},
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        old = None
+        if os.path.exists(path):
+            old = tempfile.mkdtemp(prefix=".snapshot-old.", dir=parent)
+            os.rmdir(old)
+            os.rename(path, old)
+        os.rename(tmp, path)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    logger.info("Exported %d vectors in %d collections to %s (%.1f MB) in %.1fs",
+                rows, len(ranges), path, size / 1e6, time.perf_counter() - started)
+    return manifest
+
+
+class SnapshotCollection:
+    """Read-only stand-in for a Chroma collection (count, query, get) over memory-mapped rows."""
+
+    def __init__(self, snapshot: "Snapshot", name: str, offset: int, count: int):
+        self.snapshot = snapshot
+        self.name = name
+        self.offset = offset
+        self._count = count
+        self._sq_norms: Optional[np.ndarray] = None
+
+    def count(self) -> int:
+        return self._count
+
+    def _vectors(self) -> np.ndarray:
+        return self.snapshot.vectors[self.offset:self.offset + self._count]
+
+    def _distances(self, q: np.ndarray, block: int = 8192) -> np.ndarray:
+        """Squared L2 to every row, upcasting float16 one block at a time."""
+        vectors = self._vectors()
+        dots = np.empty(self._count, dtype=np.float32)
+        norms = np.empty(self._count, dtype=np.float32) if self._sq_norms is None else None
+        for i in range(0, self._count, block):
+            part = vectors[i:i + block].astype(np.float32)
+            dots[i:i + block] = part @ q
+            if norms is not None:
+                norms[i:i + block] = np.einsum("ij,ij->i", part, part)
+        if norms is not None:
+            self._sq_norms = norms
+        return np.maximum(self._sq_norms - 2 * dots + float(q @ q), 0.0)
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, include=None, **_) -> Dict[str, list]:
+        chunks = self.snapshot.chunks()
+        res: Dict[str, list] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for qemb in query_embeddings:
+            dist = self._distances(np.asarray(qemb, dtype=np.float32))
+            n = min(n_results, self._count)
+            top = np.argpartition(dist, n - 1)[:n] if n < self._count else np.arange(self._count)
+            top = top[np.argsort(dist[top], kind="stable")]
+            rows = [chunks[self.offset + int(i)] for i in top]
+            res["ids"].append([r["id"] for r in rows])
+            res["documents"].append([r["document"] for r in rows])
+            res["metadatas"].append([r["metadata"] for r in rows])
+            res["distances"].append([float(dist[i]) for i in top])
+        return res
+
+    def get(self, include=None, limit: Optional[int] = None, offset: int = 0, **_) -> Dict[str, list]:
+        end = self._count if limit is None else min(offset + limit, self._count)
+        rows = self.snapshot.chunks()[self.offset + offset:self.offset + end]
+        return {
+            "ids": [r["id"] for r in rows],
+            "documents": [r["document"] for r in rows],
+            "metadatas": [r["metadata"] for r in rows],
+            "embeddings": self._vectors()[offset:end].astype(np.float32),
+        }
+
+
+class Snapshot:
+    def __init__(self, path: str, verify: bool = False):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT or self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} index snapshot")
+        if verify:
+            for name, digest in self.manifest.get("files", {}).items():
+                if _file_sha256(os.path.join(path, name)) != digest:
+                    raise ValueError(f"Snapshot file {name} does not match its manifest checksum")
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        if len(self.vectors) != self.manifest["rows"]:
+            raise ValueError(f"Snapshot {path} has {len(self.vectors)} vectors, manifest says {self.manifest['rows']}")
+        self.collections = {
+            name: SnapshotCollection(self, name, r["offset"], r["count"])
+            for name, r in self.manifest.get("collections", {}).items()
+        }
+        self._chunks: Optional[List[dict]] = None
+        self._lock = threading.Lock()
+
+    def chunks(self) -> List[dict]:
+        """The text/metadata sidecar, decompressed on the first query rather than at load."""
+        with self._lock:
+            if self._chunks is None:
+                with gzip.open(os.path.join(self.path, "chunks.jsonl.gz"), "rt", encoding="utf-8") as f:
+                    self._chunks = [json.loads(line) for line in f]
+            return self._chunks
+
+    def check_model(self, model_name: str, model=None) -> None:
+        """Refuse a snapshot embedded with another model (by name, and by weights once the model is loaded)."""
+        if self.manifest.get("model") != model_name:
+            raise ValueError(f"Snapshot {self.path} was built with {self.manifest.get('model')}, not {model_name}")
+        if model is not None and model_hash(model) != self.manifest.get("model_hash"):
+            raise ValueError(f"Snapshot {self.path} was built with different {model_name} weights")
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    snap = Snapshot(sys.argv[1] if len(sys.argv) > 1 else "data/index_snapshot", verify="--verify" in sys.argv)
+    print(f"Loaded {snap.manifest['rows']} vectors ({snap.manifest['model']}) in "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+    for name, c in snap.collections.items():
+        print(f"  {name}: {c.count()}")
@@ -0,0 +1,185 @@
+"""Async job registry with single-flight coalescing (used by the dashboard).
+
+Jobs are rows in a `jobs` table in posts.db, next to the outbox, so with several gunicorn
+workers a poll can land on any of them; the callable itself runs in the worker that
+accepted the submit.
+"""
+from typing import Any, Callable, Dict, Optional
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from post_store import PostStore, get_store, connect
+
+logger = logging.getLogger("valtrilabs.jobs")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_key_finished ON jobs(key, finished);
+"""
+
+
+class Job:
+    def __init__(
+        self,
+        key: str,
+        id: Optional[str] = None,
+        status: str = "pending",
+        result: Any = None,
+        error: Optional[str] = None,
+        created: Optional[float] = None,
+        finished: Optional[float] = None,
+    ):
+        self.id = id or uuid.uuid4().hex
+        self.key = key
+        self.status = status  # pending -> running -> done | error
+        self.result = result
+        self.error = error
+        self.created = created or time.time()
+        self.finished = finished
+        self.done = threading.Event()
+        if finished is not None:
+            self.done.set()
+
+
+class JobRegistry:
+    """Run callables on a bounded pool; a submit with a key already in flight (in any worker
+    sharing the database) joins that job.
+
+    A job not finished within `lease` seconds is taken to belong to a worker that died and is
+    marked as an error, so a crash does not block its key.
+    """
+
+    def __init__(
+        self,
+        store: Optional[PostStore] = None,
+        max_workers: Optional[int] = None,
+        ttl: float = 600,
+        lease: Optional[float] = None,
+        poll: float = 0.25,
+    ):
+        self._store = store
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("PREVIEW_WORKERS", "4")), thread_name_prefix="job"
+        )
+        self._running: Dict[str, Job] = {}  # jobs executing in this process
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ready = False
+        self.ttl = ttl
+        self.lease = lease if lease is not None else float(os.getenv("JOB_LEASE_SECONDS", "300"))
+        self.poll = poll
+
+    def _conn(self):
+        # opened lazily: the registry is created at import, before gunicorn forks its workers
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            store = self._store or get_store()
+            conn = self._local.conn = connect(store.path)
+            if not self._ready:
+                conn.executescript(_SCHEMA)
+                self._ready = True
+        return conn
+
+    @staticmethod
+    def _job(row) -> Job:
+        return Job(
+            row["key"], id=row["id"], status=row["status"], error=row["error"], created=row["created"],
+            result=json.loads(row["result"]) if row["result"] else None, finished=row["finished"],
+        )
+
+    def submit(self, key: str, fn: Callable[[], Any]) -> Job:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire(conn)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE key = ? AND finished IS NULL ORDER BY created LIMIT 1", (key,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("COMMIT")
+                logger.debug("Coalescing %s into in-flight job %s", key, row["id"])
+                return self.get(row["id"]) or self._job(row)
+            job = Job(key)
+            conn.execute(
+                "INSERT INTO jobs (id, key, status, created) VALUES (?, ?, ?, ?)",
+                (job.id, key, job.status, job.created),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._running[job.id] = job
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[], Any]) -> None:
+        job.status = "running"
+        self._conn().execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job.id,))
+        try:
+            job.result = fn()
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.key)
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            try:
+                self._conn().execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?",
+                    (job.status, json.dumps(job.result) if job.result is not None else None,
+                     job.error, job.finished, job.id),
+                )
+            except Exception:
+                logger.exception("Could not record the result of job %s", job.id)
+            with self._lock:
+                self._running.pop(job.id, None)
+            job.done.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job in this process while it runs here, otherwise its stored state (None if unknown or expired)."""
+        with self._lock:
+            job = self._running.get(job_id)
+        if job is not None:
+            return job
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def wait(self, job: Job, timeout: float) -> Job:
+        """Block until `job` finishes or `timeout` passes and return its latest state; a job
+        running in another worker is followed through the database."""
+        deadline = time.monotonic() + timeout
+        while not job.done.is_set():
+            with self._lock:
+                local = self._running.get(job.id) is job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if local:
+                job.done.wait(remaining)
+                break
+            time.sleep(min(self.poll, remaining))
+            job = self.get(job.id) or job
+        return job
+
+    def _expire(self, conn) -> None:
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'error', error = 'Abandoned by its worker', finished = ? "
+            "WHERE finished IS NULL AND created < ?",
+            (now, now - self.lease),
+        )
+        conn.execute("DELETE FROM jobs WHERE finished < ?", (now - self.ttl,))
@@ -0,0 +1,293 @@
+"""Pooled LinkedIn/Ayrshare HTTP client: retries, rate limiting and idempotent publishing."""
+from typing import Any, Dict, Optional, Tuple
+import os
+import time
+import random
+import hashlib
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from post_store import PostStore, get_store
+
+logger = logging.getLogger("valtrilabs.linkedin_client")
+
+LINKEDIN_API_BASE = "https://api.linkedin.com"
+# Throttled or unavailable: LinkedIn rejected the request before creating anything.
+RETRYABLE_STATUSES = {429, 503}
+# Any other 5xx (500, 502, 504, ...) can arrive after the post was created, so it is
+# treated like a read timeout: outcome unknown until the post is looked up.
+
+
+def ambiguous_status(status_code: int) -> bool:
+    return status_code >= 500 and status_code not in RETRYABLE_STATUSES
+
+
+class AmbiguousPublishError(RuntimeError):
+    """The request may have reached LinkedIn but no response came back; not retried blindly."""
+
+
+class TokenBucket:
+    """Client-side throttle that also honours server back-off (Retry-After / X-RateLimit-*)."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def block_for(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def observe(self, response: requests.Response) -> Optional[float]:
+        """Update from throttling headers; returns the server-requested delay, if any."""
+        headers = response.headers
+        delay = None
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+        elif headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            try:
+                reset = float(headers["X-RateLimit-Reset"])
+                # LinkedIn sends epoch seconds; tolerate a relative delta too
+                delay = reset - time.time() if reset > 1e9 else reset
+            except ValueError:
+                delay = None
+        if delay is not None and delay > 0:
+            self.block_for(delay)
+        return delay
+
+
+_session: Optional[requests.Session] = None
+_buckets: Dict[str, TokenBucket] = {}
+_shared_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide session so every poster reuses pooled keep-alive connections."""
+    global _session
+    with _shared_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(os.getenv("HTTP_POOL_SIZE", "10")))
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_bucket(host: str) -> TokenBucket:
+    with _shared_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(
+                rate=float(os.getenv("LINKEDIN_RATE_PER_SEC", "1")),
+                capacity=int(os.getenv("LINKEDIN_RATE_BURST", "5")),
+            )
+        return _buckets[host]
+
+
+def never_sent(exc: requests.exceptions.RequestException) -> bool:
+    """True when the request failed before any of it reached the server (connect timeout,
+    connection refused, DNS failure), so retrying cannot double-post."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.exceptions.ConnectionError) or not exc.args:
+        return False
+    cause = exc.args[0]
+    return isinstance(cause, NewConnectionError) or isinstance(getattr(cause, "reason", None), NewConnectionError)
+
+
+def idempotency_key(author: str, text: str) -> str:
+    return hashlib.sha256(f"{author}\n{text}".encode("utf-8")).hexdigest()
+
+
+class LinkedInClient:
+    def __init__(
+        self,
+        access_token: str,
+        base_url: Optional[str] = None,
+        store: Optional[PostStore] = None,
+        max_retries: Optional[int] = None,
+        backoff: float = 1.0,
+    ):
+        self.access_token = access_token
+        self.base_url = (base_url or os.getenv("LINKEDIN_API_BASE", LINKEDIN_API_BASE)).rstrip("/")
+        self.store = store or get_store()
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("PUBLISH_MAX_RETRIES", "4"))
+        self.backoff = backoff
+        self.session = get_session()
+        self.bucket = get_bucket(self.base_url)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.access_token}",
+            "X-Restli-Protocol-Version": "2.0.0",
+            "Content-Type": "application/json",
+        }
+
+    def _sleep_before_retry(self, attempt: int, server_delay: Optional[float]) -> None:
+        delay = server_delay if server_delay else self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+        logger.info("Retrying in %.2fs (attempt %d/%d)", delay, attempt + 1, self.max_retries)
+        time.sleep(delay)
+
+    def find_existing(self, author: str, text: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Look for a recent post by `author` with identical commentary (needs r_member_social).
+
+        Returns (verified, match); verified is False when the lookup itself failed.
+        """
+        try:
+            r = self.session.get(
+                f"{self.base_url}/v2/ugcPosts",
+                params={"q": "authors", "authors": f"List({author})", "count": 20},
+                headers=self._headers(),
+                timeout=(5, 15),
+            )
+            if not r.ok:
+                return False, None
+            for el in r.json().get("elements", []):
+                share = el.get("specificContent", {}).get("com.linkedin.ugc.ShareContent", {})
+                if share.get("shareCommentary", {}).get("text") == text:
+                    return True, {"id": el.get("id")}
+            return True, None
+        except Exception:
+            logger.exception("Failed to look up existing LinkedIn posts")
+            return False, None
+
+    def _resolve_unknown(self, key: str, author: str, text: str, reason: str) -> Dict[str, Any]:
+        """The request may have reached LinkedIn: record the unknown outcome and look the post up before anything retries."""
+        self.store.record_publish(key, "unknown")
+        _, existing = self.find_existing(author, text)
+        if existing:
+            self.store.record_publish(key, "published", existing)
+            return {"status": "posted", "response": existing, "deduplicated": True}
+        raise AmbiguousPublishError(f"LinkedIn publish outcome unknown: {reason}")
+
+    def publish_ugc(self, author: str, text: str, key: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Publish once per idempotency key; returns {"status": "posted", "response": ..., "deduplicated": bool}.
+
+        An earlier attempt that crashed or timed out mid-flight ("pending"/"unknown") is only
+        retried once LinkedIn confirms the post does not exist, or when `force` is set.
+        """
+        key = key or idempotency_key(author, text)
+        prior = self.store.get_publish(key)
+        if prior and prior["status"] == "published":
+            logger.info("Idempotency key %s already published; skipping", key[:12])
+            return {"status": "posted", "response": prior["response"], "deduplicated": True}
+        if prior and prior["status"] in ("pending", "unknown") and not force:
+            verified, existing = self.find_existing(author, text)
+            if existing:
+                self.store.record_publish(key, "published", existing)
+                return {"status": "posted", "response": existing, "deduplicated": True}
+            if not verified:
+                raise AmbiguousPublishError(
+                    f"Earlier publish for key {key[:12]} has unknown outcome and could not be verified"
+                )
+
+        payload = {
+            "author": author,
+            "lifecycleState": "PUBLISHED",
+            "specificContent": {
+                "com.linkedin.ugc.ShareContent": {
+                    "shareCommentary": {"text": text},
+                    "shareMediaCategory": "NONE",
+                }
+            },
+            "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
+        }
+        self.store.record_publish(key, "pending")
+        url = f"{self.base_url}/v2/ugcPosts"
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                r = self.session.post(url, headers=self._headers(), json=payload, timeout=(5, 30))
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if never_sent(e):
+                    # never reached the server: safe to retry
+                    if attempt >= self.max_retries:
+                        self.store.record_publish(key, "failed")
+                        raise
+                    self._sleep_before_retry(attempt, None)
+                    continue
+                return self._resolve_unknown(key, author, text, str(e))
+
+            server_delay = self.bucket.observe(r)
+            if ambiguous_status(r.status_code):
+                logger.warning("LinkedIn returned %s; the post may have been created", r.status_code)
+                return self._resolve_unknown(key, author, text, f"HTTP {r.status_code}")
+            if r.status_code in RETRYABLE_STATUSES and attempt < self.max_retries:
+                logger.warning("LinkedIn returned %s", r.status_code)
+                self._sleep_before_retry(attempt, server_delay)
+                continue
+            if not r.ok:
+                self.store.record_publish(key, "failed", {"status_code": r.status_code, "body": r.text[:500]})
+                logger.error("LinkedIn API error: %s - %s", r.status_code, r.text)
+                r.raise_for_status()
+            result = r.json() if r.content else {}
+            result.setdefault("id", r.headers.get("X-RestLi-Id"))
+            self.store.record_publish(key, "published", result)
+            logger.info("Posted to LinkedIn: %s", result)
+            return {"status": "posted", "response": result, "deduplicated": False}
+        raise RuntimeError("unreachable")
+
+    def post_json(
+        self, url: str, payload: Dict[str, Any], headers: Dict[str, str], key: str, force: bool = False
+    ) -> Dict[str, Any]:
+        """Generic idempotent POST with retries on throttling (429/503) (used for Ayrshare).
+
+        There is no way to look the post up afterwards, so an earlier attempt with an unknown
+        outcome ("pending"/"unknown") is refused unless `force` is set.
+        """
+        prior = self.store.get_publish(key)
+        if prior and prior["status"] == "published":
+            return {"status": "posted", "response": prior["response"], "deduplicated": True}
+        if prior and prior["status"] in ("pending", "unknown") and not force:
+            raise AmbiguousPublishError(
+                f"Earlier publish for key {key[:12]} has unknown outcome; check the account and retry with force"
+            )
+        bucket = get_bucket(url.split("/")[2])
+        self.store.record_publish(key, "pending")
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                r = self.session.post(url, json=payload, headers=headers, timeout=(5, 30))
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if never_sent(e):
+                    if attempt >= self.max_retries:
+                        self.store.record_publish(key, "failed")
+                        raise
+                    self._sleep_before_retry(attempt, None)
+                    continue
+                self.store.record_publish(key, "unknown")
+                raise AmbiguousPublishError(f"Publish outcome unknown: {e}") from e
+            server_delay = bucket.observe(r)
+            if ambiguous_status(r.status_code):
+                self.store.record_publish(key, "unknown", {"status_code": r.status_code, "body": r.text[:500]})
+                raise AmbiguousPublishError(f"Publish outcome unknown: HTTP {r.status_code}")
+            if r.status_code in RETRYABLE_STATUSES and attempt < self.max_retries:
+                self._sleep_before_retry(attempt, server_delay)
+                continue
+            if not r.ok:
+                self.store.record_publish(key, "failed", {"status_code": r.status_code, "body": r.text[:500]})
+                r.raise_for_status()
+            result = r.json() if r.content else {}
+            self.store.record_publish(key, "published", result)
+            return {"status": "posted", "response": result, "deduplicated": False}
+        raise RuntimeError("unreachable")
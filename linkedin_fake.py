@@ -0,0 +1,161 @@
+"""Local fake of the LinkedIn UGC endpoint for offline publishing tests.
+
+Usage:
+    with FakeLinkedInServer() as fake:
+        fake.script(429, 503)          # next responses, then normal 201s
+        os.environ["LINKEDIN_API_BASE"] = fake.base_url
+
+For load tests, `latency` (a mock_provider.parse_latency spec) delays every response and
+`error_rate` fails that fraction of posts with `error_status`, reproducibly for a given seed.
+"""
+from typing import Any, Dict, List, Union
+import json
+import time
+import random
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from mock_provider import parse_latency
+
+logger = logging.getLogger("valtrilabs.linkedin_fake")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeLinkedInServer"
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        logger.debug(fmt, *args)
+
+    def _send(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # client gave up (simulated timeout); the post is already stored
+            pass
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/v2/ugcPosts":
+            return self._send(404, {"message": "not found"})
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        fake = self.server
+        action = fake._next_action()
+        fake._delay()
+        if isinstance(action, int) and action >= 400:
+            headers = {"Retry-After": str(fake.retry_after)} if action == 429 else {}
+            return self._send(action, {"status": action, "message": "injected"}, headers)
+        urn = fake._store(payload)
+        if action == "timeout":
+            # created server-side, but the client never sees the response in time
+            time.sleep(fake.timeout_delay)
+        self._send(201, {"id": urn}, {"X-RestLi-Id": urn})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path != "/v2/ugcPosts" or parse_qs(url.query).get("q") != ["authors"]:
+            return self._send(404, {"message": "not found"})
+        self.server._delay()
+        with self.server._lock:
+            elements = [dict(p) for p in reversed(self.server.posts)]
+        self._send(200, {"elements": elements})
+
+
+class FakeLinkedInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0,
+    ):
+        super().__init__((host, port), _Handler)
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self.posts: List[Dict[str, Any]] = []
+        self.requests = 0
+        self.retry_after = 0.05
+        self.timeout_delay = 1.0
+        self._script: List[Union[int, str]] = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def script(self, *actions: Union[int, str]) -> None:
+        """Queue responses: HTTP status codes (429, 503, ...) or "timeout"."""
+        with self._lock:
+            self._script.extend(actions)
+
+    def _next_action(self) -> Union[int, str, None]:
+        with self._lock:
+            self.requests += 1
+            if self._script:
+                return self._script.pop(0)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return self.error_status
+            return None
+
+    def _delay(self) -> None:
+        with self._lock:
+            delay = self.latency(self._rng)
+        if delay:
+            time.sleep(delay)
+
+    def _store(self, payload: Dict[str, Any]) -> str:
+        with self._lock:
+            urn = f"urn:li:share:{len(self.posts) + 1}"
+            self.posts.append(dict(payload, id=urn))
+            return urn
+
+    def start(self) -> "FakeLinkedInServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-linkedin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeLinkedInServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake LinkedIn UGC endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0", help='e.g. "lognormal:-1.5,0.5" (seconds)')
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG)
+    server = FakeLinkedInServer(
+        port=args.port, latency=args.latency, error_rate=args.error_rate, error_status=args.error_status, seed=args.seed
+    ).start()
+    print(f"Fake LinkedIn UGC endpoint on {server.base_url} (set LINKEDIN_API_BASE to use it)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
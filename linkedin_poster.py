@@ -3,50 +3,47 @@ from typing import Optional, Dict
 import os
 import requests
 import logging
+from utils import profile_env
+from tracing import traced, annotate
+from linkedin_client import LinkedInClient, idempotency_key as make_idempotency_key
 
 logger = logging.getLogger("valtrilabs.linkedin")
 
 
 class LinkedInPoster:
-    def __init__(self, test_mode: bool = True):
-        self.test_mode = os.getenv("TEST_MODE", str(test_mode)).lower() in ("1", "true", "yes")
-        self.access_token = os.getenv("LINKEDIN_ACCESS_TOKEN")
-        self.person_id = os.getenv("LINKEDIN_PERSON_ID")
-        self.ayrshare_key = os.getenv("AYRSHARE_API_KEY")
-        self.buffer_token = os.getenv("BUFFER_ACCESS_TOKEN")
+    def __init__(self, test_mode: bool = True, profile: Optional[str] = None):
+        # credentials may be set per profile, e.g. ARAB_GLOBAL_CRYPTO_LINKEDIN_ACCESS_TOKEN
+        self.profile = profile
+        self._default_test_mode = test_mode
+        self._load_credentials()
+        from settings import get_settings
+        get_settings().subscribe(self._on_settings)
 
-    def post_text_linkedin(self, text: str) -> Dict[str, str]:
+    def _load_credentials(self) -> None:
+        self.test_mode = os.getenv("TEST_MODE", str(self._default_test_mode)).lower() in ("1", "true", "yes")
+        self.access_token = profile_env(self.profile, "LINKEDIN_ACCESS_TOKEN")
+        self.person_id = profile_env(self.profile, "LINKEDIN_PERSON_ID")
+        self.ayrshare_key = profile_env(self.profile, "AYRSHARE_API_KEY")
+        self.buffer_token = profile_env(self.profile, "BUFFER_ACCESS_TOKEN")
+
+    def _on_settings(self, snapshot, changed) -> None:
+        # per-profile overrides mean any key may be a credential; re-reading is cheap
+        if "TEST_MODE" in changed or any(k.endswith(("_TOKEN", "_PERSON_ID", "_API_KEY")) for k in changed):
+            self._load_credentials()
+            logger.info("LinkedIn settings reloaded for profile %s", self.profile or "default")
+
+    def post_text_linkedin(self, text: str, idempotency_key: Optional[str] = None) -> Dict[str, str]:
         """Post text to LinkedIn using the v2 UGC API. Returns response info."""
         if self.test_mode:
             logger.info("Test mode enabled — preview only\n%s", text)
             return {"status": "preview", "content": text}
         if not self.access_token or not self.person_id:
             raise RuntimeError("LinkedIn access token or person id not configured")
-        url = "https://api.linkedin.com/v2/ugcPosts"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "X-Restli-Protocol-Version": "2.0.0",
-            "Content-Type": "application/json",
-        }
         # Build author URN for personal profile
         author = self.person_id if self.person_id.startswith("urn:") else f"urn:li:person:{self.person_id}"
-        payload = {
-            "author": author,
-            "lifecycleState": "PUBLISHED",
-            "specificContent": {
-                "com.linkedin.ugc.ShareContent": {
-                    "shareCommentary": {"text": text},
-                    "shareMediaCategory": "NONE",
-                }
-            },
-            "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
-        }
         try:
-            r = requests.post(url, headers=headers, json=payload, timeout=30)
-            r.raise_for_status()
-            result = r.json()
-            logger.info("Posted to LinkedIn: %s", result)
-            return {"status": "posted", "response": result}
+            # pooled session, retries with backoff, throttling and an idempotency ledger
+            return LinkedInClient(self.access_token).publish_ugc(author, text, key=idempotency_key)
         except requests.exceptions.HTTPError as e:
             logger.error("LinkedIn API error: %s - %s", e.response.status_code, e.response.text)
             raise
@@ -54,7 +51,7 @@ class LinkedInPoster:
             logger.exception("Failed to post to LinkedIn")
             raise
 
-    def post_via_ayrshare(self, text: str) -> Dict[str, str]:
+    def post_via_ayrshare(self, text: str, idempotency_key: Optional[str] = None) -> Dict[str, str]:
         if self.test_mode:
             logger.info("Test mode — Ayrshare preview\n%s", text)
             return {"status": "preview", "content": text}
@@ -63,23 +60,25 @@ class LinkedInPoster:
         url = "https://app.ayrshare.com/api/v1/post"
         headers = {"Authorization": f"Bearer {self.ayrshare_key}", "Content-Type": "application/json"}
         payload = {"post": text, "platforms": ["linkedin"], "media": []}
+        key = "ayrshare:" + (idempotency_key or make_idempotency_key("ayrshare", text))
         try:
-            r = requests.post(url, json=payload, headers=headers, timeout=30)
-            r.raise_for_status()
-            return {"status": "posted", "response": r.json()}
+            return LinkedInClient(self.access_token or "").post_json(url, payload, headers, key)
         except Exception:
             logger.exception("Ayrshare post failed")
             raise
 
-    def post(self, text: str, via: Optional[str] = None) -> Dict[str, str]:
+    @traced("linkedin.post")
+    def post(self, text: str, via: Optional[str] = None, idempotency_key: Optional[str] = None) -> Dict[str, str]:
+        """Publish `text`; repeated calls with the same idempotency key never double-post."""
+        annotate(via=via or "linkedin", profile=self.profile or "default", test_mode=self.test_mode, chars=len(text))
         if via == "ayrshare":
-            return self.post_via_ayrshare(text)
+            return self.post_via_ayrshare(text, idempotency_key)
         elif via == "buffer":
             # Buffer integration placeholder — requires OAuth token
             logger.info("Buffer posting not implemented; falling back to LinkedIn API")
-            return self.post_text_linkedin(text)
+            return self.post_text_linkedin(text, idempotency_key)
         else:
-            return self.post_text_linkedin(text)
+            return self.post_text_linkedin(text, idempotency_key)
 
 
 if __name__ == "__main__":
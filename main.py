@@ -1,70 +1,161 @@
-"""Main scheduler and interactive CLI for ValtriLabs LinkedIn automation."""
+"""Main scheduler and CLI for ValtriLabs LinkedIn automation.
+
+    python main.py ingest                 # build the knowledge base from data/pdfs
+    python main.py generate --count 3     # preview posts (--live to publish)
+    python main.py publish                # publish the latest saved draft
+    python main.py snapshot export        # portable index snapshot (RAG_SNAPSHOT=... to use it)
+    python main.py schedule               # run the daily scheduler
+    python main.py bench --quick          # scripts/bench_pipeline.py
+    python main.py                        # interactive menu
+
+Heavy dependencies (torch, sentence-transformers, chromadb, pymupdf, pytz) are imported
+inside the commands that use them, so `publish` starts without loading any of them.
+"""
 import os
-from dotenv import load_dotenv
+import sys
+import argparse
+from settings import get_settings
 
 # Load .env FIRST before any other imports that use os.getenv()
-load_dotenv()
+get_settings()
 
 import logging
-import schedule
-import time
-from datetime import datetime
-import pytz
-from utils import setup_logging, ensure_data_dirs
-from pdf_processor import load_pdfs, chunk_text
-from rag_system import RAGStore
-from ai_provider import AIProvider
-from content_generator import ContentGenerator
-from linkedin_poster import LinkedInPoster
+from typing import TYPE_CHECKING, List, Optional
+from utils import setup_logging, ensure_data_dirs, active_profiles, profile_env
+from tracing import traced
 import config
 
+if TYPE_CHECKING:
+    from rag_system import RAGStore
+    from content_generator import ContentGenerator
+    from scheduler import DailySchedule
+
 logger = setup_logging()
 
 
-def build_knowledge_base():
-    logger.info("Building knowledge base from PDFs")
-    docs = load_pdfs("data/pdfs")
+def build_knowledge_base(pdf_dir: str = "data/pdfs"):
+    from pdf_processor import load_chunks
+    from rag_system import RAGStore
+    logger.info("Building knowledge base from PDFs in %s", pdf_dir)
+    docs = list(load_chunks(pdf_dir))
     rag = RAGStore(persist_dir="data/chroma_db")
-    rag.build_from_documents(docs)
+    # data/pdfs/<profile>/ goes to that profile's shard, everything else is shared
+    rag.ingest(docs, root=pdf_dir)
     rag.persist()
     return rag
 
 
-def create_and_post(rag: RAGStore, live: bool = False):
-    ai = AIProvider()
-    cg = ContentGenerator(rag, ai)
-    # rotate theme/format
+def create_and_post(rag: "RAGStore", live: bool = False, profile: Optional[str] = None, count: int = 1):
+    from ai_provider import AIProvider
+    from content_generator import ContentGenerator
+    # one generator for the whole run, so the model and provider client are set up once
+    cg = ContentGenerator(rag, AIProvider(), profile=profile)
+    for _ in range(count):
+        _create_one(cg, live)
+
+
+@traced("main.create_and_post")
+def _create_one(cg: "ContentGenerator", live: bool) -> None:
     import random
-    profile_key = os.getenv("CONTENT_PROFILE", config.DEFAULT_PROFILE)
-    profile = config.PROFILES.get(profile_key, config.PROFILES[config.DEFAULT_PROFILE])
-    theme = random.choice(profile.get("content_themes", []))
+    from linkedin_poster import LinkedInPoster
+    from outbox import Outbox, OutboxWorker
+    from pipeline import pick_theme
+    from theme_cache import theme_query
+    # rotate theme/format
+    theme = pick_theme(cg.store, cg.profile_key)
     fmt = random.choice(config.POST_FORMATS)
-    services = profile.get("company_info", {}).get("services", "")
-    query = f"{theme} {services}"
-    post = cg.generate_post(theme, fmt, query)
-    poster = LinkedInPoster(test_mode=not live)
+    post = cg.generate_post(theme, fmt, theme_query(cg.profile_key, theme))
+    if not live:
+        LinkedInPoster(test_mode=True, profile=cg.profile_key).post(post['content'])
+        Outbox(cg.store).enqueue(post, state="drafted")
+        return
+    # hand off to the outbox; any worker (this one included) publishes it exactly once
+    outbox = Outbox(cg.store)
+    job_id = outbox.enqueue(post, state="approved")
+    # only this post; other due jobs are left to their own slots and workers
+    job = OutboxWorker(outbox).process(job_id)
+    logger.info("Posting result: %s", job and job.get("outcome"))
+
+
+# settings (with or without a <PROFILE>_ prefix) that change when a profile posts
+SCHEDULE_SETTINGS = (
+    "POST_TIMES", "POST_TIME_HOUR", "POST_TIME_MINUTE", "TIMEZONE",
+    "SCHEDULE_JITTER_SECONDS", "SCHEDULE_CATCH_UP_SECONDS", "PREGENERATE_LEAD_SECONDS",
+)
+
+
+def profile_schedule(profile: str, pipeline, hour: int, minute: int, tz_name: str) -> "DailySchedule":
+    from scheduler import DailySchedule, parse_slots
+    p_hour = int(profile_env(profile, "POST_TIME_HOUR", str(hour)))
+    p_minute = int(profile_env(profile, "POST_TIME_MINUTE", str(minute)))
+    # POST_TIMES="11:00,17:30" adds more daily slots; otherwise the single hour/minute slot
+    slots = parse_slots(profile_env(profile, "POST_TIMES", "")) or [(p_hour, p_minute)]
+    p_tz = profile_env(profile, "TIMEZONE", tz_name)
+    catch_up = float(profile_env(profile, "SCHEDULE_CATCH_UP_SECONDS", str(6 * 3600)))
+    logger.info("%s posts at %s %s", profile, ", ".join(f"{h:02d}:{m:02d}" for h, m in slots), p_tz)
+    # drafts are generated and linted PREGENERATE_LEAD_SECONDS early; the slot only publishes
+    schedule = DailySchedule(
+        f"{profile}_post",
+        slots,
+        p_tz,
+        pipeline.publish,
+        jitter_seconds=float(profile_env(profile, "SCHEDULE_JITTER_SECONDS", "0")),
+        catch_up_seconds=catch_up,
+        prepare=pipeline.prepare,
+        lead_seconds=float(profile_env(profile, "PREGENERATE_LEAD_SECONDS", "900")),
+    )
+    # a slot replayed after downtime is generated inline by the pipeline within the same window
+    pipeline.catch_up_seconds = catch_up
+    return schedule
+
+
+def schedule_daily(rag: "RAGStore", hour: int, minute: int, tz_name: str, live: bool = False):
+    """Schedule every active profile in this process.
+
+    Each profile may override the defaults with <PROFILE>_POST_TIMES, <PROFILE>_POST_TIME_HOUR,
+    <PROFILE>_POST_TIME_MINUTE and <PROFILE>_TIMEZONE (e.g. ARAB_GLOBAL_CRYPTO_TIMEZONE).
+    Edits to these in .env are picked up while running.
+    """
+    from scheduler import Scheduler
+    from pipeline import build_pipelines
+    profiles = active_profiles()
+    pipelines = build_pipelines(rag, profiles, live=live)
+    # one bounded pool runs every profile's prepare/publish jobs
+    scheduler = Scheduler(max_workers=int(os.getenv("SCHEDULER_WORKERS", str(max(2, len(profiles))))))
+    for profile, pipeline in pipelines.items():
+        scheduler.add(profile_schedule(profile, pipeline, hour, minute, tz_name))
+
+    def reschedule(snapshot, changed):
+        if not any(key.endswith(SCHEDULE_SETTINGS) for key in changed):
+            return
+        for profile, pipeline in pipelines.items():
+            try:
+                scheduler.replace(profile_schedule(profile, pipeline, hour, minute, tz_name))
+            except Exception:
+                logger.exception("Keeping the previous schedule for %s", profile)
+
+    settings = get_settings()
+    settings.subscribe(reschedule)
+    settings.watch()
     try:
-        res = poster.post(post['content'])
-        logger.info("Posting result: %s", res)
-    except Exception:
-        logger.exception("Failed to post")
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
 
 
-def schedule_daily(rag: RAGStore, hour: int, minute: int, tz_name: str, live: bool = False):
-    tz = pytz.timezone(tz_name)
-    def job():
-        logger.info("Scheduled job running at %s", datetime.now(tz).isoformat())
-        create_and_post(rag, live=live)
+def default_live() -> bool:
+    return os.getenv("TEST_MODE", "true").lower() not in ("1", "true")
 
-    schedule_time = f"{hour:02d}:{minute:02d}"
-    schedule.every().day.at(schedule_time).do(job)
-    logger.info("Scheduled daily posting at %s %s (local schedule time string)", schedule_time, tz_name)
-    while True:
-        schedule.run_pending()
-        time.sleep(10)
+
+def run_schedule(rag: "RAGStore", live: bool) -> None:
+    hour = int(os.getenv("POST_TIME_HOUR", "11"))
+    minute = int(os.getenv("POST_TIME_MINUTE", "0"))
+    tz = os.getenv("TIMEZONE", "America/New_York")
+    schedule_daily(rag, hour, minute, tz, live=live)
 
 
 def interactive():
+    from rag_system import RAGStore
     ensure_data_dirs()
     rag = RAGStore(persist_dir="data/chroma_db")
     print("ValtriLabs LinkedIn Automation — Interactive Menu")
@@ -78,10 +169,7 @@ def interactive():
         elif choice == "3":
             create_and_post(rag, live=True)
         elif choice == "4":
-            hour = int(os.getenv("POST_TIME_HOUR", "11"))
-            minute = int(os.getenv("POST_TIME_MINUTE", "0"))
-            tz = os.getenv("TIMEZONE", "America/New_York")
-            schedule_daily(rag, hour, minute, tz, live=(os.getenv("TEST_MODE", "true").lower() not in ("1","true")))
+            run_schedule(rag, live=default_live())
         elif choice == "5":
             print("Exiting")
             break
@@ -89,5 +177,109 @@ def interactive():
             print("Invalid choice")
 
 
-if __name__ == "__main__":
+# ============= CLI =============
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    ensure_data_dirs()
+    build_knowledge_base(args.pdfs)
+    return 0
+
+
+def cmd_generate(args: argparse.Namespace) -> int:
+    from rag_system import RAGStore
+    ensure_data_dirs()
+    create_and_post(RAGStore(persist_dir="data/chroma_db"), live=args.live, profile=args.profile, count=args.count)
+    return 0
+
+
+def cmd_publish(args: argparse.Namespace) -> int:
+    import post_saved_draft
+    try:
+        post_saved_draft.main()
+    except ValueError as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+
+def cmd_schedule(args: argparse.Namespace) -> int:
+    from rag_system import RAGStore
+    ensure_data_dirs()
+    run_schedule(RAGStore(persist_dir="data/chroma_db"), live=default_live() if args.live is None else args.live)
+    return 0
+
+
+def cmd_snapshot(args: argparse.Namespace) -> int:
+    from rag_system import RAGStore
+    if args.action == "export":
+        manifest = RAGStore(persist_dir="data/chroma_db", snapshot="").export_snapshot(args.path)
+        print(f"Exported {manifest['rows']} vectors ({manifest['model']}) to {args.path}")
+    else:
+        ensure_data_dirs()
+        counts = RAGStore(persist_dir="data/chroma_db", snapshot="").import_snapshot(args.path)
+        print(f"Imported {sum(counts.values())} vectors from {args.path} into data/chroma_db")
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    import runpy
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "bench_pipeline.py")
+    sys.argv = [script] + args.bench_args
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        return e.code or 0
+    return 0
+
+
+def cmd_menu(args: argparse.Namespace) -> int:
     interactive()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="ValtriLabs LinkedIn automation")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("ingest", help="build the knowledge base from PDFs")
+    p.add_argument("--pdfs", default="data/pdfs", help="directory of source documents")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("generate", help="generate posts (preview unless --live)")
+    p.add_argument("--count", type=int, default=1)
+    p.add_argument("--profile", default=None, help="content profile (default: CONTENT_PROFILE)")
+    p.add_argument("--live", action="store_true", help="publish through the outbox instead of drafting")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("publish", help="publish the latest saved draft (TEST_MODE=true only prints it)")
+    p.set_defaults(func=cmd_publish)
+
+    p = sub.add_parser("schedule", help="run the daily scheduler for the active profiles")
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--live", dest="live", action="store_true", default=None)
+    mode.add_argument("--test", dest="live", action="store_false", help="preview only (default: from TEST_MODE)")
+    p.set_defaults(func=cmd_schedule)
+
+    p = sub.add_parser("snapshot", help="export or import a portable index snapshot")
+    p.add_argument("action", choices=["export", "import"])
+    p.add_argument("path", nargs="?", default="data/index_snapshot")
+    p.set_defaults(func=cmd_snapshot)
+
+    # everything after `bench` goes to scripts/bench_pipeline.py untouched (see main)
+    sub.add_parser("bench", help="run the offline pipeline benchmark (bench --help for its options)")
+
+    p = sub.add_parser("menu", help="interactive menu (the default with no command)")
+    p.set_defaults(func=cmd_menu)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["bench"]:
+        return cmd_bench(argparse.Namespace(bench_args=argv[1:]))
+    args = build_parser().parse_args(argv)
+    return getattr(args, "func", cmd_menu)(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Process-wide cached market snapshot (CoinGecko) with background refresh."""
+from typing import Callable, Dict, Optional, Tuple
+import os
+import time
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("valtrilabs.market_data")
+
+COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price"
+
+
+def format_snapshot(ids: str, data: Dict[str, dict]) -> str:
+    parts = []
+    for tk in ids.split(","):
+        if tk in data:
+            p = data[tk]
+            parts.append(f"{tk.upper()}: ${p.get('usd'):,} ({p.get('usd_24h_change'):+.2f}% 24h)")
+    return ("Recent market snapshot: " + "; ".join(parts) + ".") if parts else ""
+
+
+class MarketDataService:
+    """Serve market snippets from a TTL cache.
+
+    Reads return whatever is cached (stale-while-revalidate) and schedule a refresh
+    when the entry is older than `ttl`. A daemon thread keeps tracked ids warm. Only the
+    first read of some ids, with nothing cached yet, waits for the fetch, and for at most
+    `first_fetch_timeout` seconds, so a one-shot `generate` is still grounded.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        fetcher: Optional[Callable[[str], Dict[str, dict]]] = None,
+        first_fetch_timeout: Optional[float] = None,
+    ):
+        self.ttl = ttl if ttl is not None else float(os.getenv("MARKET_CACHE_TTL", "300"))
+        self.first_fetch_timeout = (
+            first_fetch_timeout if first_fetch_timeout is not None
+            else float(os.getenv("MARKET_FIRST_FETCH_TIMEOUT", "3"))
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self._fetch = fetcher or self._fetch_coingecko
+        self._cache: Dict[str, Tuple[float, str]] = {}
+        self._inflight = set()
+        self._first_fetch: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _fetch_coingecko(self, ids: str) -> Dict[str, dict]:
+        r = self.session.get(
+            COINGECKO_URL,
+            params={"ids": ids, "vs_currencies": "usd", "include_24hr_change": "true"},
+            timeout=10,
+        )
+        r.raise_for_status()
+        return r.json()
+
+    def refresh(self, ids: str) -> None:
+        """Fetch synchronously and update the cache (used by the refresher thread)."""
+        try:
+            snippet = format_snapshot(ids, self._fetch(ids))
+            with self._lock:
+                self._cache[ids] = (time.monotonic(), snippet)
+        except Exception:
+            logger.exception("Market grounding fetch failed")
+        finally:
+            with self._lock:
+                self._inflight.discard(ids)
+                first = self._first_fetch.pop(ids, None)
+            if first is not None:
+                first.set()
+
+    def get_snippet(self, ids: str) -> str:
+        """Return the cached snippet for `ids` (possibly stale); with nothing cached yet, wait up
+        to `first_fetch_timeout` for the first fetch, and "" if it does not arrive in time."""
+        self.start()
+        with self._lock:
+            entry = self._cache.get(ids)
+            stale = entry is None or time.monotonic() - entry[0] > self.ttl
+            if stale and ids not in self._inflight:
+                self._inflight.add(ids)
+                if entry is None:
+                    # first sight of these ids: register so the refresher owns them
+                    self._cache[ids] = (float("-inf"), "")
+                    self._first_fetch[ids] = threading.Event()
+                self._wake.set()
+            first = self._first_fetch.get(ids) if not (entry and entry[1]) else None
+        if first is not None:
+            first.wait(self.first_fetch_timeout)
+            with self._lock:
+                entry = self._cache.get(ids)
+            if not (entry and entry[1]):
+                logger.warning("No market snapshot for %s yet; generating without market grounding", ids)
+        return entry[1] if entry else ""
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="market-data-refresher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(timeout=max(self.ttl / 2, 1))
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                due = [ids for ids, (ts, _) in self._cache.items() if now - ts > self.ttl / 2]
+                self._inflight.update(due)
+            for ids in due:
+                self.refresh(ids)
+
+
+class StubMarketData(MarketDataService):
+    """Offline stand-in with fixed prices; answers synchronously without threads."""
+
+    PRICES = {
+        "bitcoin": {"usd": 65000, "usd_24h_change": 1.25},
+        "ethereum": {"usd": 3200, "usd_24h_change": -0.5},
+    }
+
+    def __init__(self, prices: Optional[Dict[str, dict]] = None):
+        super().__init__(ttl=float("inf"), fetcher=lambda ids: prices or self.PRICES)
+
+    def get_snippet(self, ids: str) -> str:
+        return format_snapshot(ids, self._fetch(ids))
+
+    def start(self) -> None:
+        pass
+
+
+_service: Optional[MarketDataService] = None
+_service_lock = threading.Lock()
+
+
+def get_market_service() -> MarketDataService:
+    """Shared service for the process; MARKET_DATA_STUB=true selects the offline stub."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            if os.getenv("MARKET_DATA_STUB", "false").lower() in ("1", "true"):
+                _service = StubMarketData()
+            else:
+                _service = MarketDataService()
+        return _service
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    svc = get_market_service()
+    print(repr(svc.get_snippet("bitcoin,ethereum")))
+    time.sleep(3)
+    print(repr(svc.get_snippet("bitcoin,ethereum")))
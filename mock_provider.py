@@ -0,0 +1,153 @@
+"""Deterministic local LLM stand-in for load tests and offline runs (AI_PROVIDER=mock or local).
+
+Behaviour is configured from the environment:
+    MOCK_LATENCY="lognormal:-0.5,0.4"   time to first token, seconds: fixed:S | uniform:A,B |
+                                        normal:MEAN,SD | lognormal:MU,SIGMA
+    MOCK_TOKENS_PER_SEC=40              output rate after the first token (0 = instant)
+    MOCK_ERROR_RATE=0.02                fraction of calls that fail
+    MOCK_ERROR=rate_limit               rate_limit | server | timeout
+    MOCK_SEED=0                         same seed + same prompts = same texts, delays and errors
+"""
+from typing import Callable, Dict, Iterator
+import os
+import re
+import time
+import random
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger("valtrilabs.mock_provider")
+
+_OPENERS = [
+    "Most teams underestimate how much {a} shapes {b}.",
+    "Here is what {a} actually changes for {b}.",
+    "Three things we learned shipping {a} into {b}.",
+    "{A} is not a feature; it is a constraint on {b}.",
+]
+_BODY = [
+    "The failure mode is rarely the protocol itself; it is the operational gap around {a}.",
+    "Desks that measure {b} weekly catch drift long before it shows up in settlement.",
+    "Start with the boring parts: custody flows, reconciliation and clear ownership of {a}.",
+    "When {b} tightens, the teams with tested runbooks keep quoting while others pause.",
+    "Treat {a} as a budget: every extra hop adds latency, fees and another party to trust.",
+    "The numbers only matter if the process behind {b} survives a bad week.",
+]
+_CLOSERS = [
+    "What is the one metric you watch for {a}?",
+    "If you are rebuilding {b} this quarter, compare notes with us.",
+    "Curious how others are handling {a} right now.",
+]
+_STOP = set(
+    "the and for with are this that your you our from about write post text only never like what when into "
+    "their them then than have will would should could background knowledge paraphrase naturally cite chapters".split()
+)
+
+
+class MockError(RuntimeError):
+    """Injected provider failure; `kind` mirrors what real SDKs raise (rate_limit, server, timeout)."""
+
+    def __init__(self, kind: str):
+        super().__init__(f"mock provider injected {kind} error")
+        self.kind = kind
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Parse "fixed:0.5", "uniform:0.2,1.5", "normal:1,0.2" or "lognormal:-0.5,0.4" into a sampler (seconds)."""
+    kind, _, raw = (spec or "fixed:0").partition(":")
+    args = [float(x) for x in raw.split(",") if x.strip()] or [0.0]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return lambda rng: max(args[0], 0.0)
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "normal":
+        return lambda rng: max(rng.gauss(args[0], args[1]), 0.0)
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(args[0], args[1])
+    raise ValueError(f"Unknown latency distribution {spec!r}")
+
+
+class MockLLM:
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        tokens_per_sec: float = 0.0,
+        error_rate: float = 0.0,
+        error_kind: str = "rate_limit",
+        seed: int = 0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.latency = parse_latency(latency)
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.error_kind = error_kind
+        self.sleep = sleep
+        self._rng = random.Random(seed)
+        self._seed = seed
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls) -> "MockLLM":
+        return cls(
+            latency=os.getenv("MOCK_LATENCY", "fixed:0"),
+            tokens_per_sec=float(os.getenv("MOCK_TOKENS_PER_SEC", "0")),
+            error_rate=float(os.getenv("MOCK_ERROR_RATE", "0")),
+            error_kind=os.getenv("MOCK_ERROR", "rate_limit"),
+            seed=int(os.getenv("MOCK_SEED", "0")),
+        )
+
+    def _plan(self, prompt: str):
+        """Draw this call's delay, failure and text from the shared seeded stream."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency(self._rng)
+            fail = self._rng.random() < self.error_rate
+            call = self.calls
+        digest = hashlib.sha1(f"{self._seed}:{call}:{prompt}".encode("utf-8")).digest()
+        return delay, fail, self._compose(prompt, random.Random(digest))
+
+    @staticmethod
+    def _compose(prompt: str, rng: random.Random) -> str:
+        # topic words come from the retrieved context when the prompt has one, so grounding
+        # and duplicate checks see text that varies with retrieval
+        start = prompt.rfind("CONTEXT")
+        source = prompt[start:].split("\nOutput:")[0] if start >= 0 else prompt[-2000:]
+        words = [w for w in re.findall(r"[a-z]{4,}", source.lower()) if w not in _STOP] or ["liquidity", "custody"]
+        a, b = rng.choice(words), rng.choice(words)
+        fill = lambda s: s.format(a=a, b=b, A=a.capitalize())
+        body = rng.sample(_BODY, 3)
+        return "\n\n".join(
+            [fill(rng.choice(_OPENERS))] + [fill(s) for s in body] + [fill(rng.choice(_CLOSERS)), "#Crypto #DigitalAssets"]
+        )
+
+    def _fail(self) -> None:
+        if self.error_kind == "timeout":
+            # a hung upstream: the caller's own timeout decides how long this really takes
+            self.sleep(30)
+        raise MockError(self.error_kind)
+
+    def _token_delay(self, n_tokens: int) -> float:
+        return n_tokens / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+    def generate(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Dict[str, str]:
+        delay, fail, text = self._plan(prompt)
+        self.sleep(delay)
+        if fail:
+            self._fail()
+        tokens = text.split(" ")[: max_tokens]
+        self.sleep(self._token_delay(len(tokens)))
+        return {"text": " ".join(tokens), "provider": "mock"}
+
+    def stream(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2) -> Iterator[str]:
+        """Yield the text word by word at the configured token rate."""
+        delay, fail, text = self._plan(prompt)
+        self.sleep(delay)
+        if fail:
+            self._fail()
+        per_token = self._token_delay(1)
+        for i, token in enumerate(text.split(" ")[: max_tokens]):
+            if per_token:
+                self.sleep(per_token)
+            yield token if i == 0 else " " + token
@@ -0,0 +1,267 @@
+"""Durable SQLite outbox between generation and publishing, drained by leased workers.
+
+Job states: drafted -> approved | scheduled -> publishing -> published | failed.
+Delivery is at-least-once; the LinkedIn idempotency ledger turns redelivery into a no-op.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import os
+import json
+import time
+import socket
+import threading
+import logging
+from post_store import PostStore, get_store, connect
+from tracing import span
+
+logger = logging.getLogger("valtrilabs.outbox")
+
+STATES = ("drafted", "approved", "scheduled", "publishing", "published", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id INTEGER,
+    profile TEXT,
+    content TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL,
+    scheduled_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_state_scheduled ON outbox(state, scheduled_at);
+"""
+
+
+class Outbox:
+    def __init__(self, store: Optional[PostStore] = None):
+        self.store = store or get_store()
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.store.path)
+        return conn
+
+    @staticmethod
+    def _row(row) -> Dict[str, Any]:
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job.get("result") else None
+        return job
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM outbox WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def enqueue(
+        self,
+        post: Dict[str, Any],
+        state: str = "drafted",
+        scheduled_at: Optional[float] = None,
+        key: Optional[str] = None,
+        max_attempts: int = 5,
+    ) -> int:
+        """Add a post to the outbox; enqueuing the same key twice returns the existing job id."""
+        if state not in ("drafted", "approved", "scheduled"):
+            raise ValueError(f"Cannot enqueue in state {state!r}")
+        key = key or f"post:{post['id']}"
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR IGNORE INTO outbox (post_id, profile, content, idempotency_key, state, scheduled_at, "
+            "max_attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (post.get("id"), post.get("profile"), post["content"], key, state, scheduled_at, max_attempts, now, now),
+        )
+        return conn.execute("SELECT id FROM outbox WHERE idempotency_key = ?", (key,)).fetchone()[0]
+
+    def approve(self, job_id: int, scheduled_at: Optional[float] = None) -> None:
+        """Move a drafted job to approved (publish asap) or scheduled (publish at `scheduled_at`)."""
+        state = "scheduled" if scheduled_at else "approved"
+        self._conn().execute(
+            "UPDATE outbox SET state = ?, scheduled_at = ?, updated_at = ? WHERE id = ? AND state = 'drafted'",
+            (state, scheduled_at, time.time(), job_id),
+        )
+
+    def claim(self, worker_id: str, lease_seconds: float = 120, job_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next due job (or `job_id` only, if it is due); expired leases of
+        crashed workers are reclaimed."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM outbox WHERE (state = 'approved' "
+                "OR (state = 'scheduled' AND scheduled_at <= ?) "
+                "OR (state = 'publishing' AND lease_expires < ?)) "
+                "AND (? IS NULL OR id = ?) "
+                "ORDER BY COALESCE(scheduled_at, created_at), id LIMIT 1",
+                (now, now, job_id, job_id),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE outbox SET state = 'publishing', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row["id"]),
+            )
+            job = self._row(conn.execute("SELECT * FROM outbox WHERE id = ?", (row["id"],)).fetchone())
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _finish(self, job: Dict[str, Any], worker_id: str, state: str, **fields: Any) -> bool:
+        sets = ", ".join(f"{k} = ?" for k in fields)
+        cur = self._conn().execute(
+            f"UPDATE outbox SET state = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+            f"{', ' + sets if sets else ''} WHERE id = ? AND state = 'publishing' AND lease_owner = ?",
+            (state, time.time(), *fields.values(), job["id"], worker_id),
+        )
+        if cur.rowcount == 0:
+            logger.warning("Lease on job %s lost before %s", job["id"], state)
+            return False
+        return True
+
+    def complete(self, job: Dict[str, Any], worker_id: str, result: Dict[str, Any]) -> None:
+        if self._finish(job, worker_id, "published", result=json.dumps(result)) and job.get("post_id"):
+            self.store.update_status(job["post_id"], "published")
+
+    def fail(self, job: Dict[str, Any], worker_id: str, error: str, retry_delay: float = 60) -> None:
+        """Reschedule with exponential backoff, or mark failed once attempts are exhausted."""
+        if job["attempts"] < job["max_attempts"]:
+            delay = retry_delay * (2 ** (job["attempts"] - 1))
+            self._finish(job, worker_id, "scheduled", scheduled_at=time.time() + delay, last_error=error)
+        elif self._finish(job, worker_id, "failed", last_error=error) and job.get("post_id"):
+            self.store.update_status(job["post_id"], "failed")
+
+    def release(self, job: Dict[str, Any], worker_id: str, retry_delay: float = 60) -> None:
+        """Give a claimed job back without counting the attempt (e.g. poster in test mode).
+
+        It comes back as scheduled `retry_delay` seconds from now, so the same drain pass or
+        worker loop does not claim it again straight away.
+        """
+        self._finish(job, worker_id, "scheduled", attempts=job["attempts"] - 1,
+                     scheduled_at=time.time() + retry_delay)
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def jobs(self, state: str, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT * FROM outbox WHERE state = ? ORDER BY id DESC LIMIT ?", (state, limit)
+        ).fetchall()
+        return [self._row(r) for r in rows]
+
+
+class OutboxWorker:
+    """Claims due jobs and publishes them; any number may run against one database."""
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        poster_factory: Optional[Callable[[Optional[str]], Any]] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 120,
+    ):
+        self.outbox = outbox
+        self.poster_factory = poster_factory or self._default_poster
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.lease_seconds = lease_seconds
+
+    @staticmethod
+    def _default_poster(profile: Optional[str]):
+        from linkedin_poster import LinkedInPoster
+        return LinkedInPoster(test_mode=False, profile=profile)
+
+    def process_one(self) -> Optional[Dict[str, Any]]:
+        """Publish one due job; returns the job (with its outcome) or None if nothing was due."""
+        return self.process(None)
+
+    def process(self, job_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Publish `job_id` if it is due (any due job when None); None if it could not be claimed."""
+        job = self.outbox.claim(self.worker_id, self.lease_seconds, job_id=job_id)
+        if job is None:
+            return None
+        with span("outbox.publish", job_id=job["id"], post_id=job.get("post_id"), attempt=job["attempts"]) as s:
+            self._publish(job)
+            s.set(outcome=job["outcome"])
+        return job
+
+    def _publish(self, job: Dict[str, Any]) -> None:
+        poster = self.poster_factory(job.get("profile"))
+        try:
+            res = poster.post(job["content"], idempotency_key=job["idempotency_key"])
+        except Exception as e:
+            logger.exception("Publishing outbox job %s failed (attempt %d)", job["id"], job["attempts"])
+            self.outbox.fail(job, self.worker_id, str(e))
+            job["outcome"] = "failed"
+            return
+        if res.get("status") != "posted":
+            logger.info("Poster returned %s for job %s; releasing", res.get("status"), job["id"])
+            self.outbox.release(job, self.worker_id)
+            job["outcome"] = res.get("status")
+            return
+        self.outbox.complete(job, self.worker_id, res)
+        logger.info("Published outbox job %s: %s", job["id"], res.get("response"))
+        job["outcome"] = "published"
+
+    def drain(self) -> int:
+        """Publish every job that is currently due; returns how many were attempted."""
+        n = 0
+        while self.process_one() is not None:
+            n += 1
+        return n
+
+    def run_forever(self, poll_interval: float = 5.0, stop: Optional[threading.Event] = None) -> None:
+        stop = stop or threading.Event()
+        logger.info("Outbox worker %s started", self.worker_id)
+        while not stop.is_set():
+            try:
+                job = self.process_one()
+                # a released job is rescheduled; wait for the next poll rather than spin
+                if job is not None and job["outcome"] in ("published", "failed"):
+                    continue
+            except Exception:
+                logger.exception("Outbox worker loop error")
+            stop.wait(poll_interval)
+
+
+def _worker_main(poll_interval: float) -> None:
+    from utils import setup_logging
+    from settings import get_settings
+    setup_logging()
+    # posters are built per job from os.environ, so reloading .env is all a worker needs
+    get_settings().watch()
+    OutboxWorker(Outbox()).run_forever(poll_interval)
+
+
+if __name__ == "__main__":
+    import argparse
+    import multiprocessing
+    from settings import get_settings
+
+    get_settings()
+    parser = argparse.ArgumentParser(description="Run outbox publishing workers")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--poll", type=float, default=5.0)
+    parser.add_argument("--stats", action="store_true", help="print job counts per state and exit")
+    args = parser.parse_args()
+    if args.stats:
+        print(Outbox().stats())
+    else:
+        procs = [multiprocessing.Process(target=_worker_main, args=(args.poll,)) for _ in range(args.workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
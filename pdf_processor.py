@@ -1,14 +1,10 @@
 """PDF processing: extract text from PDFs and chunk for RAG."""
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 import fitz  # pymupdf
 import os
 from pathlib import Path
 import logging
-try:
-    from docx import Document
-    _HAS_DOCX = True
-except Exception:
-    _HAS_DOCX = False
+import docx_stream
 
 logger = logging.getLogger("valtrilabs.pdf_processor")
 
@@ -48,21 +44,44 @@ def load_pdfs(folder: str = "data/pdfs") -> List[Tuple[str, str]]:
             logger.warning("No text extracted from %s", f)
             continue
         results.append((str(f), text))
-    # process DOCX files if python-docx available
-    if _HAS_DOCX:
-        for f in p.glob("**/*.docx"):
-            logger.info("Processing DOCX: %s", f)
-            try:
-                doc = Document(str(f))
-                paragraphs = [p.text for p in doc.paragraphs if p.text and p.text.strip()]
-                text = "\n".join(paragraphs)
-                if text:
-                    results.append((str(f), text))
-            except Exception:
-                logger.exception("Failed to extract DOCX: %s", f)
+    # DOCX files are streamed (docx_stream), so no document object tree is built
+    for f in p.glob("**/*.docx"):
+        logger.info("Processing DOCX: %s", f)
+        try:
+            text = docx_stream.extract_text(str(f))
+            if text:
+                results.append((str(f), text))
+        except Exception:
+            logger.exception("Failed to extract DOCX: %s", f)
     return results
 
 
+def load_chunks(folder: str = "data/pdfs", chunk_size: int = 1000, overlap: int = 200) -> Iterator[Tuple[str, str]]:
+    """Yield (filename, chunk) for every PDF and DOCX in folder, ready for RAGStore.ingest.
+
+    DOCX files go straight from the XML parser into the chunker, one document at a time.
+    """
+    p = Path(folder)
+    if not p.exists():
+        logger.warning("PDF folder does not exist: %s", folder)
+        return
+    for f in sorted(p.glob("**/*.pdf")):
+        logger.info("Processing PDF: %s", f)
+        text = extract_text_from_pdf(str(f))
+        if not text:
+            logger.warning("No text extracted from %s", f)
+            continue
+        for chunk in chunk_text(text, chunk_size, overlap):
+            yield str(f), chunk
+    for f in sorted(p.glob("**/*.docx")):
+        logger.info("Processing DOCX: %s", f)
+        try:
+            for chunk in docx_stream.iter_chunks(str(f), chunk_size, overlap):
+                yield str(f), chunk
+        except Exception:
+            logger.exception("Failed to extract DOCX: %s", f)
+
+
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
     """Chunk text with overlap for RAG retrieval."""
     if chunk_size <= overlap:
@@ -73,6 +92,8 @@ def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[st
     while start < L:
         end = min(start + chunk_size, L)
         out.append(text[start:end])
+        if end == L:
+            break
         start = end - overlap
         if start < 0:
             start = 0
@@ -0,0 +1,166 @@
+"""Slot pipeline: pre-generate and stage a draft ahead of each slot, publish at the slot."""
+from typing import Any, Dict, List, Optional, Sequence
+import os
+import time
+import random
+import threading
+import logging
+from datetime import datetime
+from rag_system import RAGStore
+from ai_provider import AIProvider
+from content_generator import ContentGenerator
+from linkedin_poster import LinkedInPoster
+from outbox import Outbox, OutboxWorker
+from post_history import HistoryIndex
+from post_store import get_store
+from tracing import span
+from theme_cache import theme_query
+from utils import profile_env
+import config
+
+logger = logging.getLogger("valtrilabs.pipeline")
+
+
+def pick_theme(store, profile_key: str, exclude: Sequence[str] = ()) -> str:
+    """Rotate themes per profile: random among those not used in the last half-rotation.
+
+    `exclude` holds themes already taken by unsaved drafts (e.g. pooled previews).
+    """
+    themes = config.PROFILES[profile_key].get("content_themes", [])
+    recent = set(store.recent_themes(profile_key, len(themes) // 2))
+    unused = [t for t in themes if t not in exclude]
+    fresh = [t for t in unused if t not in recent]
+    return random.choice(fresh or unused or themes)
+
+
+def generate_for_profile(
+    generator: ContentGenerator, save: bool = True, exclude_themes: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """Pick a theme and format for the generator's profile and run the production generation path."""
+    theme = pick_theme(generator.store, generator.profile_key, exclude_themes)
+    fmt = random.choice(config.POST_FORMATS)
+    return generator.generate_post(theme, fmt, theme_query(generator.profile_key, theme), save=save)
+
+
+class SlotPipeline:
+    """prepare(slot) runs `lead` seconds early (retrieval + LLM + lint) and stages the draft in
+    the outbox as `scheduled`; publish(slot) then only has to make the LinkedIn call.
+
+    If nothing is staged at the slot, publish waits for an in-flight prepare, then falls back to
+    the newest unpublished draft, then to generating on the spot, as long as it is still before
+    `slot + grace_seconds`. A slot replayed after downtime (the scheduler sends only the run, no
+    prepare) is generated on the spot if it is within `slot + catch_up_seconds`.
+    """
+
+    def __init__(
+        self,
+        rag: RAGStore,
+        live: bool = False,
+        grace_seconds: Optional[float] = None,
+        profile: Optional[str] = None,
+        ai: Optional[AIProvider] = None,
+        history: Optional[HistoryIndex] = None,
+        catch_up_seconds: Optional[float] = None,
+    ):
+        self.rag = rag
+        self.live = live
+        self.grace_seconds = grace_seconds if grace_seconds is not None else float(os.getenv("PUBLISH_GRACE_SECONDS", "900"))
+        self.generator = ContentGenerator(rag, ai or AIProvider(), profile=profile, history=history)
+        self.profile_key = self.generator.profile_key
+        if catch_up_seconds is None:
+            catch_up_seconds = float(profile_env(self.profile_key, "SCHEDULE_CATCH_UP_SECONDS", str(6 * 3600)))
+        self.catch_up_seconds = catch_up_seconds
+        self.outbox = Outbox(self.generator.store)
+        self._lock = threading.Lock()
+        self._staged: Dict[float, int] = {}  # slot timestamp -> outbox job id
+        self._preparing: Dict[float, threading.Event] = {}
+
+    def _stage(self, post: Dict[str, Any], slot: datetime) -> int:
+        state = "scheduled" if self.live else "drafted"
+        job_id = self.outbox.enqueue(post, state=state, scheduled_at=slot.timestamp() if self.live else None)
+        with self._lock:
+            self._staged[slot.timestamp()] = job_id
+        return job_id
+
+    def prepare(self, slot: datetime) -> None:
+        key = slot.timestamp()
+        with self._lock:
+            if key in self._staged or key in self._preparing:
+                return
+            done = self._preparing[key] = threading.Event()
+        started = time.monotonic()
+        try:
+            with span("pipeline.prepare", profile=self.profile_key, slot=slot.isoformat()) as s:
+                post = generate_for_profile(self.generator)
+                job_id = self._stage(post, slot)
+                s.set(post_id=post.get("id"), job_id=job_id)
+            logger.info(
+                "Staged post %s as outbox job %s for %s in %.1fs",
+                post.get("id"), job_id, slot.isoformat(), time.monotonic() - started,
+            )
+        finally:
+            done.set()
+            with self._lock:
+                self._preparing.pop(key, None)
+
+    def _fallback_draft(self, slot: datetime) -> Optional[int]:
+        for post in self.generator.store.latest(1, status="drafted", profile=self.profile_key):
+            job_id = self.outbox.enqueue(post, state="scheduled", scheduled_at=slot.timestamp())
+            self.outbox.approve(job_id, scheduled_at=slot.timestamp())
+            logger.warning("Using unpublished draft %s for slot %s", post["id"], slot.isoformat())
+            return job_id
+        return None
+
+    def publish(self, slot: datetime) -> Optional[Dict[str, Any]]:
+        with span("pipeline.publish", profile=self.profile_key, slot=slot.isoformat()) as s:
+            job = self._publish(slot)
+            s.set(job_id=job and job.get("id"), outcome=job and job.get("outcome"), lateness_s=round(time.time() - slot.timestamp(), 1))
+            return job
+
+    def _publish(self, slot: datetime) -> Optional[Dict[str, Any]]:
+        key = slot.timestamp()
+        deadline = key + self.grace_seconds
+        if time.time() >= deadline:
+            # a catch-up replay of a slot missed during downtime; nothing was prepared for it
+            deadline = key + max(self.catch_up_seconds, self.grace_seconds)
+        with self._lock:
+            job_id = self._staged.get(key)
+            pending = self._preparing.get(key)
+        if job_id is None and pending is not None:
+            logger.warning("Draft for %s still generating; waiting up to the deadline", slot.isoformat())
+            pending.wait(max(deadline - time.time(), 0))
+            with self._lock:
+                job_id = self._staged.get(key)
+        if job_id is None and self.live:
+            job_id = self._fallback_draft(slot)
+        if job_id is None and time.time() < deadline:
+            logger.warning("Nothing staged for %s; generating now", slot.isoformat())
+            try:
+                self.prepare(slot)
+            except Exception:
+                logger.exception("Late generation for %s failed", slot.isoformat())
+            with self._lock:
+                job_id = self._staged.get(key)
+        if job_id is None:
+            logger.error("Missed slot %s: no draft available before the deadline", slot.isoformat())
+            return None
+        with self._lock:
+            self._staged.pop(key, None)
+        if not self.live:
+            job = self.outbox.get(job_id)
+            LinkedInPoster(test_mode=True, profile=self.profile_key).post(job["content"])
+            return job
+        # the draft is already generated and linted: this is a single publish call, for this
+        # slot's job only (other profiles' and backlog jobs belong to their own slots/workers)
+        result = OutboxWorker(self.outbox).process(job_id)
+        if result is None:
+            logger.warning("Outbox job %s for %s was not due or is held by another worker", job_id, slot.isoformat())
+        logger.info("Slot %s publish result: %s", slot.isoformat(), result and result.get("outcome"))
+        return result
+
+
+def build_pipelines(rag: RAGStore, profiles: List[str], live: bool = False) -> Dict[str, SlotPipeline]:
+    """One pipeline per profile sharing the embedding model, provider client and history index."""
+    ai = AIProvider()
+    history = HistoryIndex(get_store(), rag.embed)
+    return {p: SlotPipeline(rag, live=live, profile=p, ai=ai, history=history) for p in profiles}
@@ -0,0 +1,71 @@
+"""In-memory embedding index over saved posts for near-duplicate detection."""
+from typing import Callable, List, Optional, Tuple
+import threading
+import logging
+import numpy as np
+from post_store import PostStore
+
+logger = logging.getLogger("valtrilabs.post_history")
+
+
+class HistoryIndex:
+    """Dense matrix of normalised post embeddings; top-1 lookup is one mat-vec product.
+
+    `embed` must return L2-normalised float32 rows (see RAGStore.embed). Vectors are
+    persisted in the post store so the index is rebuilt without re-encoding.
+    """
+
+    def __init__(self, store: PostStore, embed: Callable[[List[str]], np.ndarray]):
+        self.store = store
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # capacity x dim buffer
+        self._ids: List[int] = []
+
+    def _ensure_loaded(self) -> None:
+        if self._matrix is not None:
+            return
+        rows = self.store.load_embeddings()
+        ids = [r[0] for r in rows]
+        vecs = [np.frombuffer(r[1], dtype=np.float32) for r in rows]
+        # backfill posts saved before the index existed (e.g. migrated from posts.json)
+        missing = self.store.posts_without_embeddings()
+        if missing:
+            logger.info("Embedding %d historical posts for duplicate detection", len(missing))
+            new_vecs = self.embed([p["content"] for p in missing])
+            for post, vec in zip(missing, new_vecs):
+                self.store.add_embedding(post["id"], vec.astype(np.float32).tobytes())
+                ids.append(post["id"])
+                vecs.append(vec.astype(np.float32))
+        dim = vecs[0].shape[0] if vecs else 0
+        self._matrix = np.zeros((max(len(vecs) * 2, 64), dim), dtype=np.float32)
+        if vecs:
+            self._matrix[: len(vecs)] = np.vstack(vecs)
+        self._ids = ids
+
+    def nearest(self, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        """Return (post_id, cosine similarity) of the most similar saved post."""
+        with self._lock:
+            self._ensure_loaded()
+            n = len(self._ids)
+            if n == 0:
+                return None, 0.0
+            scores = self._matrix[:n] @ vector.astype(np.float32)
+            best = int(np.argmax(scores))
+            return self._ids[best], float(scores[best])
+
+    def add(self, post_id: int, vector: np.ndarray) -> None:
+        vec = vector.astype(np.float32)
+        self.store.add_embedding(post_id, vec.tobytes())
+        with self._lock:
+            self._ensure_loaded()
+            n = len(self._ids)
+            if self._matrix.shape[1] == 0:
+                self._matrix = np.zeros((64, vec.shape[0]), dtype=np.float32)
+            if n == self._matrix.shape[0]:
+                # amortised growth keeps appends O(1)
+                grown = np.zeros((n * 2, self._matrix.shape[1]), dtype=np.float32)
+                grown[:n] = self._matrix
+                self._matrix = grown
+            self._matrix[n] = vec
+            self._ids.append(post_id)
@@ -0,0 +1,181 @@
+"""Rule-based lint and deterministic auto-repair for generated LinkedIn posts."""
+from typing import Dict, List, Optional, Tuple
+import os
+import re
+import logging
+import config
+
+logger = logging.getLogger("valtrilabs.post_lint")
+
+_EMOJI = r"[\U0001F000-\U0001FAFF☀-➿⬀-⯿]️?"
+
+# Source references the prompt forbids: an attribution phrase plus a bare chapter/section number
+# (optionally "of the report"), ending the clause. "Section 230 of the Communications Decency Act"
+# and "filed for Chapter 11" are content and stay.
+_CHAPTER_REF = (
+    r"\b(?:according to|as (?:noted|described|discussed|outlined|explained|covered) in|see"
+    r"|(?:^|(?<=[.!?]\s))(?:in|per))\s+"
+    r"(?:the\s+)?(?:chapter|section)\s+\d+(?:\.\d+)*[A-Za-z]?\b"
+    r"(?:\s+of\s+(?:the|this|our)\s+(?:report|book|e-?book|guide|document|paper|white\s?paper|pdf)\b)?"
+    r"(?=\s*(?:[,.;:)]|$))\s*,?\s*"
+)
+# Parenthesised quarter/year references such as "(Q1 2024)" or "(2023)".
+_FAKE_DATE = r"\s*\(\s*(?:Q[1-4]\s*|H[12]\s*)?(?:19|20)\d{2}\s*\)"
+# URLs are matched first and kept verbatim, so "#anchor" or "**" inside a link is not repaired.
+_URL = r"(?:https?://|www\.)\S+"
+# Markdown emphasis only: runs of 2+, a bullet/leading or trailing asterisk, and a single
+# asterisk hugging a word ("*word*"); "5*3x" and "a * b" are content and stay.
+_MARKDOWN = r"\*{2,}|^\*\s*|\*$|(?<![\w*])\*(?=\w)|(?<=\w)\*(?![\w*])"
+# A hashtag needs a letter, so "#1" or "#2024" is left as text.
+_TAG = r"#[-_0-9]*[A-Za-z][-_A-Za-z0-9]*"
+# Admissions of reading from sources cannot be repaired by deletion.
+_SOURCE_ADMISSION = r"\b(?:knowledge base|our docs|our documentation|the provided (?:context|documents?|sources?))\b"
+
+
+class LintResult:
+    def __init__(self, text: str, issues: List[Tuple[str, str, str]], repairs: int):
+        self.text = text
+        self.issues = issues  # (rule, severity, message); severity is "error", "repaired" or "warning"
+        self.repairs = repairs
+
+    @property
+    def errors(self) -> List[Tuple[str, str, str]]:
+        return [i for i in self.issues if i[1] == "error"]
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.text) and not self.errors
+
+    @property
+    def score(self) -> float:
+        """1.0 for a clean draft, lower for each repair and much lower for remaining errors."""
+        return max(0.0, 1.0 - 0.05 * self.repairs - 0.5 * len(self.errors))
+
+    def __repr__(self) -> str:
+        return f"LintResult(ok={self.ok}, repairs={self.repairs}, issues={self.issues})"
+
+
+class PostLinter:
+    """All rules are compiled into one alternation and applied in a single scan per line."""
+
+    def __init__(
+        self,
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None,
+        banned_terms: Optional[Dict[str, str]] = None,
+        max_emojis: Optional[int] = None,
+    ):
+        self.min_length = min_length if min_length is not None else int(os.getenv("MIN_POST_LENGTH", str(config.MIN_POST_LENGTH)))
+        self.max_length = max_length if max_length is not None else int(os.getenv("MAX_POST_LENGTH", str(config.MAX_POST_LENGTH)))
+        self.max_emojis = max_emojis if max_emojis is not None else config.POST_LINT["max_emojis"]
+        self.banned = {k.lower(): v for k, v in (banned_terms or config.BANNED_TERMS).items()}
+        # longest first so "deep dive" wins over shorter overlapping terms
+        terms = "|".join(re.escape(t).replace(r"\ ", r"\s+") for t in sorted(self.banned, key=len, reverse=True))
+        self._matcher = re.compile(
+            rf"(?P<url>{_URL})"
+            rf"|(?P<chapter>{_CHAPTER_REF})"
+            rf"|(?P<date>{_FAKE_DATE})"
+            rf"|(?P<banned>\b(?:{terms})\b)"
+            rf"|(?P<hashtag>(?<![\w#]){_TAG})"
+            rf"|(?P<emoji>{_EMOJI})"
+            rf"|(?P<markdown>{_MARKDOWN})",
+            re.IGNORECASE,
+        )
+        self._hashtag_line = re.compile(rf"^(?:{_TAG}[\s,]*)+$")
+        self._trailing_tags = re.compile(rf"(?:[\s,]+{_TAG})+[\s,]*$")
+        self._tag = re.compile(_TAG)
+        self._source_admission = re.compile(_SOURCE_ADMISSION, re.IGNORECASE)
+
+    def _replace_banned(self, word: str) -> str:
+        repl = self.banned.get(re.sub(r"\s+", " ", word.lower()), "")
+        return repl[:1].upper() + repl[1:] if word[:1].isupper() else repl
+
+    def lint(self, text: str) -> LintResult:
+        issues: List[Tuple[str, str, str]] = []
+        counts: Dict[str, int] = {}
+        tags: List[str] = []
+        emojis_seen = 0
+
+        def on_match(m: "re.Match") -> str:
+            nonlocal emojis_seen
+            kind = m.lastgroup
+            token = m.group(0)
+            if kind == "url":
+                return token
+            if kind == "emoji":
+                emojis_seen += 1
+                if emojis_seen <= self.max_emojis:
+                    return token
+                counts["emoji"] = counts.get("emoji", 0) + 1
+                return ""
+            counts[kind] = counts.get(kind, 0) + 1
+            if kind == "banned":
+                return self._replace_banned(token)
+            if kind == "hashtag":
+                # mid-sentence hashtag: keep the word inline, move the tag to the final line
+                tags.append(token)
+                return token[1:]
+            return ""
+
+        body: List[str] = []
+        for raw in (text or "").splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            if self._hashtag_line.match(line.replace("*", "")):
+                tags.extend(self._tag.findall(line))
+                continue
+            trailing = self._trailing_tags.search(line)
+            if trailing:
+                # tags closing a line of text move to the final line whole, without leaving the word
+                tags.extend(self._tag.findall(trailing.group(0)))
+                counts["hashtag"] = counts.get("hashtag", 0) + 1
+                line = line[:trailing.start()]
+            line = self._matcher.sub(on_match, line)
+            line = re.sub(r"\s{2,}", " ", line).strip(" ,")
+            if line and line[0].islower() and line[0] != raw.lstrip("* ")[:1]:
+                line = line[0].upper() + line[1:]
+            if line:
+                body.append(line)
+            if self._source_admission.search(line):
+                issues.append(("source_reference", "error", f"mentions its sources: {line[:80]!r}"))
+
+        messages = {
+            "banned": "replaced banned terms",
+            "hashtag": "moved inline hashtags to the final line",
+            "chapter": "removed chapter/section references",
+            "date": "removed unsupported date references",
+            "emoji": f"dropped emojis beyond {self.max_emojis}",
+            "markdown": "stripped markdown asterisks",
+        }
+        for rule, n in counts.items():
+            issues.append((rule, "repaired", f"{messages[rule]} ({n})"))
+
+        unique_tags = list(dict.fromkeys(tags))[: config.POST_LINT["max_hashtags"]]
+        if unique_tags:
+            body.append(" ".join(unique_tags))
+        out = "\n".join(body)
+
+        if not out:
+            issues.append(("empty", "error", "draft is empty"))
+        elif len(out) < self.min_length:
+            issues.append(("too_short", "error", f"{len(out)} chars < MIN_POST_LENGTH {self.min_length}"))
+        elif len(out) > self.max_length:
+            issues.append(("too_long", "error", f"{len(out)} chars > MAX_POST_LENGTH {self.max_length}"))
+        if not unique_tags:
+            issues.append(("no_hashtags", "warning", "no hashtags found"))
+
+        repairs = sum(n for r, n in counts.items() if r != "markdown")
+        return LintResult(out, issues, repairs)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    sample = (
+        "**Let's delve into the #DeFi landscape.** 🔍🔍🔍🔍\n\n"
+        "According to Chapter 3, rollups batch transactions (Q1 2024).\n"
+        "#Crypto #Ethereum"
+    )
+    res = PostLinter(min_length=10).lint(sample)
+    print(res.text)
+    print(res)
@@ -1,34 +1,44 @@
-"""Post the most recent saved draft from data/posts.json to LinkedIn."""
+"""Publish the most recent unpublished draft through the outbox."""
 import os
-import json
 import logging
 from linkedin_poster import LinkedInPoster
+from outbox import Outbox, OutboxWorker
+from post_store import get_store, DEFAULT_DB_PATH
 from dotenv import load_dotenv
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("valtrilabs.post_saved")
 
-def load_latest_post(path="data/posts.json"):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Posts file not found: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not data:
-        raise ValueError("No posts found in posts.json")
-    return data[-1]
+def load_latest_post(path=DEFAULT_DB_PATH, store=None):
+    store = store or get_store(path)
+    latest = store.latest(1, status="drafted")
+    if not latest:
+        raise ValueError(f"No unpublished drafts found in {store.path}")
+    return latest[0]
 
 
-def main():
-    post = load_latest_post()
+def main(path=DEFAULT_DB_PATH):
+    # the draft is read from and enqueued into the same database
+    store = get_store(path)
+    post = load_latest_post(store=store)
     content = post.get("content")
     if not content:
         raise ValueError("Latest post has no content")
-    poster = LinkedInPoster(test_mode=(os.getenv("TEST_MODE","true").lower() in ("1","true","yes")))
-    logger.info("Posting saved draft (test_mode=%s)", poster.test_mode)
-    res = poster.post(content)
-    logger.info("Post result: %s", res)
-    print(res)
+    test_mode = os.getenv("TEST_MODE", "true").lower() in ("1", "true", "yes")
+    if test_mode:
+        print(LinkedInPoster(test_mode=True).post(content))
+        return
+    # enqueue is keyed by post id, so re-running this script never posts the same draft twice
+    outbox = Outbox(store)
+    job_id = outbox.enqueue(post, state="approved")
+    outbox.approve(job_id)  # a preview run may have queued it as drafted
+    logger.info("Publishing saved draft %s as outbox job %s", post["id"], job_id)
+    # publish this draft only, not every job that happens to be due
+    OutboxWorker(outbox).process(job_id)
+    job = outbox.get(job_id)
+    logger.info("Outbox job %s is %s", job_id, job["state"])
+    print(job["state"], job.get("result"))
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     main()
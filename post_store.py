@@ -0,0 +1,324 @@
+"""SQLite-backed post store (WAL mode) replacing the flat data/posts.json file."""
+from typing import List, Dict, Any, Optional, Tuple
+import os
+import re
+import json
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+
+logger = logging.getLogger("valtrilabs.post_store")
+
+DEFAULT_DB_PATH = "data/posts.db"
+LEGACY_JSON_PATH = "data/posts.json"
+
+# Columns stored natively; any other key of a post dict goes into `extra`.
+_COLUMNS = ("created_at", "profile", "theme", "format", "query", "provider", "status", "content")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    profile TEXT,
+    theme TEXT,
+    format TEXT,
+    query TEXT,
+    provider TEXT,
+    status TEXT NOT NULL DEFAULT 'drafted',
+    content TEXT NOT NULL DEFAULT '',
+    hashtags TEXT NOT NULL DEFAULT '[]',
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts(created_at);
+CREATE INDEX IF NOT EXISTS idx_posts_theme ON posts(theme);
+CREATE INDEX IF NOT EXISTS idx_posts_provider ON posts(provider);
+CREATE INDEX IF NOT EXISTS idx_posts_status ON posts(status);
+CREATE INDEX IF NOT EXISTS idx_posts_profile ON posts(profile);
+CREATE TABLE IF NOT EXISTS post_embeddings (
+    post_id INTEGER PRIMARY KEY REFERENCES posts(id),
+    vector BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS publish_ledger (
+    idempotency_key TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    response TEXT,
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# Full-text index over posts, kept in sync by triggers (external content: no duplicated text).
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    content, theme, hashtags, content='posts', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, content, theme, hashtags) VALUES (new.id, new.content, new.theme, new.hashtags);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, content, theme, hashtags)
+    VALUES ('delete', old.id, old.content, old.theme, old.hashtags);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF content, theme, hashtags ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, content, theme, hashtags)
+    VALUES ('delete', old.id, old.content, old.theme, old.hashtags);
+    INSERT INTO posts_fts(rowid, content, theme, hashtags) VALUES (new.id, new.content, new.theme, new.hashtags);
+END;
+"""
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = ['"%s"' % w for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a WAL-mode connection in autocommit mode (explicit BEGIN for multi-statement writes)."""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class PostStore:
+    """Small repository API over the posts table.
+
+    Every thread gets its own connection; WAL mode lets the scheduler and the
+    dashboard append concurrently without rewriting history.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, legacy_json: Optional[str] = LEGACY_JSON_PATH):
+        self.path = path
+        self._local = threading.local()
+        Path(os.path.dirname(self.path) or ".").mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self.fts = self._init_fts(conn)
+        if legacy_json:
+            self.migrate_from_json(legacy_json)
+
+    def _init_fts(self, conn: sqlite3.Connection) -> bool:
+        """Create the FTS5 index (backfilling existing posts once); False if SQLite lacks FTS5."""
+        try:
+            conn.executescript(_FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logger.warning("SQLite FTS5 unavailable (%s); post search falls back to LIKE", e)
+            return False
+        if not conn.execute("SELECT 1 FROM meta WHERE key = 'fts_built'").fetchone():
+            conn.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fts_built', '1')")
+        return True
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_post(row: sqlite3.Row) -> Dict[str, Any]:
+        post = json.loads(row["extra"] or "{}")
+        post.update({c: row[c] for c in _COLUMNS})
+        post["hashtags"] = json.loads(row["hashtags"] or "[]")
+        post["id"] = row["id"]
+        return post
+
+    @staticmethod
+    def _post_to_params(post: Dict[str, Any]) -> tuple:
+        extra = {k: v for k, v in post.items() if k not in _COLUMNS and k not in ("id", "hashtags")}
+        return (
+            post.get("created_at") or "",
+            post.get("profile"),
+            post.get("theme"),
+            post.get("format"),
+            post.get("query"),
+            post.get("provider"),
+            post.get("status") or "drafted",
+            post.get("content") or "",
+            json.dumps(post.get("hashtags") or []),
+            json.dumps(extra),
+        )
+
+    def append(self, post: Dict[str, Any]) -> int:
+        """Insert one post atomically and return its id."""
+        cur = self._conn().execute(
+            "INSERT INTO posts (created_at, profile, theme, format, query, provider, status, content, hashtags, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._post_to_params(post),
+        )
+        return cur.lastrowid
+
+    def get(self, post_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return self._row_to_post(row) if row else None
+
+    def latest(self, n: int = 10, status: Optional[str] = None, profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the newest `n` posts, newest first (rowid index walk, independent of history size)."""
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if profile:
+            where.append("profile = ?")
+            params.append(profile)
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        rows = self._conn().execute(
+            f"SELECT * FROM posts {clause}ORDER BY id DESC LIMIT ?", (*params, n)
+        ).fetchall()
+        return [self._row_to_post(r) for r in rows]
+
+    def search(
+        self,
+        profile: Optional[str] = None,
+        theme: Optional[str] = None,
+        provider: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        text: Optional[str] = None,
+        before_id: Optional[int] = None,
+        limit: int = 20,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Filtered history page, newest first, plus the cursor for the next page (None at the end).
+
+        Keyset pagination on id (`before_id`) keeps every page an index range scan, however deep.
+        `since`/`until` compare against the ISO created_at (since inclusive, until exclusive).
+        """
+        where, params = [], []
+        for column, value in (("profile", profile), ("theme", theme), ("provider", provider), ("status", status)):
+            if value:
+                where.append(f"p.{column} = ?")
+                params.append(value)
+        if since:
+            where.append("p.created_at >= ?")
+            params.append(since)
+        if until:
+            where.append("p.created_at < ?")
+            params.append(until)
+        if before_id:
+            where.append("p.id < ?")
+            params.append(before_id)
+        join = ""
+        if text and self.fts:
+            query = fts_query(text)
+            if query:
+                join = "JOIN posts_fts f ON f.rowid = p.id "
+                where.append("posts_fts MATCH ?")
+                params.append(query)
+        elif text:
+            where.append("p.content LIKE ? ESCAPE '\\'")
+            params.append("%" + re.sub(r"([%_\\])", r"\\\1", text) + "%")
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        # one extra row tells us whether another page exists
+        rows = self._conn().execute(
+            f"SELECT p.* FROM posts p {join}{clause}ORDER BY p.id DESC LIMIT ?", (*params, limit + 1)
+        ).fetchall()
+        posts = [self._row_to_post(r) for r in rows[:limit]]
+        next_cursor = posts[-1]["id"] if len(rows) > limit else None
+        return posts, next_cursor
+
+    def recent_themes(self, profile: str, n: int) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT theme FROM posts WHERE profile = ? ORDER BY id DESC LIMIT ?", (profile, n)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def update_status(self, post_id: int, status: str) -> None:
+        self._conn().execute("UPDATE posts SET status = ? WHERE id = ?", (status, post_id))
+
+    def add_embedding(self, post_id: int, vector: bytes) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO post_embeddings (post_id, vector) VALUES (?, ?)", (post_id, vector)
+        )
+
+    def load_embeddings(self) -> List[tuple]:
+        """Return (post_id, vector_bytes) for every embedded post, oldest first."""
+        return self._conn().execute("SELECT post_id, vector FROM post_embeddings ORDER BY post_id").fetchall()
+
+    def posts_without_embeddings(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT p.* FROM posts p LEFT JOIN post_embeddings e ON e.post_id = p.id "
+            "WHERE e.post_id IS NULL AND p.content != '' ORDER BY p.id"
+        ).fetchall()
+        return [self._row_to_post(r) for r in rows]
+
+    def get_publish(self, key: str) -> Optional[Dict[str, Any]]:
+        """Ledger entry for an idempotency key: {"status", "response"} or None."""
+        row = self._conn().execute(
+            "SELECT status, response FROM publish_ledger WHERE idempotency_key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"status": row["status"], "response": json.loads(row["response"]) if row["response"] else None}
+
+    def record_publish(self, key: str, status: str, response: Optional[Dict[str, Any]] = None) -> None:
+        self._conn().execute(
+            "INSERT INTO publish_ledger (idempotency_key, status, response) VALUES (?, ?, ?) "
+            "ON CONFLICT(idempotency_key) DO UPDATE SET status = excluded.status, response = excluded.response, "
+            "updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')",
+            (key, status, json.dumps(response) if response is not None else None),
+        )
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """One-shot import of a legacy posts.json; later calls are no-ops."""
+        if not os.path.exists(json_path):
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+            if done:
+                conn.execute("COMMIT")
+                return 0
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            conn.executemany(
+                "INSERT INTO posts (created_at, profile, theme, format, query, provider, status, content, hashtags, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._post_to_params(p) for p in data],
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (os.path.abspath(json_path),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            logger.exception("Failed to migrate %s", json_path)
+            raise
+        logger.info("Migrated %d posts from %s to %s", len(data), json_path, self.path)
+        return len(data)
+
+
+_stores: Dict[str, PostStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = DEFAULT_DB_PATH) -> PostStore:
+    """Process-wide PostStore per database path."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = PostStore(path)
+        return _stores[key]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    store = get_store()
+    print(f"{store.count()} posts in {store.path}")
+    for p in store.latest(3):
+        print(p["id"], p["created_at"], p.get("theme"))
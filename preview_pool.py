@@ -0,0 +1,193 @@
+"""Per-profile pool of pre-generated preview drafts, topped up in the background."""
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import deque
+import config
+
+logger = logging.getLogger("valtrilabs.preview_pool")
+
+# Settings that change what a draft would look like; a change invalidates pooled drafts.
+FINGERPRINT_ENV = (
+    "AI_PROVIDER", "MIN_POST_LENGTH", "MAX_POST_LENGTH", "ENABLE_MARKET_GROUNDING", "GENERATION_CANDIDATES",
+)
+
+
+def knowledge_base_fingerprint(persist_dir: str = "data/chroma_db") -> str:
+    """Cheap stat-based fingerprint of the vector store directory (file count, bytes, newest mtime)."""
+    count, size, newest = 0, 0, 0.0
+    for root, _, files in os.walk(persist_dir):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            count += 1
+            size += st.st_size
+            newest = max(newest, st.st_mtime)
+    return f"{count}:{size}:{newest:.0f}"
+
+
+def profile_fingerprint(profile_key: str, persist_dir: str = "data/chroma_db") -> str:
+    parts = {
+        "profile": config.PROFILES.get(profile_key, {}),
+        "env": {k: os.getenv(k) for k in FINGERPRINT_ENV},
+        "kb": knowledge_base_fingerprint(persist_dir),
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class PreviewPool:
+    """Holds up to `depth` unsaved drafts per profile, produced by `generate(profile, exclude_themes)`.
+
+    take() is a deque pop, so a preview is served without retrieval or an LLM call. Drafts older
+    than `max_age` or made under a different profile/config/knowledge-base fingerprint are dropped;
+    take() checks the fingerprint itself, so a stale draft is never served. A profile is refilled
+    after a take(), when its oldest draft expires, and when a check every `check_interval` seconds
+    finds the fingerprint changed; an idle dashboard therefore only replaces expired drafts. Each
+    pooled draft gets a theme the other pooled drafts do not have.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, List[str]], Dict[str, Any]],
+        profiles: List[str],
+        depth: Optional[int] = None,
+        max_age: Optional[float] = None,
+        persist_dir: str = "data/chroma_db",
+        check_interval: Optional[float] = None,
+    ):
+        self.generate = generate
+        self.profiles = list(profiles)
+        self.depth = depth if depth is not None else int(os.getenv("PREVIEW_POOL_DEPTH", "3"))
+        self.max_age = max_age if max_age is not None else float(os.getenv("PREVIEW_POOL_MAX_AGE", "3600"))
+        self.persist_dir = persist_dir
+        self.check_interval = (
+            check_interval if check_interval is not None else float(os.getenv("PREVIEW_POOL_CHECK_SECONDS", "300"))
+        )
+        self._pools: Dict[str, Deque[Dict[str, Any]]] = {p: deque() for p in self.profiles}
+        # profiles to fill on the next pass: all of them at start and on each timer pass,
+        # otherwise only those taken from
+        self._wanted: Set[str] = set(self.profiles)
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._fill_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PreviewPool":
+        if self.depth > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="preview-pool", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def invalidate(self, profile_key: Optional[str] = None) -> None:
+        """Drop pooled drafts (all profiles by default); they are regenerated on the next take() or timer pass."""
+        with self._lock:
+            for key in [profile_key] if profile_key else self.profiles:
+                self._pools.get(key, deque()).clear()
+                self._fingerprints.pop(key, None)
+
+    def take(self, profile_key: str) -> Optional[Dict[str, Any]]:
+        """Pop a fresh pooled draft, or None if the pool for `profile_key` is empty."""
+        now = time.time()
+        post = None
+        # checked here rather than trusting the fill thread's last pass: a re-ingest or .env
+        # edit since then must not be served
+        fp = profile_fingerprint(profile_key, self.persist_dir) if profile_key in self._pools else None
+        with self._lock:
+            pool = self._pools.get(profile_key)
+            if pool and self._fingerprints.get(profile_key) != fp:
+                logger.info("Config or knowledge base changed; dropping pooled drafts for %s", profile_key)
+                pool.clear()
+                self._fingerprints[profile_key] = fp
+            while pool:
+                entry = pool.popleft()
+                if now - entry["pooled_at"] <= self.max_age and entry["fingerprint"] == fp:
+                    post = entry["post"]
+                    break
+            if pool is not None:
+                self._wanted.add(profile_key)
+        self._wake.set()
+        return post
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {p: len(q) for p, q in self._pools.items()}
+
+    def _prune(self, profile_key: str) -> str:
+        fp = profile_fingerprint(profile_key, self.persist_dir)
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            if self._fingerprints.get(profile_key) != fp:
+                if self._pools[profile_key]:
+                    logger.info("Config or knowledge base changed; dropping pooled drafts for %s", profile_key)
+                self._pools[profile_key].clear()
+                self._fingerprints[profile_key] = fp
+            pool = self._pools[profile_key]
+            while pool and pool[0]["pooled_at"] < cutoff:
+                pool.popleft()
+        return fp
+
+    def top_up(self) -> int:
+        """Fill the pools that were started or taken from to `depth`; returns how many drafts were generated."""
+        made = 0
+        with self._fill_lock:
+            for profile_key in self.profiles:
+                with self._lock:
+                    if profile_key not in self._wanted:
+                        continue
+                    self._wanted.discard(profile_key)
+                made += self._fill(profile_key)
+        return made
+
+    def _fill(self, profile_key: str) -> int:
+        made = 0
+        while not self._stop.is_set():
+            fp = self._prune(profile_key)
+            with self._lock:
+                if len(self._pools[profile_key]) >= self.depth:
+                    break
+                # pick_theme only sees saved posts, so rotate against the pooled drafts here
+                pooled_themes = [e["post"].get("theme") for e in self._pools[profile_key]]
+            try:
+                post = self.generate(profile_key, [t for t in pooled_themes if t])
+            except Exception:
+                logger.exception("Pre-generating a preview for %s failed", profile_key)
+                break
+            with self._lock:
+                # a draft started before a config change is stale on arrival
+                if self._fingerprints.get(profile_key) == fp:
+                    self._pools[profile_key].append({"post": post, "fingerprint": fp, "pooled_at": time.time()})
+                    made += 1
+        return made
+
+    def _next_check(self) -> float:
+        """Seconds until the oldest pooled draft expires, at most `check_interval`."""
+        with self._lock:
+            oldest = [q[0]["pooled_at"] for q in self._pools.values() if q]
+        wait = self.check_interval
+        if oldest:
+            wait = min(wait, min(oldest) + self.max_age - time.time())
+        return max(wait, 1.0)
+
+    def _run(self) -> None:
+        logger.info("Preview pool started for %s (depth %d)", ", ".join(self.profiles), self.depth)
+        while not self._stop.is_set():
+            self._wake.clear()
+            made = self.top_up()
+            if made:
+                logger.debug("Pooled %d preview drafts: %s", made, self.stats())
+            if not self._wake.wait(self._next_check()):
+                # timer pass: replace expired drafts and notice knowledge-base changes while idle
+                with self._lock:
+                    self._wanted.update(self.profiles)
@@ -1,70 +1,404 @@
-"""RAG system using ChromaDB and sentence-transformers embeddings."""
-from typing import List, Tuple, Optional
-import chromadb
-from sentence_transformers import SentenceTransformer
+"""RAG system using ChromaDB and sentence-transformers embeddings.
+
+The knowledge base is sharded: one collection per profile (config.PROFILES[...]["collection"])
+plus a shared one, and a profile's searches only read its own shard and the shared material.
+
+chromadb and sentence-transformers (torch) are imported on first use, so modules that only
+pass a RAGStore around stay cheap to import.
+
+With RAG_SNAPSHOT set (or snapshot=...), the store is a read-only view over an exported
+index snapshot (index_snapshot.py) and chromadb is not used at all.
+"""
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple, Optional, TypeVar
 import numpy as np
 import os
+import json
+import shutil
+import hashlib
+import tempfile
+import time
+from fnmatch import fnmatch
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import logging
+from tracing import traced, annotate
+import config
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger("valtrilabs.rag")
 
+T = TypeVar("T")
 
-class RAGStore:
-    def __init__(self, persist_dir: str = "data/chroma_db"):
-        self.persist_dir = persist_dir
-        Path(self.persist_dir).mkdir(parents=True, exist_ok=True)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Digest of the indexed text, written by every ingest/import next to the index; the theme
+# context cache keys on it, so an edited document invalidates the cache even if the chunk
+# counts stay the same.
+GENERATION_FILE = "ingest_generation.json"
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_embedding_model(name: str = EMBEDDING_MODEL) -> "SentenceTransformer":
+    """Process-wide model cache: every RAGStore shares one copy, and a copy loaded before
+    gunicorn forks (see gunicorn.conf.py) is shared by all workers."""
+    with _models_lock:
+        model = _models.get(name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = _models[name] = SentenceTransformer(name)
+            logger.info("Loaded embedding model %s", name)
+        return model
+
+
+def embedding_model_loaded(name: str = EMBEDDING_MODEL) -> bool:
+    return name in _models
+
+
+def profile_collection(profile_key: str) -> str:
+    """Knowledge-base shard for a profile."""
+    return config.PROFILES.get(profile_key, {}).get("collection", f"kb_{profile_key}")
+
+
+def all_collections() -> List[str]:
+    return [profile_collection(p) for p in config.PROFILES] + [config.SHARED_COLLECTION]
+
+
+def route_documents(docs: List[Tuple[str, str]], root: str = "data/pdfs") -> Dict[str, List[Tuple[str, str]]]:
+    """Group (source, text) documents by the collection they belong in.
+
+    An optional <root>/manifest.json maps glob patterns (paths relative to root) to a profile
+    key, "shared", or a list of those; the first matching pattern wins. Otherwise the first
+    sub-folder decides (data/pdfs/<profile>/...), and top-level files are shared.
+    """
+    manifest: Dict[str, object] = {}
+    manifest_path = os.path.join(root, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    routes: Dict[str, List[Tuple[str, str]]] = {}
+    for src, text in docs:
         try:
-            # Use modern ChromaDB PersistentClient API
-            self.client = chromadb.PersistentClient(path=self.persist_dir)
-        except Exception:
-            logger.exception("Failed to init ChromaDB client")
-            raise
+            rel = Path(src).resolve().relative_to(Path(root).resolve()).as_posix()
+        except ValueError:
+            rel = Path(src).name
+        targets = next((t for pattern, t in manifest.items() if fnmatch(rel, pattern)), None)
+        if targets is None:
+            parts = rel.split("/")
+            targets = parts[0] if len(parts) > 1 else "shared"
+        for target in [targets] if isinstance(targets, str) else targets:
+            if target in config.PROFILES:
+                name = profile_collection(target)
+            else:
+                if target != "shared":
+                    logger.warning("%s: no profile named %r; ingesting it as shared", rel, target)
+                name = config.SHARED_COLLECTION
+            routes.setdefault(name, []).append((src, text))
+    return routes
+
+
+def stale_handle(exc: BaseException) -> bool:
+    """True for errors from a cached handle whose collection was dropped, e.g. by an ingest
+    run in another process (chromadb raises InvalidCollectionException / NotFoundError)."""
+    if type(exc).__name__ in ("InvalidCollectionException", "NotFoundError"):
+        return True
+    return isinstance(exc, ValueError) and "does not exist" in str(exc)
+
+
+class RAGStore:
+    def __init__(self, persist_dir: str = "data/chroma_db", snapshot: Optional[str] = None):
+        if snapshot is None:
+            snapshot = os.getenv("RAG_SNAPSHOT")  # "" forces the Chroma store
+        self.snapshot = None
+        self.client = None
+        if snapshot:
+            from index_snapshot import Snapshot
+            self.snapshot = Snapshot(snapshot)
+            self.snapshot.check_model(EMBEDDING_MODEL)
+            # the theme context cache travels with the snapshot
+            self.persist_dir = snapshot
+            logger.info("Using index snapshot %s (%d vectors)", snapshot, self.snapshot.manifest["rows"])
+        else:
+            self.persist_dir = persist_dir
+            Path(self.persist_dir).mkdir(parents=True, exist_ok=True)
+            try:
+                import chromadb
+                # Use modern ChromaDB PersistentClient API
+                self.client = chromadb.PersistentClient(path=self.persist_dir)
+            except Exception:
+                logger.exception("Failed to init ChromaDB client")
+                raise
         self.collection = None
-        self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self._collections = {}
+        self._model = None
+        self._fanout: Optional[ThreadPoolExecutor] = None
+        self._legacy_warned = False
+        self._generation: Optional[Tuple[int, Optional[str]]] = None  # (mtime_ns, digest)
+        self.dedup_stats: Optional[Dict[str, int]] = None
+
+    @property
+    def model(self) -> "SentenceTransformer":
+        """Embedding model, loaded on the first encode rather than at construction."""
+        if self._model is None:
+            model = load_embedding_model()
+            if self.snapshot is not None:
+                self.snapshot.check_model(EMBEDDING_MODEL, model)
+            self._model = model
+        return self._model
 
-    def build_from_documents(self, docs: List[Tuple[str, str]], collection_name: str = "valtrilabs") -> None:
-        """docs: list of (source, text)"""
+    def build_from_documents(
+        self,
+        docs: List[Tuple[str, str]],
+        collection_name: str = "valtrilabs",
+        extra_metadata: Optional[List[dict]] = None,
+    ) -> None:
+        """docs: list of (source, text); extra_metadata: optional dict per doc merged into its metadata"""
         if not docs:
             logger.warning("No documents provided to build RAG store")
             return
         try:
             self.collection = self.client.get_or_create_collection(name=collection_name)
-            ids = []
-            metadatas = []
-            embeddings = []
-            documents = []
-            for i, (src, text) in enumerate(docs):
-                emb = self.model.encode(text)
-                ids.append(f"doc_{i}")
-                metadatas.append({"source": src})
-                embeddings.append(emb.tolist())
-                documents.append(text)
+            ids = [f"doc_{i}" for i in range(len(docs))]
+            metadatas = [{"source": src} for src, _ in docs]
+            for meta, extra in zip(metadatas, extra_metadata or []):
+                meta.update(extra)
+            documents = [text for _, text in docs]
+            # one batched encode; ingest now sends chunks, not whole files
+            embeddings = self.model.encode(documents, batch_size=32).tolist()
             self.collection.add(ids=ids, metadatas=metadatas, documents=documents, embeddings=embeddings)
             logger.info("Built vector store with %d documents", len(docs))
         except Exception:
             logger.exception("Failed to build vector store")
 
+    def ingest(self, docs: List[Tuple[str, str]], root: str = "data/pdfs") -> Dict[str, int]:
+        """Rebuild every shard from `docs` (routed by route_documents); returns indexed chunks per collection.
+
+        Near-duplicate chunks within a shard are merged before embedding (INGEST_DEDUP);
+        the totals are kept on `self.dedup_stats`.
+        """
+        from dedup import dedup_enabled, dedupe_chunks
+        if self.snapshot is not None:
+            raise RuntimeError("This store is a read-only index snapshot; unset RAG_SNAPSHOT to ingest")
+        routes = route_documents(docs, root)
+        totals = {"chunks": 0, "kept": 0, "exact": 0, "near": 0, "saved": 0}
+        counts = {}
+        digest = hashlib.sha1()
+        for name in sorted(set(all_collections()) | set(routes)):
+            self.drop_collection(name)
+            if name not in routes:
+                continue
+            group, extra = routes[name], None
+            if dedup_enabled():
+                # per shard: a passage shared by two profiles must stay in both
+                group, extra, stats = dedupe_chunks(group)
+                for key in totals:
+                    totals[key] += stats[key]
+            self.build_from_documents(group, collection_name=name, extra_metadata=extra)
+            counts[name] = len(group)
+            digest.update(name.encode("utf-8"))
+            for src, text in group:
+                digest.update(f"\0{src}\0{text}".encode("utf-8"))
+        self.dedup_stats = totals if dedup_enabled() else None
+        if self.dedup_stats:
+            logger.info("Dedup: %d chunks -> %d (%d exact, %d near duplicates); %d embedding calls saved",
+                        totals["chunks"], totals["kept"], totals["exact"], totals["near"], totals["saved"])
+        logger.info("Ingested %s", ", ".join(f"{n}: {c}" for n, c in sorted(counts.items())) or "nothing")
+        self._write_generation(digest.hexdigest())
+        try:
+            from theme_cache import get_theme_cache
+            # scheduled posts read their context from here instead of searching
+            get_theme_cache(self).build()
+        except Exception:
+            logger.exception("Building the theme context cache failed; generation will search live")
+        return counts
+
+    def export_snapshot(self, path: str) -> Dict:
+        """Write every shard (and the legacy collection, if present) as a portable snapshot."""
+        from index_snapshot import export_snapshot
+        return export_snapshot(self, path, all_collections() + [config.LEGACY_COLLECTION])
+
+    def import_snapshot(self, path: str, batch: int = 5000) -> Dict[str, int]:
+        """Replace the Chroma collections with a snapshot's vectors; nothing is re-embedded."""
+        from index_snapshot import Snapshot
+        if self.snapshot is not None:
+            raise RuntimeError("Cannot import into a read-only index snapshot")
+        snap = Snapshot(path, verify=True)
+        snap.check_model(EMBEDDING_MODEL)
+        counts = {}
+        for name, source in snap.collections.items():
+            self.drop_collection(name)
+            collection = self._collection(name)
+            for offset in range(0, source.count(), batch):
+                got = source.get(limit=batch, offset=offset)
+                collection.add(ids=got["ids"], metadatas=got["metadatas"],
+                               documents=got["documents"], embeddings=got["embeddings"].tolist())
+            counts[name] = source.count()
+        generation_file = os.path.join(path, GENERATION_FILE)
+        if os.path.exists(generation_file):
+            shutil.copyfile(generation_file, os.path.join(self.persist_dir, GENERATION_FILE))
+        else:
+            self._write_generation(snap.manifest["files"].get("chunks.jsonl.gz"))
+        theme_file = os.path.join(path, "theme_context.json")
+        if os.path.exists(theme_file):
+            shutil.copyfile(theme_file, os.path.join(self.persist_dir, "theme_context.json"))
+        logger.info("Imported snapshot %s: %s", path, ", ".join(f"{n}: {c}" for n, c in sorted(counts.items())))
+        return counts
+
+    def _write_generation(self, digest: Optional[str]) -> None:
+        fd, tmp = tempfile.mkstemp(prefix=".generation.", dir=self.persist_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"generation": digest, "written_at": time.time()}, f)
+        os.replace(tmp, os.path.join(self.persist_dir, GENERATION_FILE))
+
+    def ingest_generation(self) -> Optional[str]:
+        """Digest written by the last ingest or import (re-read only when the file changes), or None."""
+        try:
+            mtime = os.stat(os.path.join(self.persist_dir, GENERATION_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._generation
+        if cached is None or cached[0] != mtime:
+            try:
+                with open(os.path.join(self.persist_dir, GENERATION_FILE), "r", encoding="utf-8") as f:
+                    generation = json.load(f).get("generation")
+            except (OSError, ValueError):
+                generation = None
+            cached = self._generation = (mtime, generation)
+        return cached[1]
+
+    def drop_collection(self, name: str) -> None:
+        if self.snapshot is not None:
+            raise RuntimeError("Cannot drop collections of a read-only index snapshot")
+        self._collections.pop(name, None)
+        try:
+            self.client.delete_collection(name=name)
+        except Exception:
+            pass  # nothing to drop
+
+    def _collection(self, name: str, create: bool = True):
+        """Cached collection handle; with create=False a missing collection returns None."""
+        if self.snapshot is not None:
+            return self.snapshot.collections.get(name)
+        collection = self._collections.get(name)
+        if collection is None:
+            if create:
+                collection = self.client.get_or_create_collection(name=name)
+            else:
+                try:
+                    collection = self.client.get_collection(name=name)
+                except Exception:
+                    return None
+            self._collections[name] = collection
+        return collection
+
+    def _retry_stale(self, fn: Callable[[], T]) -> T:
+        """Run fn; if a cached handle went stale, drop every handle and run it once more."""
+        try:
+            return fn()
+        except Exception as e:
+            if not stale_handle(e):
+                raise
+            # an ingest rebuilds all shards, so every cached handle is stale at once
+            logger.info("Collections were rebuilt by another process; reopening them")
+            self._collections.clear()
+            return fn()
+
+    def collection_count(self, name: str) -> int:
+        """Rows in a collection, 0 if it does not exist."""
+        def count() -> int:
+            collection = self._collection(name, create=False)
+            return collection.count() if collection is not None else 0
+        return self._retry_stale(count)
+
+    @staticmethod
+    def _query(collection, qemb: List[float], k: int, name: str) -> List[dict]:
+        res = collection.query(query_embeddings=[qemb], n_results=k, include=['documents', 'metadatas', 'distances'])
+        docs = []
+        if res.get('documents') and len(res['documents']) > 0:
+            for docs_list, metas_list, dists in zip(res.get('documents', []), res.get('metadatas', []), res.get('distances', [])):
+                for doc, meta, dist in zip(docs_list, metas_list, dists):
+                    docs.append({"document": doc, "metadata": meta, "distance": dist, "collection": name})
+        return docs
+
     def persist(self) -> None:
+        if self.snapshot is not None:
+            return
         # PersistentClient auto-persists; this is a no-op but kept for compatibility
         logger.info("ChromaDB persisted to %s (automatic)", self.persist_dir)
 
-    def similarity_search(self, query: str, k: int = 4) -> List[dict]:
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalised float32 vectors (rows), so dot product == cosine."""
+        vecs = self.model.encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vecs, dtype=np.float32)
+
+    @traced("rag.similarity_search")
+    def similarity_search(self, query: str, k: int = 4, collection_name: str = "valtrilabs") -> List[dict]:
+        annotate(collection=collection_name, k=k)
         try:
             qemb = self.model.encode(query).tolist()
-            if self.collection is None:
-                self.collection = self.client.get_or_create_collection(name="valtrilabs")
-            res = self.collection.query(query_embeddings=[qemb], n_results=k, include=['documents', 'metadatas', 'distances'])
-            docs = []
-            if res.get('documents') and len(res['documents']) > 0:
-                for docs_list, metas_list, dists in zip(res.get('documents', []), res.get('metadatas', []), res.get('distances', [])):
-                    for doc, meta, dist in zip(docs_list, metas_list, dists):
-                        docs.append({"document": doc, "metadata": meta, "distance": dist})
+            # one handle per collection so concurrent profiles never swap each other's collection
+            docs = self._retry_stale(lambda: self._query(self._collection(collection_name), qemb, k, collection_name))
+            annotate(results=len(docs))
             return docs
         except Exception:
             logger.exception("Similarity search failed")
+            annotate(failed=True)
+            return []
+
+    def search_profile(self, query: str, profile_key: str, k: int = 4) -> List[dict]:
+        """Context for a profile: its own shard plus the shared collection.
+
+        RAG_SCOPE=all searches every shard instead.
+        """
+        if os.getenv("RAG_SCOPE", "profile").lower() == "all":
+            names = all_collections()
+        else:
+            names = [profile_collection(profile_key), config.SHARED_COLLECTION]
+        return self.search_collections(query, names, k)
+
+    @traced("rag.search")
+    def search_collections(self, query: str, collection_names: List[str], k: int = 4) -> List[dict]:
+        """Query several collections in parallel and merge the k nearest hits."""
+        annotate(collections=",".join(collection_names), k=k)
+        try:
+            return self._retry_stale(lambda: self._search_collections(query, collection_names, k))
+        except Exception:
+            logger.exception("Search over %s failed", ", ".join(collection_names))
+            annotate(failed=True)
             return []
 
+    def _search_collections(self, query: str, collection_names: List[str], k: int) -> List[dict]:
+        targets = [(name, c) for name in dict.fromkeys(collection_names)
+                   for c in [self._collection(name, create=False)] if c is not None and c.count()]
+        if not targets:
+            legacy = self._collection(config.LEGACY_COLLECTION, create=False)
+            if legacy is None or not legacy.count():
+                annotate(results=0)
+                return []
+            if not self._legacy_warned:
+                logger.warning("Knowledge base is not sharded yet; searching %r (run `python main.py ingest`)",
+                               config.LEGACY_COLLECTION)
+                self._legacy_warned = True
+            targets = [(config.LEGACY_COLLECTION, legacy)]
+        qemb = self.model.encode(query).tolist()
+        if len(targets) == 1:
+            hits = self._query(targets[0][1], qemb, k, targets[0][0])
+        else:
+            if self._fanout is None:
+                self._fanout = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("RAG_FANOUT_WORKERS", "4")), thread_name_prefix="rag-fanout"
+                )
+            parts = self._fanout.map(lambda t: self._query(t[1], qemb, k, t[0]), targets)
+            hits = [doc for part in parts for doc in part]
+            hits.sort(key=lambda d: float("inf") if d["distance"] is None else d["distance"])
+        hits = hits[:k]
+        annotate(searched=len(targets), results=len(hits))
+        return hits
+
 
 if __name__ == "__main__":
     import dotenv, logging
@@ -0,0 +1,146 @@
+"""Optional cross-encoder reranking of retrieved context under a hard latency budget.
+
+    reranker = get_reranker()
+    docs = reranker.rerank(query, rag.search_profile(query, profile, k=20), k=4)
+
+The bi-encoder (MiniLM) over-fetches; a small cross-encoder then scores every (query, chunk)
+pair in one batched CPU forward pass. Scores are cached per pair, so repeated themes cost
+nothing. If the pass (or the first model load) does not finish within RERANK_BUDGET_MS the
+caller gets the bi-encoder order and the pass completes in the background to fill the cache.
+"""
+from typing import Any, Dict, List, Optional
+import os
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from tracing import traced, annotate
+
+logger = logging.getLogger("valtrilabs.reranker")
+
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+
+def rerank_enabled() -> bool:
+    return os.getenv("RERANK", "false").lower() in ("1", "true", "yes")
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL,
+        budget_ms: Optional[float] = None,
+        cache_size: int = 20000,
+        max_chars: int = 2000,
+    ):
+        self.model_name = model_name
+        self.budget_ms = budget_ms if budget_ms is not None else float(os.getenv("RERANK_BUDGET_MS", "250"))
+        self.cache_size = cache_size
+        self.max_chars = max_chars  # the model truncates at 512 tokens anyway
+        self._model = None
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # one CPU pass at a time; a pass still running past its budget makes later calls fall back
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._busy = threading.Event()
+        self._ms_per_pair: Optional[float] = None
+
+    def _load(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            started = time.perf_counter()
+            self._model = CrossEncoder(self.model_name, max_length=512)
+            logger.info("Loaded reranker %s in %.1fs", self.model_name, time.perf_counter() - started)
+        return self._model
+
+    @staticmethod
+    def _key(query: str, text: str) -> str:
+        return hashlib.sha1(f"{query}\0{text}".encode("utf-8")).hexdigest()
+
+    def _score(self, query: str, texts: List[str], keys: List[str]) -> None:
+        """One batched forward pass; results go to the cache."""
+        try:
+            model = self._load()
+            started = time.perf_counter()
+            scores = model.predict([(query, t) for t in texts], batch_size=len(texts), show_progress_bar=False)
+            per_pair = (time.perf_counter() - started) * 1000 / len(texts)
+            with self._lock:
+                # smoothed per-pair cost decides how many pairs fit in the next budget
+                self._ms_per_pair = per_pair if self._ms_per_pair is None else 0.8 * self._ms_per_pair + 0.2 * per_pair
+                for key, score in zip(keys, scores):
+                    self._cache[key] = float(score)
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        except Exception:
+            logger.exception("Reranking pass failed")
+        finally:
+            self._busy.clear()
+
+    @traced("rag.rerank")
+    def rerank(self, query: str, docs: List[Dict[str, Any]], k: int = 4, wait: bool = False) -> List[Dict[str, Any]]:
+        """Top `k` of `docs` by cross-encoder score, or the first `k` (bi-encoder order) on fallback.
+
+        wait=True ignores the budget (offline builds such as the theme context cache).
+        """
+        annotate(candidates=len(docs), k=k, budget_ms=None if wait else self.budget_ms)
+        if len(docs) <= 1:
+            return docs[:k]
+        texts = [d.get("document", "")[: self.max_chars] for d in docs]
+        keys = [self._key(query, t) for t in texts]
+        with self._lock:
+            missing = [i for i, key in enumerate(keys) if key not in self._cache]
+            estimate = self._ms_per_pair * len(missing) if self._ms_per_pair is not None else None
+        annotate(cached=len(docs) - len(missing))
+        if missing:
+            if not wait and estimate is not None and estimate > self.budget_ms:
+                # known not to fit: score in the background for next time, answer now
+                annotate(fallback="over_budget_estimate")
+                self._start(query, texts, keys, missing)
+                return docs[:k]
+            future = self._start(query, texts, keys, missing)
+            while future is None and wait:
+                time.sleep(0.05)  # let the running pass finish
+                future = self._start(query, texts, keys, missing)
+            if future is None:
+                annotate(fallback="busy")
+                return docs[:k]
+            try:
+                future.result(timeout=None if wait else self.budget_ms / 1000)
+            except FutureTimeout:
+                annotate(fallback="timeout")
+                logger.info("Reranking exceeded %.0f ms; using bi-encoder order", self.budget_ms)
+                return docs[:k]
+        with self._lock:
+            scores = [self._cache.get(key) for key in keys]
+        if any(s is None for s in scores):
+            annotate(fallback="error")
+            return docs[:k]
+        order = sorted(range(len(docs)), key=lambda i: -scores[i])[:k]
+        return [dict(docs[i], rerank_score=scores[i]) for i in order]
+
+    def _start(self, query: str, texts: List[str], keys: List[str], missing: List[int]):
+        with self._lock:
+            if self._busy.is_set():
+                return None
+            self._busy.set()
+        return self._pool.submit(self._score, query, [texts[i] for i in missing], [keys[i] for i in missing])
+
+    def warm(self) -> None:
+        """Load the model ahead of the first budgeted call (e.g. at scheduler start)."""
+        self._load()
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Process-wide reranker, so the model and score cache are shared by every generator."""
+    global _reranker
+    with _reranker_lock:
+        if _reranker is None:
+            _reranker = CrossEncoderReranker()
+        return _reranker
@@ -0,0 +1,220 @@
+"""Event-driven daily scheduler: timer heap, tz-aware slots across DST, catch-up and jitter."""
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+import json
+import heapq
+import random
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytz
+
+logger = logging.getLogger("valtrilabs.scheduler")
+
+# Upper bound on a single sleep so wall-clock jumps (suspend, NTP) are noticed.
+MAX_SLEEP_SECONDS = 3600
+
+
+def check_slot(hour: int, minute: int) -> Tuple[int, int]:
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError(f"Invalid slot {hour:02d}:{minute:02d}: expected a time between 00:00 and 23:59")
+    return hour, minute
+
+
+def parse_slots(spec: str) -> List[Tuple[int, int]]:
+    """Parse "11:00,17:30" into [(11, 0), (17, 30)]; raises ValueError on anything else."""
+    slots = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        hour, _, minute = part.partition(":")
+        try:
+            slot = (int(hour), int(minute or 0))
+        except ValueError:
+            raise ValueError(f"Invalid slot {part!r}: expected HH:MM") from None
+        slots.append(check_slot(*slot))
+    return sorted(set(slots))
+
+
+def localize(tz: pytz.BaseTzInfo, naive: datetime) -> datetime:
+    """Attach `tz` to a wall-clock time; DST gaps move forward, repeated hours use the first pass."""
+    try:
+        return tz.localize(naive, is_dst=None)
+    except pytz.AmbiguousTimeError:
+        return tz.localize(naive, is_dst=True)
+    except pytz.NonExistentTimeError:
+        return tz.normalize(tz.localize(naive, is_dst=False))
+
+
+class DailySchedule:
+    """Fire `job(slot)` at each local wall-clock slot every day in `tz_name`.
+
+    With `prepare`, `prepare(slot)` additionally fires `lead_seconds` before each slot
+    so expensive work can be staged ahead of the deadline.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slots: List[Tuple[int, int]],
+        tz_name: str,
+        job: Callable[[datetime], None],
+        jitter_seconds: float = 0,
+        catch_up_seconds: float = 6 * 3600,
+        prepare: Optional[Callable[[datetime], None]] = None,
+        lead_seconds: float = 0,
+    ):
+        if not slots:
+            raise ValueError(f"Schedule {name!r} has no slots")
+        self.name = name
+        self.slots = sorted(check_slot(h, m) for h, m in slots)
+        self.tz = pytz.timezone(tz_name)
+        self.job = job
+        self.jitter_seconds = jitter_seconds
+        self.catch_up_seconds = catch_up_seconds
+        self.prepare = prepare
+        self.lead_seconds = lead_seconds
+
+    def _candidates(self, around: datetime) -> List[datetime]:
+        local_day = around.astimezone(self.tz).date()
+        out = []
+        for delta in (-1, 0, 1, 2):
+            day = local_day + timedelta(days=delta)
+            for hour, minute in self.slots:
+                out.append(localize(self.tz, datetime(day.year, day.month, day.day, hour, minute)).astimezone(pytz.utc))
+        return sorted(set(out))
+
+    def next_slot(self, after: datetime) -> datetime:
+        """First slot strictly after `after` (aware), as an aware UTC datetime."""
+        return next(s for s in self._candidates(after) if s > after)
+
+    def previous_slot(self, before: datetime) -> datetime:
+        """Latest slot at or before `before`."""
+        return [s for s in self._candidates(before) if s <= before][-1]
+
+
+class Scheduler:
+    """Sleeps until the earliest deadline in a heap instead of polling.
+
+    Last-fired slots are persisted so a restart can catch up on a slot missed
+    during downtime (within each schedule's catch-up window).
+    """
+
+    def __init__(self, state_path: str = "data/scheduler_state.json", max_workers: int = 2):
+        self.state_path = state_path
+        self._heap: List[Tuple[float, int, str, float, str]] = []  # (fire_at, seq, name, slot, kind)
+        self._schedules: Dict[str, DailySchedule] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduled-job")
+        self._state = self._load_state()
+
+    def _load_state(self) -> Dict[str, float]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            logger.exception("Could not read scheduler state %s", self.state_path)
+            return {}
+
+    def _save_state(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp = self.state_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._state, f)
+            os.replace(tmp, self.state_path)
+        except Exception:
+            logger.exception("Could not persist scheduler state")
+
+    def _push(self, schedule: DailySchedule, slot: datetime, fire_at: Optional[float] = None, kind: str = "run") -> None:
+        if fire_at is None:
+            fire_at = slot.timestamp() + (random.uniform(0, schedule.jitter_seconds) if schedule.jitter_seconds else 0)
+        self._seq += 1
+        heapq.heappush(self._heap, (fire_at, self._seq, schedule.name, slot.timestamp(), kind))
+        self._wake.set()
+
+    def _push_slot(self, schedule: DailySchedule, slot: datetime, now: float) -> None:
+        self._push(schedule, slot)
+        if schedule.prepare is not None:
+            # a slot closer than the lead time is prepared immediately
+            self._push(schedule, slot, fire_at=max(slot.timestamp() - schedule.lead_seconds, now), kind="prepare")
+
+    def add(self, schedule: DailySchedule) -> None:
+        now = datetime.now(pytz.utc)
+        with self._lock:
+            self._schedules[schedule.name] = schedule
+            last = self._state.get(schedule.name)
+            prev = schedule.previous_slot(now)
+            if last is None:
+                # first run: nothing to catch up on
+                self._state[schedule.name] = now.timestamp()
+                self._save_state()
+            elif last < prev.timestamp() and (now - prev).total_seconds() <= schedule.catch_up_seconds:
+                logger.info("Catching up missed slot %s for %s", prev.astimezone(schedule.tz).isoformat(), schedule.name)
+                self._push(schedule, prev, fire_at=now.timestamp())
+            nxt = schedule.next_slot(now)
+            self._push_slot(schedule, nxt, now.timestamp())
+        logger.info("Scheduled %s; next slot %s", schedule.name, nxt.astimezone(schedule.tz).isoformat())
+
+    def replace(self, schedule: DailySchedule) -> None:
+        """Swap in a changed schedule (slots, timezone) without a restart; nothing is caught up."""
+        now = datetime.now(pytz.utc)
+        with self._lock:
+            self._schedules[schedule.name] = schedule
+            self._heap = [entry for entry in self._heap if entry[2] != schedule.name]
+            heapq.heapify(self._heap)
+            nxt = schedule.next_slot(now)
+            self._push_slot(schedule, nxt, now.timestamp())
+        logger.info("Rescheduled %s; next slot %s", schedule.name, nxt.astimezone(schedule.tz).isoformat())
+
+    def next_runs(self) -> List[Tuple[str, datetime]]:
+        with self._lock:
+            return [(f"{name}:{kind}", datetime.fromtimestamp(ts, pytz.utc)) for ts, _, name, _, kind in sorted(self._heap)]
+
+    def _fire(self, schedule: DailySchedule, slot: datetime, kind: str) -> None:
+        local = slot.astimezone(schedule.tz)
+        logger.info("Running %s (%s) for slot %s", schedule.name, kind, local.isoformat())
+        try:
+            if kind == "prepare":
+                schedule.prepare(local)
+            else:
+                schedule.job(local)
+        except Exception:
+            logger.exception("Scheduled job %s (%s) failed", schedule.name, kind)
+
+    def run(self) -> None:
+        """Block, firing jobs at their deadlines, until stop() is called."""
+        while not self._stop.is_set():
+            with self._lock:
+                deadline = self._heap[0][0] if self._heap else None
+                now = datetime.now(pytz.utc).timestamp()
+                due = None
+                if deadline is not None and deadline <= now:
+                    _, _, name, slot_ts, kind = heapq.heappop(self._heap)
+                    schedule = self._schedules[name]
+                    slot = datetime.fromtimestamp(slot_ts, pytz.utc)
+                    due = (schedule, slot, kind)
+                    if kind == "run":
+                        if slot_ts > self._state.get(name, 0):
+                            self._state[name] = slot_ts
+                            self._save_state()
+                        if not any(n == name and s > slot_ts for _, _, n, s, _ in self._heap):
+                            self._push_slot(schedule, schedule.next_slot(slot), now)
+                self._wake.clear()
+            if due:
+                self._pool.submit(self._fire, *due)
+                continue
+            timeout = MAX_SLEEP_SECONDS if deadline is None else min(max(deadline - now, 0), MAX_SLEEP_SECONDS)
+            self._wake.wait(timeout)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._pool.shutdown(wait=False)
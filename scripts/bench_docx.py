@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Compare DOCX extraction paths on large synthetic documents: python-docx's Document tree
+(the previous load_pdfs path) against the streaming docx_stream parser, plus streaming
+straight into the chunker. Reports wall time and peak Python memory (tracemalloc).
+
+    python scripts/bench_docx.py                      # 1k, 10k and 50k paragraphs
+    python scripts/bench_docx.py --sizes 100000 --tables 200 --repeat 3
+    python scripts/bench_docx.py --file "data/pdfs/Knowledge Base.docx"
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from typing import Callable, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import docx_stream  # noqa: E402
+
+WORDS = ("liquidity custody settlement orderbook margin collateral oracle validator rollup sequencer "
+         "bridge governance token staking slippage spread volatility surface hedging exposure").split()
+
+
+def make_docx(path: str, paragraphs: int, tables: int, seed: int = 0) -> None:
+    from docx import Document
+    rng = random.Random(seed)
+    doc = Document()
+    table_every = max(paragraphs // tables, 1) if tables else 0
+    for i in range(paragraphs):
+        if i % 50 == 0:
+            doc.add_heading(f"Section {i // 50 + 1}: {rng.choice(WORDS).title()}", level=1 + (i // 50) % 2)
+        doc.add_paragraph(" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) + ".")
+        if table_every and i % table_every == table_every - 1:
+            table = doc.add_table(rows=4, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = " ".join(rng.choice(WORDS) for _ in range(3))
+    doc.save(path)
+
+
+def python_docx_text(path: str) -> str:
+    from docx import Document
+    doc = Document(path)
+    return "\n".join(p.text for p in doc.paragraphs if p.text and p.text.strip())
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 1e6}
+
+
+def run(path: str, label: str, repeat: int) -> None:
+    paths = {
+        "python-docx": lambda: python_docx_text(path),
+        "stream text": lambda: docx_stream.extract_text(path),
+        "stream chunks": lambda: sum(1 for _ in docx_stream.iter_chunks(path)),
+    }
+    size_mb = os.path.getsize(path) / 1e6
+    base = None
+    for name, fn in paths.items():
+        r = measure(fn, repeat)
+        base = base or r["seconds"]
+        print(f"{label:<14}{size_mb:>8.1f}  {name:<14}{r['seconds'] * 1000:>10.1f}{r['peak_mb']:>11.1f}"
+              f"{base / r['seconds']:>9.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="python-docx vs streaming DOCX extraction")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="paragraph counts for synthetic documents")
+    parser.add_argument("--tables", type=int, default=20, help="tables per synthetic document")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--file", action="append", default=[], help="also benchmark an existing .docx")
+    args = parser.parse_args()
+
+    print(f"{'document':<14}{'MB':>8}  {'path':<14}{'ms':>10}{'peak MB':>11}{'speedup':>9}")
+    for path in args.file:
+        run(path, os.path.basename(path)[:13], args.repeat)
+    with tempfile.TemporaryDirectory(prefix="valtrilabs-docx-") as tmp:
+        for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+            path = os.path.join(tmp, f"synthetic_{n}.docx")
+            make_docx(path, n, args.tables)
+            # python-docx (the old path) skips tables, so compare on paragraphs only
+            streamed = [b.text for b in docx_stream.iter_blocks(path) if b.kind != "table_row"]
+            if streamed != python_docx_text(path).split("\n"):
+                print(f"warning: paragraph text differs between the two paths for {n} paragraphs")
+            run(path, f"{n} paras", args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+"""
+Offline benchmark of every content-pipeline stage (no LLM, LinkedIn or CoinGecko calls).
+
+Runs in a throwaway workspace with a synthetic PDF corpus and the zero-latency mock AI
+provider (mock_provider.py), writes
+benchmarks/latest.json and compares it with benchmarks/baseline.json (committed); exits 1 if
+any stage's median is more than --threshold slower than the baseline, and 2 if there is no
+baseline to compare with. Timings only compare on the same machine and embedding model: record
+a local baseline with --update-baseline (and --baseline elsewhere to keep the committed one).
+
+    python scripts/bench_pipeline.py                     # run and compare
+    python scripts/bench_pipeline.py --update-baseline   # accept current numbers
+    python scripts/bench_pipeline.py --quick             # smaller corpus, fewer repeats
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import logging
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger("valtrilabs.bench")
+
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+
+WORDS = (
+    "rollup sequencer liquidity custody settlement validator stablecoin oracle bridge collateral "
+    "restaking slashing mempool finality throughput latency treasury compliance exchange dubai "
+    "regulation market maker spread volatility orderbook derivatives funding basis yield vault"
+).split()
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    lines, line = [], []
+    for _ in range(words):
+        line.append(rng.choice(WORDS))
+        if len(line) == 12:
+            lines.append(" ".join(line))
+            line = []
+    return "\n".join(lines)
+
+
+def write_corpus(folder: str, n_files: int, pages: int, seed: int = 0) -> None:
+    """Synthetic PDFs so load_pdfs is measured on real files without shipping a corpus."""
+    import fitz
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    for i in range(n_files):
+        doc = fitz.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(36, 36, 560, 800), synthetic_text(rng, 400), fontsize=9)
+        doc.save(os.path.join(folder, f"bench_{i:03d}.pdf"))
+        doc.close()
+
+
+def measure(fn: Callable[[], Any], repeat: int, items: int = 1) -> Dict[str, float]:
+    """Run `fn` `repeat` times; report median/min/max milliseconds and items per second."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {
+        "median_ms": round(median * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+        "max_ms": round(max(times) * 1000, 3),
+        "items": items,
+        "items_per_sec": round(items / median, 1) if median else None,
+    }
+
+
+def latency(fn: Callable[[Any], Any], inputs: List[Any]) -> Dict[str, float]:
+    """Per-call latency percentiles over `inputs`."""
+    times = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    pick = lambda q: round(times[min(len(times) - 1, int(q * len(times)))], 3)
+    return {"median_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(times[-1], 3), "items": len(times)}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    os.environ.update({
+        "MARKET_DATA_STUB": "true",
+        "ENABLE_MARKET_GROUNDING": "true",
+        "GENERATION_CANDIDATES": "1",
+        "MOCK_LATENCY": "fixed:0",
+        "MOCK_TOKENS_PER_SEC": "0",
+        "MOCK_ERROR_RATE": "0",
+        "MOCK_SEED": str(args.seed),
+        # templated mock drafts must not trip duplicate rejection; the lookups still run
+        "DUPLICATE_SIMILARITY_THRESHOLD": "1.01",
+    })
+    from pdf_processor import load_pdfs, chunk_text
+    from rag_system import RAGStore, profile_collection
+    from ai_provider import AIProvider
+    from content_generator import ContentGenerator
+    from post_lint import PostLinter
+    from post_store import PostStore
+
+    rng = random.Random(args.seed)
+    results: Dict[str, Dict[str, float]] = {}
+    pdf_dir = os.path.join("data", "pdfs")
+    write_corpus(pdf_dir, args.files, args.pages, args.seed)
+
+    results["load_pdfs"] = measure(lambda: load_pdfs(pdf_dir), args.repeat, items=args.files * args.pages)
+    docs = load_pdfs(pdf_dir)
+    text = "\n".join(t for _, t in docs)
+    results["chunking"] = measure(lambda: [chunk_text(t) for _, t in docs], args.repeat, items=len(text))
+    chunks = [c for _, t in docs for c in chunk_text(t)]
+
+    rag = RAGStore(persist_dir=os.path.join("data", "chroma_db"))
+    sample = (chunks * (256 // max(len(chunks), 1) + 1))[:256]
+    rag.embed(sample[:8])  # model warm-up is not part of the measurement
+    results["embedding"] = measure(lambda: rag.embed(sample), args.repeat, items=len(sample))
+
+    build_docs = [(f"chunk_{i}", c) for i, c in enumerate(chunks[: args.build_docs])]
+    counter = iter(range(10 ** 6))
+    results["index_build"] = measure(
+        lambda: rag.build_from_documents(build_docs, collection_name=f"bench_build_{next(counter)}"),
+        max(1, args.repeat // 2),
+        items=len(build_docs),
+    )
+
+    queries = [" ".join(rng.sample(WORDS, 4)) for _ in range(args.queries)]
+    for size in args.sizes:
+        name = f"bench_search_{size}"
+        collection = rag.client.get_or_create_collection(name=name)
+        texts = [f"{chunks[i % len(chunks)]} {i}" for i in range(size)]
+        vectors = rag.embed(texts)
+        for lo in range(0, size, 4096):
+            hi = min(lo + 4096, size)
+            collection.add(
+                ids=[f"s{i}" for i in range(lo, hi)],
+                metadatas=[{"source": "bench"} for _ in range(lo, hi)],
+                documents=texts[lo:hi],
+                embeddings=vectors[lo:hi].tolist(),
+            )
+        rag.similarity_search(queries[0], k=4, collection_name=name)
+        results[f"similarity_search_{size}"] = latency(
+            lambda q: rag.similarity_search(q, k=4, collection_name=name), queries
+        )
+
+    generator = ContentGenerator(rag, AIProvider("mock"))
+    context = rag.similarity_search(queries[0], k=4, collection_name=f"bench_search_{args.sizes[0]}")
+    results["build_prompt"] = latency(
+        lambda q: generator.build_prompt("market structure", "insight", q + " liquidity", context), queries
+    )
+
+    linter = PostLinter()
+    mock = AIProvider("mock")
+    drafts = [mock.generate(q)["text"] + " In this chapter we leverage synergy \U0001F680\U0001F680\U0001F680\U0001F680 #mid" for q in (queries * 200)[:200]]
+    results["post_processing"] = latency(linter.lint, drafts)
+
+    store = PostStore(os.path.join("data", "bench_posts.db"), legacy_json=None)
+    posts = [{"content": d, "theme": "bench", "profile": "bench", "created_at": "2026-01-01T00:00:00Z"} for d in drafts]
+    results["store_writes"] = latency(store.append, posts)
+
+    # the profile shard generate_post reads from must hold the corpus
+    rag.build_from_documents(build_docs, collection_name=profile_collection(generator.profile_key))
+    generator.generate_post("warm up", "insight", queries[0])
+    results["generate_post"] = latency(
+        lambda q: generator.generate_post("market structure", "insight", q), queries[: args.generations]
+    )
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float, min_delta_ms: float
+) -> List[str]:
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        current = results.get(stage)
+        if not current or not base.get("median_ms"):
+            continue
+        ratio = current["median_ms"] / base["median_ms"]
+        # sub-millisecond stages jitter by more than any sane threshold; require a real delta too
+        if ratio > 1 + threshold and current["median_ms"] - base["median_ms"] > min_delta_ms:
+            regressions.append(f"{stage}: {base['median_ms']:.3f} ms -> {current['median_ms']:.3f} ms (+{(ratio - 1) * 100:.0f}%)")
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "embedding_model": os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the content pipeline offline")
+    parser.add_argument("--files", type=int, default=20, help="synthetic PDFs in the corpus")
+    parser.add_argument("--pages", type=int, default=5, help="pages per PDF")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=[100, 1000, 10000],
+                        help="corpus sizes for similarity_search, e.g. 100,1000,10000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--build-docs", type=int, default=200, help="chunks indexed in the index_build stage")
+    parser.add_argument("--generations", type=int, default=10, help="full generate_post runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quick", action="store_true", help="small corpus and sizes for a fast sanity run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--out", default=os.path.join(BENCH_DIR, "latest.json"))
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+    if args.quick:
+        args.files, args.pages, args.sizes, args.queries = 4, 2, [100, 1000], 20
+        args.build_docs, args.generations, args.repeat = 50, 3, 3
+
+    workdir = tempfile.mkdtemp(prefix="valtrilabs-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = run(args)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {k: v for k, v in vars(args).items() if k not in ("baseline", "out", "threshold", "min_delta_ms", "update_baseline")}
+    report = {"environment": environment(), "params": params, "stages": results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'stage':<28}{'median ms':>12}{'p95/max ms':>12}{'items/s':>16}")
+    for stage, r in results.items():
+        tail = r.get("p95_ms", r.get("max_ms"))
+        print(f"{stage:<28}{r['median_ms']:>12.3f}{tail:>12.3f}{r.get('items_per_sec') or '':>16}")
+    print(f"\nResults written to {args.out}")
+
+    if args.update_baseline:
+        shutil.copyfile(args.out, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 2
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("params") != report["params"]:
+        print("Warning: baseline was recorded with different parameters; comparison may be meaningless")
+    base_env = baseline.get("environment", {})
+    differs = [k for k in ("platform", "cpus", "embedding_model") if base_env.get(k) != report["environment"][k]]
+    if differs:
+        print(f"Warning: baseline was recorded on a different machine or model ({', '.join(differs)}); "
+              "record a local one with --update-baseline --baseline <path>")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\nREGRESSIONS (> {args.threshold * 100:.0f}% slower than baseline):")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print(f"No stage regressed more than {args.threshold * 100:.0f}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+"""
+Offline load test: drive the dashboard, the generation pipeline or publishing at a target
+concurrency and report throughput and p50/p95/p99 latency. Uses the mock AI provider and the
+fake LinkedIn endpoint, so no quota is spent.
+
+    python scripts/load_test.py app --mix posts=6,preview=1,config=2 -c 16 -n 500
+    python scripts/load_test.py app --url http://127.0.0.1:8000 -c 32 --duration 60
+    python scripts/load_test.py pipeline -c 4 -n 50 --latency lognormal:0,0.4 --tokens-per-sec 60
+    python scripts/load_test.py publish -c 8 -n 200 --fake-latency uniform:0.05,0.2 --fake-error-rate 0.05
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import itertools
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger("valtrilabs.load_test")
+logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def drive(
+    ops: List[Tuple[str, Callable[[], None]]],
+    weights: List[int],
+    concurrency: int,
+    total: int,
+    duration: float,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Run weighted `ops` from `concurrency` threads until `total` calls or `duration` seconds."""
+    rng = random.Random(seed)
+    schedule = rng.choices(range(len(ops)), weights=weights, k=total) if total else None
+    counter = itertools.count()
+    deadline = time.monotonic() + duration if duration else None
+    samples: Dict[str, List[float]] = {name: [] for name, _ in ops}
+    errors: Counter = Counter()
+    lock = threading.Lock()
+
+    def worker(worker_rng: random.Random) -> None:
+        while True:
+            i = next(counter)
+            if schedule is not None and i >= len(schedule):
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            name, fn = ops[schedule[i] if schedule is not None else worker_rng.choices(range(len(ops)), weights=weights)[0]]
+            start = time.perf_counter()
+            try:
+                fn()
+                ok = True
+            except Exception as e:
+                ok = False
+                err = f"{name}: {type(e).__name__}: {str(e)[:80]}"
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    samples[name].append(elapsed)
+                else:
+                    errors[err] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for w in range(concurrency):
+            pool.submit(worker, random.Random(seed * 1000 + w))
+    wall = time.perf_counter() - started
+
+    report: Dict[str, Any] = {"concurrency": concurrency, "wall_seconds": round(wall, 3), "routes": {}}
+    all_ok = []
+    for name, values in samples.items():
+        values.sort()
+        all_ok.extend(values)
+        report["routes"][name] = summarize(values, wall)
+    all_ok.sort()
+    report["overall"] = summarize(all_ok, wall)
+    report["errors"] = dict(errors)
+    report["overall"]["errors"] = sum(errors.values())
+    return report
+
+
+def summarize(values: List[float], wall: float) -> Dict[str, float]:
+    return {
+        "requests": len(values),
+        "throughput_rps": round(len(values) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "max_ms": round((values[-1] if values else 0.0) * 1000, 2),
+    }
+
+
+def app_ops(args: argparse.Namespace) -> Tuple[List[Tuple[str, Callable[[], None]]], List[int]]:
+    import requests
+
+    base = args.url
+    if not base:
+        # in-process threaded server running app.py with the mock provider
+        from werkzeug.serving import make_server
+        os.environ.setdefault("PREVIEW_POOL_DEPTH", "0")
+        import app as dashboard
+        server = make_server("127.0.0.1", 0, dashboard.app, threaded=True)
+        threading.Thread(target=server.serve_forever, name="load-test-app", daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency * 2))
+
+    def check(resp: "requests.Response") -> Dict[str, Any]:
+        resp.raise_for_status()
+        body = resp.json()
+        if body.get("success") is False:
+            raise RuntimeError(body.get("message", "request failed"))
+        return body
+
+    def preview() -> None:
+        body = check(session.post(f"{base}/api/generate-preview", json={}, timeout=args.timeout))
+        deadline = time.monotonic() + args.timeout
+        while body.get("status") in ("pending", "running"):
+            if time.monotonic() > deadline:
+                raise TimeoutError("preview job did not finish")
+            body = check(session.get(f"{base}/api/generate-preview/{body['job_id']}", params={"wait": 10}, timeout=args.timeout))
+
+    routes = {
+        "posts": lambda: check(session.get(f"{base}/api/posts", params={"limit": 20}, timeout=args.timeout)),
+        "search": lambda: check(session.get(f"{base}/api/posts", params={"q": "liquidity"}, timeout=args.timeout)),
+        "config": lambda: check(session.get(f"{base}/api/config", timeout=args.timeout)),
+        "status": lambda: check(session.get(f"{base}/api/scheduler/status", timeout=args.timeout)),
+        "preview": preview,
+    }
+    ops, weights = [], []
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in routes:
+            raise SystemExit(f"Unknown route {name!r}; choose from {', '.join(routes)}")
+        ops.append((name.strip(), routes[name.strip()]))
+        weights.append(int(weight or 1))
+    return ops, weights
+
+
+def pipeline_ops(args: argparse.Namespace) -> Tuple[List[Tuple[str, Callable[[], None]]], List[int]]:
+    from rag_system import RAGStore
+    from ai_provider import AIProvider
+    from content_generator import ContentGenerator
+    from pipeline import generate_for_profile
+
+    generator = ContentGenerator(RAGStore(), AIProvider(args.provider))
+    return [("generate_post", lambda: generate_for_profile(generator, save=False))], [1]
+
+
+def publish_ops(args: argparse.Namespace) -> Tuple[List[Tuple[str, Callable[[], None]]], List[int]]:
+    from linkedin_fake import FakeLinkedInServer
+    from linkedin_client import LinkedInClient
+    from post_store import PostStore
+
+    # the client's own throttle would otherwise be what gets measured
+    os.environ.setdefault("LINKEDIN_RATE_PER_SEC", "10000")
+    os.environ.setdefault("LINKEDIN_RATE_BURST", "10000")
+    os.environ.setdefault("HTTP_POOL_SIZE", str(args.concurrency * 2))
+    fake = FakeLinkedInServer(
+        latency=args.fake_latency, error_rate=args.fake_error_rate, error_status=args.fake_error_status, seed=args.seed
+    ).start()
+    store = PostStore(os.path.join(tempfile.mkdtemp(prefix="valtrilabs-load-"), "ledger.db"), legacy_json=None)
+    client = LinkedInClient("load-test-token", base_url=fake.base_url, store=store, backoff=0.05)
+    serial = itertools.count()
+
+    def publish() -> None:
+        n = next(serial)
+        client.publish_ugc("urn:li:person:loadtest", f"Load test post {n}", key=f"load:{n}")
+
+    return [("publish_ugc", publish)], [1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline load test with the mock provider and fake LinkedIn")
+    parser.add_argument("target", choices=["app", "pipeline", "publish"])
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-n", "--requests", type=int, default=200, help="total calls (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="run for N seconds instead of -n calls")
+    parser.add_argument("--mix", default="posts=6,preview=1,config=2,status=1", help="app routes and weights")
+    parser.add_argument("--url", default="", help="test a running server instead of an in-process one")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--provider", default="mock", help="AI_PROVIDER for in-process targets")
+    parser.add_argument("--latency", default=None, help="mock provider time to first token, e.g. lognormal:0,0.4")
+    parser.add_argument("--tokens-per-sec", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=None, help="mock provider failure fraction")
+    parser.add_argument("--fake-latency", default="fixed:0", help="fake LinkedIn response latency")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--fake-error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default="", help="also write the report to this file")
+    args = parser.parse_args()
+
+    # must be in place before app/ai_provider read the environment
+    os.environ["AI_PROVIDER"] = args.provider
+    os.environ["MOCK_SEED"] = str(args.seed)
+    for env, value in (("MOCK_LATENCY", args.latency), ("MOCK_TOKENS_PER_SEC", args.tokens_per_sec),
+                       ("MOCK_ERROR_RATE", args.error_rate)):
+        if value is not None:
+            os.environ[env] = str(value)
+
+    ops, weights = {"app": app_ops, "pipeline": pipeline_ops, "publish": publish_ops}[args.target](args)
+    total = 0 if args.duration else args.requests
+    report = drive(ops, weights, args.concurrency, total, args.duration, args.seed)
+    report["target"] = args.target
+
+    print(f"{args.target}: concurrency {args.concurrency}, {report['wall_seconds']:.1f}s wall")
+    print(f"{'route':<16}{'reqs':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, r in list(report["routes"].items()) + [("overall", report["overall"])]:
+        print(f"{name:<16}{r['requests']:>7}{r['throughput_rps']:>9.1f}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}")
+    if report["errors"]:
+        print(f"\n{report['overall']['errors']} errors:")
+        for err, count in sorted(report["errors"].items(), key=lambda kv: -kv[1]):
+            print(f"  {count:>5}  {err}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Measure dashboard cold start and per-process memory for one or more ways of serving it.
+
+    python scripts/measure_startup.py                                    # dev server vs gunicorn
+    python scripts/measure_startup.py --run "gunicorn=gunicorn -c gunicorn.conf.py app:app" \\
+        --env WEB_CONCURRENCY=4 --json startup.json
+
+For each command: start it, time until /healthz and /readyz first answer 200 and the first
+/api/config response, then read RSS and PSS (shared pages split between the processes that
+map them) of the server and each worker from /proc. Linux only.
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import signal
+import argparse
+import subprocess
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_RUNS = [
+    "dev=python app.py",
+    "gunicorn=gunicorn -c gunicorn.conf.py app:app",
+]
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS in kB from /proc/<pid>/smaps_rollup."""
+    out = {"rss_kb": 0, "pss_kb": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    out[key.lower() + "_kb"] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
+
+def children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def wait_for(url: str, deadline: float, proc: subprocess.Popen) -> Optional[float]:
+    """Seconds until `url` returns 200, or None if the process exits or time runs out."""
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(url, timeout=2) as resp:
+                if resp.status == 200:
+                    return time.monotonic()
+        except Exception:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def measure(label: str, command: str, port: int, timeout: float, settle: float) -> Dict[str, Any]:
+    env = dict(os.environ, PORT=str(port), FLASK_ENV="production")
+    base = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    proc = subprocess.Popen(shlex.split(command), cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    result: Dict[str, Any] = {"label": label, "command": command}
+    try:
+        deadline = started + timeout
+        for name, path in (("healthz_s", "/healthz"), ("readyz_s", "/readyz"), ("first_request_s", "/api/config")):
+            t = wait_for(base + path, deadline, proc)
+            result[name] = round(t - started, 3) if t else None
+        time.sleep(settle)  # let workers finish booting before sampling memory
+        pids = [proc.pid] + children(proc.pid)
+        result["processes"] = [dict(pid=p, role="server" if p == proc.pid else "worker", **memory_kb(p)) for p in pids]
+        result["total_rss_mb"] = round(sum(p["rss_kb"] for p in result["processes"]) / 1024, 1)
+        result["total_pss_mb"] = round(sum(p["pss_kb"] for p in result["processes"]) / 1024, 1)
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold-start time and per-worker memory of the dashboard")
+    parser.add_argument("--run", action="append", default=[], help="LABEL=COMMAND (repeatable)")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for every run (repeatable)")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--settle", type=float, default=2.0)
+    parser.add_argument("--json", default="", help="also write the results to this file")
+    args = parser.parse_args()
+
+    for item in args.env:
+        key, _, value = item.partition("=")
+        os.environ[key] = value
+
+    results = []
+    for run in args.run or DEFAULT_RUNS:
+        label, _, command = run.partition("=")
+        results.append(measure(label, command, args.port, args.timeout, args.settle))
+
+    fmt = lambda v: f"{v:.2f}" if v is not None else "-"
+    print(f"{'run':<12}{'healthz s':>11}{'readyz s':>10}{'first req s':>13}{'procs':>7}{'RSS MB':>9}{'PSS MB':>9}")
+    for r in results:
+        procs = r.get("processes", [])
+        print(f"{r['label']:<12}{fmt(r['healthz_s']):>11}{fmt(r['readyz_s']):>10}{fmt(r['first_request_s']):>13}"
+              f"{len(procs):>7}{r.get('total_rss_mb', 0):>9.1f}{r.get('total_pss_mb', 0):>9.1f}")
+        for p in procs:
+            print(f"    {p['role']:<8}{p['pid']:>8}  rss {p['rss_kb'] / 1024:>7.1f} MB  pss {p['pss_kb'] / 1024:>7.1f} MB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
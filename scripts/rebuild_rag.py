@@ -13,17 +13,17 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 try:
-    from pdf_processor import load_pdfs, chunk_text
+    from pdf_processor import load_chunks
     from rag_system import RAGStore
     
     logger.info("Loading PDFs/DOCX from data/pdfs...")
-    docs = load_pdfs("data/pdfs")
+    docs = list(load_chunks("data/pdfs"))
     
     if not docs:
         logger.warning("No PDFs/DOCX found in data/pdfs")
         sys.exit(0)
     
-    logger.info(f"Loaded {len(docs)} documents")
+    logger.info(f"Loaded {len(docs)} chunks")
     
     # Delete old chroma db to force rebuild
     import shutil
@@ -35,8 +35,13 @@ try:
     # Build new RAG
     logger.info("Building RAG embeddings...")
     rag = RAGStore(persist_dir=db_path)
-    rag.build_from_documents(docs)
+    counts = rag.ingest(docs, root="data/pdfs")
     rag.persist()
+    for name, count in sorted(counts.items()):
+        logger.info(f"  {name}: {count} documents")
+    if rag.dedup_stats:
+        logger.info(f"  dedup: {rag.dedup_stats['saved']} of {rag.dedup_stats['chunks']} chunks merged "
+                    f"({rag.dedup_stats['saved']} embedding calls saved)")
     
     logger.info("✓ RAG rebuilt successfully")
     
@@ -92,7 +92,7 @@ def main():
     print(f"Format: {post.get('format')}")
     print(f"Hashtags: {', '.join(post.get('hashtags', []))}")
     print(f"Provider: {post.get('provider')}")
-    print(f"Saved to: data/posts.json")
+    print(f"Saved to: data/posts.db (id {post.get('id')})")
     
     # Check post quality (basic)
     content = post.get("content", "")
@@ -124,7 +124,7 @@ def main():
     logger.info("=" * 60)
     logger.info("\nNext steps:")
     logger.info("1. Review the post preview above")
-    logger.info("2. Check data/posts.json for saved post")
+    logger.info("2. Check data/posts.db for saved post (python post_store.py)")
     logger.info("3. If happy with quality, set TEST_MODE=false in .env")
     logger.info("4. Run: python -m main (option 3) to post LIVE")
     logger.info("   OR commit and push to GitHub for scheduled posting")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Summarize tracing spans (TRACE_LOG_PATH, JSON lines): per-stage latency and the slowest traces.
+
+    python scripts/trace_summary.py                          # valtrilabs.traces.jsonl
+    python scripts/trace_summary.py traces.jsonl --since 2h --top 5
+    python scripts/trace_summary.py --root pipeline.publish  # only traces started by this span
+"""
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def parse_since(value: str) -> float:
+    """'90m', '2h', '1d' or seconds -> unix timestamp that many seconds ago."""
+    if not value:
+        return 0.0
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    scale = units.get(value[-1].lower())
+    seconds = float(value[:-1]) * scale if scale else float(value)
+    return time.time() - seconds
+
+
+def read_spans(paths: List[str], since: float) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except ValueError:
+                    continue
+                if "trace_id" in span and span.get("start", 0) >= since:
+                    yield span
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-stage latency and slowest traces from the span log")
+    parser.add_argument("path", nargs="?", default=os.getenv("TRACE_LOG_PATH", os.path.join(ROOT, "valtrilabs.traces.jsonl")))
+    parser.add_argument("--since", default="", help="only spans newer than this (e.g. 30m, 6h, 2d)")
+    parser.add_argument("--top", type=int, default=10, help="slowest traces to show")
+    parser.add_argument("--root", default="", help="only traces whose root span has this name")
+    args = parser.parse_args()
+
+    # include rotated files (.1, .2, ...) so a summary spans the whole retained window
+    paths = sorted(glob.glob(args.path + ".*")) + ([args.path] if os.path.exists(args.path) else [])
+    if not paths:
+        print(f"No span log at {args.path} (is TRACING enabled?)")
+        return 1
+
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for span in read_spans(paths, parse_since(args.since)):
+        traces[span["trace_id"]].append(span)
+    roots = {tid: next((s for s in spans if not s.get("parent_id")), None) for tid, spans in traces.items()}
+    if args.root:
+        traces = {tid: spans for tid, spans in traces.items() if roots[tid] and roots[tid]["name"] == args.root}
+    if not traces:
+        print("No matching spans")
+        return 0
+
+    durations: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    for spans in traces.values():
+        for s in spans:
+            durations[s["name"]].append(s.get("duration_ms") or 0.0)
+            if s.get("status") == "error":
+                errors[s["name"]] += 1
+
+    print(f"{len(traces)} traces, {sum(len(v) for v in durations.values())} spans from {', '.join(paths)}\n")
+    print(f"{'stage':<28}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'total s':>10}{'errors':>8}")
+    for name, values in sorted(durations.items(), key=lambda kv: -sum(kv[1])):
+        values.sort()
+        print(f"{name:<28}{len(values):>7}{percentile(values, 0.5):>10.1f}{percentile(values, 0.95):>10.1f}"
+              f"{values[-1]:>10.1f}{sum(values) / 1000:>10.1f}{errors.get(name, 0):>8}")
+
+    # a trace's length is its root span; orphaned fragments (root still open or rotated away) use the longest span
+    def trace_ms(tid: str) -> float:
+        root = roots.get(tid)
+        return (root or max(traces[tid], key=lambda s: s.get("duration_ms") or 0)).get("duration_ms") or 0.0
+
+    print(f"\nSlowest {min(args.top, len(traces))} traces:")
+    for tid in sorted(traces, key=trace_ms, reverse=True)[: args.top]:
+        spans = sorted(traces[tid], key=lambda s: s["start"])
+        root = roots.get(tid)
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(spans[0]["start"]))
+        attrs = " ".join(f"{k}={v}" for k, v in (root or spans[0]).get("attributes", {}).items())
+        print(f"\n  {tid[:12]}  {trace_ms(tid):.1f} ms  {started}  {(root or spans[0])['name']}  {attrs}")
+        for s in spans:
+            if s is root:
+                continue
+            flag = f"  ERROR {s['error']}" if s.get("status") == "error" else ""
+            print(f"      {s['name']:<28}{s.get('duration_ms') or 0:>10.1f} ms{flag}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
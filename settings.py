@@ -0,0 +1,197 @@
+"""Configuration service: `.env` parsed into immutable snapshots, cached by mtime, hot-reloaded.
+
+    settings = get_settings()
+    settings.snapshot()["TIMEZONE"]              # stat() per call, re-parse only on change
+    settings.subscribe(callback, keys={"TIMEZONE"})
+    settings.update({"TEST_MODE": "false"})     # atomic write, then notify subscribers
+    settings.watch()                             # pick up edits made by other processes
+"""
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+import os
+import re
+import weakref
+import tempfile
+import threading
+import logging
+from dotenv import dotenv_values
+
+logger = logging.getLogger("valtrilabs.settings")
+
+_LINE = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=")
+
+
+class Settings(Mapping):
+    """Immutable view of one version of the .env file."""
+
+    def __init__(self, values: Dict[str, str], version: int, mtime: float):
+        self._values = dict(values)
+        self.version = version
+        self.mtime = mtime
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.get(key)
+        return default if value is None else value.lower() in ("1", "true", "yes")
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        value = self.get(key)
+        return default if value in (None, "") else int(value)
+
+
+def _quote(value: str) -> str:
+    if value and re.search(r"[\s#'\"\\]", value) is None:
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+class SettingsService:
+    """Caches the parsed .env by (mtime, size) and pushes changes to subscribers.
+
+    Changed keys are also written to os.environ, so code that reads os.getenv (profile
+    overrides, per-job posters) sees new values too. On the first load variables already
+    set in the real environment win, as with load_dotenv().
+    """
+
+    def __init__(self, path: str = ".env"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._snapshot = Settings({}, 0, 0.0)
+        self._subscribers: List[Tuple[Any, Optional[Set[str]]]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def snapshot(self) -> Settings:
+        """Current settings; re-parses the file only when its mtime or size changed."""
+        stamp = self._stat()
+        if stamp == self._stamp and self._snapshot.version:
+            return self._snapshot
+        with self._lock:
+            stamp = self._stat()
+            if stamp == self._stamp and self._snapshot.version:
+                return self._snapshot
+            values = {k: v for k, v in dotenv_values(self.path).items() if v is not None} if stamp else {}
+            old = self._snapshot
+            changed = {k for k in set(values) | set(old) if values.get(k) != old.get(k)}
+            first = old.version == 0
+            for key in changed:
+                if key in values:
+                    if not (first and key in os.environ):
+                        os.environ[key] = values[key]
+                elif os.environ.get(key) == old.get(key):
+                    del os.environ[key]
+            self._stamp = stamp
+            self._snapshot = new = Settings(values, old.version + 1, stamp[0] / 1e9 if stamp else 0.0)
+        if not first and changed:
+            logger.info("Settings reloaded from %s (version %d): %s", self.path, new.version, ", ".join(sorted(changed)))
+            self._notify(new, changed)
+        return new
+
+    def subscribe(self, callback: Callable[[Settings, Set[str]], None], keys: Optional[Set[str]] = None) -> None:
+        """Call `callback(snapshot, changed_keys)` after a reload touching `keys` (any key if None).
+
+        Bound methods are held weakly so short-lived components do not leak.
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            # drop collected subscribers here too: per-request posters subscribe far more often than .env changes
+            self._subscribers = [(r, k) for r, k in self._subscribers if r() is not None]
+            self._subscribers.append((ref, set(keys) if keys else None))
+
+    def _notify(self, snapshot: Settings, changed: Set[str]) -> None:
+        with self._lock:
+            self._subscribers = [(ref, keys) for ref, keys in self._subscribers if ref() is not None]
+            targets = [ref() for ref, keys in self._subscribers if keys is None or keys & changed]
+        for callback in targets:
+            if callback is None:
+                continue
+            try:
+                callback(snapshot, changed)
+            except Exception:
+                logger.exception("Settings subscriber %r failed", callback)
+
+    def update(self, values: Mapping[str, Any]) -> Settings:
+        """Set keys in the .env file atomically, keeping every other line (comments included)."""
+        with self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                lines = []
+            pending = {k: str(v) for k, v in values.items()}
+            out = []
+            for line in lines:
+                m = _LINE.match(line)
+                if m and m.group(1) in pending:
+                    key = m.group(1)
+                    out.append(f"{key}={_quote(pending.pop(key))}")
+                else:
+                    out.append(line)
+            out.extend(f"{k}={_quote(v)}" for k, v in pending.items())
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(prefix=".env.", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write("\n".join(out) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                if os.path.exists(self.path):
+                    os.chmod(tmp, os.stat(self.path).st_mode & 0o777)
+                os.replace(tmp, self.path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            # explicit edits always win over the process environment
+            for key, value in values.items():
+                os.environ[key] = str(value)
+            self._stamp = None  # same-size rewrite within the mtime granularity still reloads
+        return self.snapshot()
+
+    def watch(self, interval: Optional[float] = None) -> None:
+        """Poll the file's mtime in a daemon thread so long-running processes hot-reload."""
+        interval = interval or float(os.getenv("SETTINGS_POLL_SECONDS", "5"))
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="settings-watch", daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.snapshot()
+            except Exception:
+                logger.exception("Reloading %s failed", self.path)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_service: Optional[SettingsService] = None
+_service_lock = threading.Lock()
+
+
+def get_settings(path: str = ".env") -> SettingsService:
+    """Process-wide settings service (loads the file on first use)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SettingsService(path)
+    _service.snapshot()
+    return _service
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from post_store import PostStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An empty post store in a temporary directory (no legacy posts.json migration)."""
+    return PostStore(str(tmp_path / "posts.db"), legacy_json=None)
@@ -0,0 +1,64 @@
+import random
+
+from dedup import MinHasher, MinHashLSH, _bands_for, dedupe_chunks, shingles
+
+WORDS = ("rollup sequencer liquidity custody settlement validator stablecoin oracle bridge collateral "
+         "restaking slashing mempool finality throughput latency treasury compliance exchange").split()
+
+
+def passage(seed, words=80):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def jaccard(a, b):
+    x, y = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(x & y) / len(x | y)
+
+
+def test_shingles_normalise_case_and_punctuation():
+    assert set(shingles("Rollups, batch TXs!").tolist()) == set(shingles("rollups batch txs").tolist())
+    assert len(shingles("one two three")) == 1
+
+
+def test_bands_put_the_s_curve_near_the_threshold():
+    bands, rows = _bands_for(0.85, 128)
+    assert bands * rows == 128
+    assert abs((1 / bands) ** (1 / rows) - 0.85) < 0.1
+
+
+def test_signature_agreement_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    a = passage(1)
+    words = a.split()
+    b = " ".join(words[:70] + ["oracle"] * 10)
+    estimate = (hasher.signature(a) == hasher.signature(b)).mean()
+    assert abs(estimate - jaccard(a, b)) < 0.1
+
+
+def test_lsh_finds_near_duplicates_only():
+    hasher = MinHasher()
+    lsh = MinHashLSH(threshold=0.8)
+    original = passage(1, 200)
+    index = lsh.insert(hasher.signature(original))
+    lsh.insert(hasher.signature(passage(2, 200)))
+    near = original.replace("oracle", "oracles", 1)
+    match = lsh.query(hasher.signature(near))
+    assert match is not None and match[0] == index and match[1] >= 0.8
+    assert lsh.query(hasher.signature(passage(3, 200))) is None
+
+
+def test_dedupe_chunks_keeps_first_copy_and_records_sources():
+    base = passage(1, 200)
+    docs = [
+        ("a.pdf", base),
+        ("b.pdf", passage(2, 200)),
+        ("c.pdf", base.upper()),  # exact after normalisation
+        ("d.pdf", base.replace("oracle", "oracles", 1)),  # near duplicate
+        ("a.pdf", base),  # same source again
+    ]
+    kept, metadatas, stats = dedupe_chunks(docs, threshold=0.85)
+    assert kept == docs[:2]
+    assert metadatas[0] == {"duplicate_sources": "c.pdf; d.pdf", "duplicates": 3}
+    assert metadatas[1] == {}
+    assert stats == {"chunks": 5, "kept": 2, "exact": 2, "near": 1, "saved": 3}
@@ -0,0 +1,58 @@
+import pytest
+
+from linkedin_client import AmbiguousPublishError, LinkedInClient, idempotency_key
+from linkedin_fake import FakeLinkedInServer
+
+AUTHOR = "urn:li:person:test"
+
+
+@pytest.fixture
+def fake():
+    with FakeLinkedInServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(fake, store):
+    return LinkedInClient("token", base_url=fake.base_url, store=store, max_retries=3, backoff=0.01)
+
+
+def test_publishing_the_same_key_twice_posts_once(fake, client, store):
+    first = client.publish_ugc(AUTHOR, "Rollups batch transactions.")
+    second = client.publish_ugc(AUTHOR, "Rollups batch transactions.")
+    assert not first["deduplicated"] and second["deduplicated"]
+    assert len(fake.posts) == 1
+    key = idempotency_key(AUTHOR, "Rollups batch transactions.")
+    assert store.get_publish(key)["status"] == "published"
+
+
+def test_throttling_is_retried(fake, client):
+    fake.script(429, 503)
+    assert client.publish_ugc(AUTHOR, "Retried post.")["status"] == "posted"
+    assert len(fake.posts) == 1 and fake.requests == 3
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_ambiguous_5xx_is_not_retried_blindly(fake, client, store, status):
+    fake.script(status)
+    with pytest.raises(AmbiguousPublishError):
+        client.publish_ugc(AUTHOR, "Maybe posted.")
+    assert fake.requests == 1
+    assert store.get_publish(idempotency_key(AUTHOR, "Maybe posted."))["status"] == "unknown"
+
+
+def test_unknown_outcome_is_resolved_by_lookup(fake, client, monkeypatch):
+    fake.timeout_delay = 0.5
+    fake.script("timeout")
+    # the session is shared process-wide, so the short read timeout is undone after the test
+    monkeypatch.setattr(client.session, "request", _with_read_timeout(client.session.request, 0.1))
+    result = client.publish_ugc(AUTHOR, "Created but unseen.")
+    assert result["deduplicated"] and result["response"]["id"] == "urn:li:share:1"
+    assert len(fake.posts) == 1
+
+
+def _with_read_timeout(request, read_timeout):
+    def wrapped(method, url, **kwargs):
+        kwargs["timeout"] = (5, read_timeout)
+        return request(method, url, **kwargs)
+    return wrapped
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from outbox import Outbox
+
+
+@pytest.fixture
+def outbox(store):
+    return Outbox(store)
+
+
+def post(store, content="Rollups batch transactions.", profile="valtrilabs"):
+    data = {"content": content, "profile": profile, "created_at": "2026-01-01T00:00:00Z"}
+    data["id"] = store.append(data)
+    return data
+
+
+def test_enqueue_is_idempotent_per_key(store, outbox):
+    p = post(store)
+    first = outbox.enqueue(p, state="approved")
+    assert outbox.enqueue(p, state="approved") == first
+    assert outbox.enqueue(p, state="drafted", key="other") != first
+    assert outbox.stats() == {"approved": 1, "drafted": 1}
+
+
+def test_enqueue_rejects_terminal_states(store, outbox):
+    with pytest.raises(ValueError):
+        outbox.enqueue(post(store), state="published")
+
+
+def test_claim_leases_due_jobs_once(store, outbox):
+    due = outbox.enqueue(post(store, "due"), state="scheduled", scheduled_at=time.time() - 1)
+    outbox.enqueue(post(store, "later"), state="scheduled", scheduled_at=time.time() + 3600)
+    outbox.enqueue(post(store, "draft"), state="drafted")
+    job = outbox.claim("w1")
+    assert job["id"] == due
+    assert job["state"] == "publishing" and job["lease_owner"] == "w1" and job["attempts"] == 1
+    assert outbox.claim("w2") is None
+
+
+def test_claim_by_id_only_takes_that_job(store, outbox):
+    first = outbox.enqueue(post(store, "first"), state="approved")
+    second = outbox.enqueue(post(store, "second"), state="approved")
+    assert outbox.claim("w1", job_id=second)["id"] == second
+    assert outbox.claim("w1", job_id=second) is None
+    assert outbox.claim("w1")["id"] == first
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_loses_it(store, outbox):
+    job_id = outbox.enqueue(post(store), state="approved")
+    stale = outbox.claim("crashed", lease_seconds=-1)
+    job = outbox.claim("w2")
+    assert job["id"] == job_id and job["attempts"] == 2
+    outbox.complete(stale, "crashed", {"id": "urn:li:share:1"})
+    assert outbox.get(job_id)["state"] == "publishing"
+    outbox.complete(job, "w2", {"id": "urn:li:share:1"})
+    assert outbox.get(job_id)["state"] == "published"
+    assert outbox.get(job_id)["result"] == {"id": "urn:li:share:1"}
+    assert store.get(job["post_id"])["status"] == "published"
+
+
+def test_release_returns_the_job_without_counting_the_attempt(store, outbox):
+    job_id = outbox.enqueue(post(store), state="approved")
+    job = outbox.claim("w1")
+    outbox.release(job, "w1", retry_delay=3600)
+    released = outbox.get(job_id)
+    assert released["state"] == "scheduled" and released["attempts"] == 0
+    assert released["scheduled_at"] > time.time() + 3000
+    assert outbox.claim("w1") is None
+
+
+def test_fail_backs_off_then_gives_up(store, outbox):
+    p = post(store)
+    job_id = outbox.enqueue(p, state="approved", max_attempts=2)
+    outbox.fail(outbox.claim("w1"), "w1", "HTTP 400", retry_delay=0)
+    assert outbox.get(job_id)["state"] == "scheduled"
+    outbox.fail(outbox.claim("w1"), "w1", "HTTP 400", retry_delay=0)
+    failed = outbox.get(job_id)
+    assert failed["state"] == "failed" and failed["last_error"] == "HTTP 400"
+    assert store.get(p["id"])["status"] == "failed"
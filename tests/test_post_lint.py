@@ -0,0 +1,99 @@
+import pytest
+
+from post_lint import PostLinter
+
+
+@pytest.fixture
+def linter():
+    return PostLinter(min_length=10, max_length=1300)
+
+
+def rules(result):
+    return {rule for rule, _, _ in result.issues}
+
+
+def test_banned_terms_are_replaced_keeping_case(linter):
+    res = linter.lint("Delve into the landscape of rollups with a deep dive.")
+    assert res.text == "Dig into the space of rollups with a close look."
+    assert ("banned", "repaired", "replaced banned terms (3)") in res.issues
+
+
+def test_inline_hashtag_keeps_the_word_and_moves_the_tag(linter):
+    res = linter.lint("Rollups make #DeFi cheaper to use every single day.")
+    assert res.text == "Rollups make DeFi cheaper to use every single day.\n#DeFi"
+    assert "hashtag" in rules(res)
+
+
+def test_trailing_hashtags_move_whole(linter):
+    res = linter.lint("Rollups batch transactions. #DeFi #L2")
+    assert res.text == "Rollups batch transactions.\n#DeFi #L2"
+
+
+def test_hashtag_lines_are_merged_and_deduplicated(linter):
+    res = linter.lint("Rollups batch transactions.\n#DeFi #L2\n\n#L2, #Ethereum")
+    assert res.text == "Rollups batch transactions.\n#DeFi #L2 #Ethereum"
+    assert "hashtag" not in rules(res)
+
+
+@pytest.mark.parametrize("text", ["We ranked #1 in volume this quarter.", "The #2024 cohort settled faster."])
+def test_numeric_tags_are_text(linter, text):
+    res = linter.lint(text)
+    assert res.text == text
+    assert "no_hashtags" in rules(res)
+
+
+def test_chapter_reference_is_removed(linter):
+    res = linter.lint("According to Chapter 3, rollups batch transactions.")
+    assert res.text == "Rollups batch transactions."
+    assert "chapter" in rules(res)
+
+
+@pytest.mark.parametrize("text", [
+    "Section 230 of the Communications Decency Act shields platforms.",
+    "The exchange filed for Chapter 11 last year.",
+    "In section 2 of the tax code the rules differ for staking income.",
+])
+def test_chapter_and_section_as_content_stay(linter, text):
+    res = linter.lint(text)
+    assert res.text == text
+    assert "chapter" not in rules(res)
+
+
+def test_fake_dates_are_removed(linter):
+    assert linter.lint("Volumes rose (Q1 2024) sharply.").text == "Volumes rose sharply."
+
+
+def test_emojis_beyond_the_limit_are_dropped(linter):
+    res = linter.lint("\U0001F680" * 5 + " launch day for the new bridge")
+    assert res.text.count("\U0001F680") == 3
+    assert ("emoji", "repaired", "dropped emojis beyond 3 (2)") in res.issues
+
+
+def test_markdown_is_stripped_but_arithmetic_stays(linter):
+    res = linter.lint("**Bold** claim about 5*3x leverage.")
+    assert res.text == "Bold claim about 5*3x leverage."
+    # markdown repairs do not lower the score
+    assert res.repairs == 0
+
+
+def test_urls_are_left_alone(linter):
+    text = "Read https://example.com/a#b and www.example.com/**x** now."
+    assert linter.lint(text).text == text
+
+
+def test_source_admission_is_an_error(linter):
+    res = linter.lint("Our knowledge base says rollups are cheaper.")
+    assert not res.ok
+    assert res.errors[0][0] == "source_reference"
+
+
+def test_length_limits():
+    assert [e[0] for e in PostLinter(min_length=50).lint("Too short #DeFi").errors] == ["too_short"]
+    assert [e[0] for e in PostLinter(min_length=10, max_length=20).lint("x" * 40).errors] == ["too_long"]
+    assert [e[0] for e in PostLinter().lint("").errors] == ["empty"]
+
+
+def test_score_drops_with_repairs_and_errors(linter):
+    assert linter.lint("Rollups batch transactions.\n#DeFi").score == 1.0
+    assert linter.lint("We delve into rollups today.\n#DeFi").score == pytest.approx(0.95)
+    assert linter.lint("Our docs say so.\n#DeFi").score == pytest.approx(0.5)
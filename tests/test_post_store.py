@@ -0,0 +1,94 @@
+import pytest
+
+
+def fill(store, n=25):
+    ids = []
+    for i in range(n):
+        ids.append(store.append({
+            "content": f"Post {i} about {'rollups' if i % 2 else 'custody'}",
+            "profile": "valtrilabs" if i % 3 else "arab_global_crypto",
+            "theme": "bench",
+            "status": "published" if i % 5 == 0 else "drafted",
+            "created_at": f"2026-01-{i + 1:02d}T12:00:00Z",
+        }))
+    return ids
+
+
+def pages(store, **filters):
+    cursor, out = None, []
+    while True:
+        posts, cursor = store.search(before_id=cursor, **filters)
+        out.append([p["id"] for p in posts])
+        if cursor is None:
+            return out
+
+
+def test_keyset_pages_cover_everything_once_newest_first(store):
+    ids = fill(store)
+    got = pages(store, limit=10)
+    assert [len(p) for p in got] == [10, 10, 5]
+    assert sum(got, []) == ids[::-1]
+
+
+def test_exact_multiple_of_the_page_size_has_no_empty_last_page(store):
+    ids = fill(store, 20)
+    got = pages(store, limit=10)
+    assert sum(got, []) == ids[::-1] and len(got) == 2
+
+
+def test_filters_apply_across_pages(store):
+    fill(store)
+    got = sum(pages(store, profile="valtrilabs", status="drafted", limit=4), [])
+    expected = [p["id"] for p in store.latest(100, status="drafted", profile="valtrilabs")]
+    assert got == expected and len(got) == 13
+
+
+def test_date_range_is_since_inclusive_until_exclusive(store):
+    ids = fill(store)
+    posts, _ = store.search(since="2026-01-05", until="2026-01-08", limit=100)
+    assert [p["id"] for p in posts] == ids[4:7][::-1]
+
+
+def test_full_text_search_pages(store):
+    fill(store)
+    got = sum(pages(store, text="rollup", limit=5), [])
+    assert len(got) == 12
+    assert all("rollups" in store.get(i)["content"] for i in got)
+
+
+def test_like_fallback_escapes_wildcards(store):
+    store.fts = False
+    store.append({"content": "100% on-chain", "created_at": "2026-01-01"})
+    store.append({"content": "1000 on-chain", "created_at": "2026-01-02"})
+    posts, _ = store.search(text="100%")
+    assert [p["content"] for p in posts] == ["100% on-chain"]
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    import app
+    import post_store
+    monkeypatch.setattr(post_store, "get_store", lambda *a, **k: store)
+    return app.app.test_client()
+
+
+def test_api_paginates_with_cursor(store, client):
+    ids = fill(store, 12)
+    first = client.get("/api/posts?limit=10").get_json()
+    assert [p["id"] for p in first["posts"]] == ids[::-1][:10]
+    second = client.get(f"/api/posts?limit=10&cursor={first['next_cursor']}").get_json()
+    assert [p["id"] for p in second["posts"]] == ids[::-1][10:]
+    assert second["next_cursor"] is None
+
+
+def test_api_date_only_until_includes_the_whole_day(store, client):
+    ids = fill(store)
+    body = client.get("/api/posts?since=2026-01-05&until=2026-01-07&limit=100").get_json()
+    assert [p["id"] for p in body["posts"]] == ids[4:7][::-1]
+
+
+@pytest.mark.parametrize("query", ["since=yesterday", "until=2026-13-01", "until=soon", "cursor=abc"])
+def test_api_rejects_malformed_filters(client, query):
+    resp = client.get(f"/api/posts?{query}")
+    assert resp.status_code == 400
+    assert resp.get_json()["success"] is False
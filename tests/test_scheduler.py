@@ -0,0 +1,95 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from scheduler import DailySchedule, Scheduler, parse_slots
+
+UTC = pytz.utc
+
+
+def at(*args):
+    return UTC.localize(datetime(*args))
+
+
+def schedule(slots, tz="America/New_York", **kwargs):
+    return DailySchedule("test", slots, tz, lambda slot: None, **kwargs)
+
+
+def test_parse_slots_sorts_and_deduplicates():
+    assert parse_slots("17:30, 09:00,,9:00,11") == [(9, 0), (11, 0), (17, 30)]
+
+
+@pytest.mark.parametrize("spec", ["24:00", "11:60", "ab", "11:xx", "-1:00"])
+def test_parse_slots_rejects_invalid_times(spec):
+    with pytest.raises(ValueError):
+        parse_slots(spec)
+
+
+def test_schedule_rejects_out_of_range_slots():
+    with pytest.raises(ValueError):
+        schedule([(25, 0)])
+    with pytest.raises(ValueError):
+        schedule([])
+
+
+def test_wall_clock_slot_follows_dst():
+    s = schedule([(11, 0)])
+    # 11:00 EST is 16:00 UTC; from 8 March 2026 it is 11:00 EDT, 15:00 UTC
+    assert s.next_slot(at(2026, 3, 6, 17, 0)) == at(2026, 3, 7, 16, 0)
+    assert s.next_slot(at(2026, 3, 7, 17, 0)) == at(2026, 3, 8, 15, 0)
+    assert s.next_slot(at(2026, 10, 31, 16, 0)) == at(2026, 11, 1, 16, 0)
+
+
+def test_slot_in_the_spring_gap_moves_forward():
+    # 02:30 does not exist on 8 March 2026 in New York; it runs at 03:30 EDT
+    s = schedule([(2, 30)])
+    slot = s.next_slot(at(2026, 3, 8, 0, 0))
+    assert slot == at(2026, 3, 8, 7, 30)
+    assert slot.astimezone(s.tz).strftime("%H:%M %Z") == "03:30 EDT"
+
+
+def test_repeated_autumn_hour_fires_once():
+    s = schedule([(1, 30)])
+    first = s.next_slot(at(2026, 11, 1, 0, 0))
+    assert first == at(2026, 11, 1, 5, 30)  # the first (EDT) pass
+    assert s.next_slot(first) == at(2026, 11, 2, 6, 30)
+
+
+def test_previous_slot_is_inclusive():
+    s = schedule([(9, 0), (17, 0)], tz="Asia/Dubai")
+    assert s.previous_slot(at(2026, 6, 1, 5, 0)) == at(2026, 6, 1, 5, 0)
+    assert s.previous_slot(at(2026, 6, 1, 4, 59)) == at(2026, 5, 31, 13, 0)
+
+
+def test_missed_slot_is_caught_up_within_the_window(tmp_path):
+    now = datetime.now(UTC)
+    slot = now - timedelta(hours=1)
+    s = schedule([(slot.hour, slot.minute)], tz="UTC", catch_up_seconds=6 * 3600)
+    state = tmp_path / "state.json"
+    state.write_text(json.dumps({"test": (now - timedelta(days=2)).timestamp()}))
+    sched = Scheduler(state_path=str(state))
+    try:
+        sched.add(s)
+        runs = sched.next_runs()
+    finally:
+        sched.stop()
+    assert len(runs) == 2
+    assert abs((runs[0][1] - now).total_seconds()) < 5  # the missed slot, fired right away
+    assert runs[1][1] == s.next_slot(now)
+
+
+def test_missed_slot_outside_the_window_is_skipped(tmp_path):
+    now = datetime.now(UTC)
+    slot = now - timedelta(hours=3)
+    s = schedule([(slot.hour, slot.minute)], tz="UTC", catch_up_seconds=3600)
+    state = tmp_path / "state.json"
+    state.write_text(json.dumps({"test": (now - timedelta(days=2)).timestamp()}))
+    sched = Scheduler(state_path=str(state))
+    try:
+        sched.add(s)
+        runs = sched.next_runs()
+    finally:
+        sched.stop()
+    assert [r[1] for r in runs] == [s.next_slot(now)]
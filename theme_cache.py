@@ -0,0 +1,172 @@
+"""Per-theme retrieval context, precomputed when the knowledge base is built.
+
+Scheduled posts always query `theme_query(profile, theme)` for a theme from
+config.PROFILES[...]["content_themes"], so the ranked context for every configured theme is
+computed once (RAGStore.ingest calls build()) and stored next to the index as
+theme_context.json. Generation then looks the context up instead of encoding and searching.
+
+The file carries a fingerprint of the themes, retrieval settings, shard sizes and the ingest
+generation (a digest of the indexed text, see RAGStore.ingest_generation); when it no longer matches, lookups miss (callers search live) and a rebuild starts in the background.
+On a read-only index snapshot (RAG_SNAPSHOT) the bundled file is never rebuilt or rewritten.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import logging
+import config
+
+logger = logging.getLogger("valtrilabs.theme_cache")
+
+CONTEXT_K = 4
+
+
+def theme_query(profile_key: str, theme: str) -> str:
+    """The retrieval query used for a scheduled post on `theme`."""
+    services = config.PROFILES[profile_key].get("company_info", {}).get("services", "")
+    return f"{theme} {services}"
+
+
+def cache_enabled() -> bool:
+    return os.getenv("THEME_CACHE", "true").lower() in ("1", "true", "yes")
+
+
+class ThemeContextCache:
+    def __init__(self, rag, path: Optional[str] = None):
+        self.rag = rag
+        self.path = path or os.path.join(rag.persist_dir, "theme_context.json")
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._stamp: Optional[float] = None
+        self._rebuilding = threading.Event()
+        self._counts: Optional[Tuple[str, Dict[str, int]]] = None  # (ingest generation, shard sizes)
+        # a snapshot's files are checksummed in its manifest, so its cache is used as shipped
+        self.read_only = getattr(rag, "snapshot", None) is not None
+
+    def _shard_sizes(self, generation: Optional[str]) -> Dict[str, int]:
+        """Collection counts, cached per ingest generation (recounted every time without one)."""
+        from rag_system import all_collections
+        cached = self._counts
+        if generation is not None and cached is not None and cached[0] == generation:
+            return cached[1]
+        # collection_count reopens handles dropped by an ingest in another process
+        counts = {name: self.rag.collection_count(name) for name in all_collections() + [config.LEGACY_COLLECTION]}
+        if generation is not None:
+            self._counts = (generation, counts)
+        return counts
+
+    def fingerprint(self) -> str:
+        """Themes, retrieval settings, shard sizes and ingest generation; never loads the model."""
+        from rag_system import EMBEDDING_MODEL
+        from reranker import RERANK_MODEL, rerank_enabled
+        generation = self.rag.ingest_generation()
+        parts = {
+            "themes": {key: [theme_query(key, t) for t in p.get("content_themes", [])] for key, p in config.PROFILES.items()},
+            "collections": self._shard_sizes(generation),
+            "generation": generation,
+            "model": EMBEDDING_MODEL,
+            "scope": os.getenv("RAG_SCOPE", "profile").lower(),
+            "rerank": RERANK_MODEL if rerank_enabled() else None,
+            "overfetch": os.getenv("RERANK_OVERFETCH", "5"),
+            "k": CONTEXT_K,
+        }
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def build(self) -> int:
+        """Search every configured theme of every profile and write the cache file."""
+        if self.read_only:
+            raise RuntimeError("The theme context cache of an index snapshot is read-only")
+        from reranker import get_reranker, rerank_enabled
+        started = time.perf_counter()
+        fingerprint = self.fingerprint()
+        profiles: Dict[str, Dict[str, List[dict]]] = {}
+        for key, profile in config.PROFILES.items():
+            profiles[key] = {}
+            for theme in profile.get("content_themes", []):
+                query = theme_query(key, theme)
+                if rerank_enabled():
+                    fetched = self.rag.search_profile(query, key, k=CONTEXT_K * int(os.getenv("RERANK_OVERFETCH", "5")))
+                    # no latency budget at build time: wait for the cross-encoder
+                    docs = get_reranker().rerank(query, fetched, k=CONTEXT_K, wait=True)
+                else:
+                    docs = self.rag.search_profile(query, key, k=CONTEXT_K)
+                profiles[key][query] = docs
+        data = {"fingerprint": fingerprint, "built_at": time.time(), "profiles": profiles}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".theme_context.", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+        with self._lock:
+            self._data, self._stamp = data, os.stat(self.path).st_mtime
+        n = sum(len(v) for v in profiles.values())
+        logger.info("Theme context cache: %d themes in %.1fs -> %s", n, time.perf_counter() - started, self.path)
+        return n
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        """The cache file, re-read only when its mtime changes (e.g. another process ingested)."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if mtime != self._stamp:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._data = json.load(f)
+                except (OSError, ValueError):
+                    logger.warning("Unreadable theme context cache %s", self.path)
+                    self._data = None
+                self._stamp = mtime
+            return self._data
+
+    def lookup(self, profile_key: str, query: str) -> Optional[List[dict]]:
+        """Cached context for a configured theme query, or None (unknown query, stale or missing cache)."""
+        data = self._load()
+        try:
+            fingerprint = self.fingerprint()
+        except Exception:
+            # the store could not be read right now; treat the cache as stale
+            logger.warning("Could not fingerprint the knowledge base; searching live", exc_info=True)
+            fingerprint = None
+        if data is not None and fingerprint is not None and data.get("fingerprint") == fingerprint:
+            # None for ad-hoc queries; a live search is the right answer for those
+            return data.get("profiles", {}).get(profile_key, {}).get(query)
+        self.rebuild_async()
+        return None
+
+    def rebuild_async(self) -> None:
+        if self.read_only:
+            return
+        with self._lock:
+            if self._rebuilding.is_set():
+                return
+            self._rebuilding.set()
+
+        def run():
+            try:
+                self.build()
+            except Exception:
+                logger.exception("Rebuilding the theme context cache failed")
+            finally:
+                self._rebuilding.clear()
+
+        logger.info("Theme context cache missing or stale; rebuilding in the background")
+        threading.Thread(target=run, name="theme-cache", daemon=True).start()
+
+
+_caches: Dict[str, ThemeContextCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_theme_cache(rag) -> ThemeContextCache:
+    """One cache per vector store directory, shared by every generator in the process."""
+    with _caches_lock:
+        cache = _caches.get(rag.persist_dir)
+        if cache is None:
+            cache = _caches[rag.persist_dir] = ThemeContextCache(rag)
+        return cache
@@ -0,0 +1,209 @@
+"""Lightweight tracing: nested spans with a shared trace id, emitted as JSON lines.
+
+    with span("pipeline.publish", slot=slot.isoformat()):
+        ...                                   # child spans inherit the trace id
+
+    @traced("rag.similarity_search")
+    def similarity_search(...): ...
+
+Finished spans go to the "valtrilabs.trace" logger; utils.setup_logging writes them to
+TRACE_LOG_PATH (default valtrilabs.traces.jsonl). With OTEL_EXPORTER_OTLP_ENDPOINT set
+(e.g. http://localhost:4318) they are also batched to a collector as OTLP/HTTP JSON.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import os
+import time
+import uuid
+import atexit
+import functools
+import threading
+import contextvars
+import logging
+
+logger = logging.getLogger("valtrilabs.tracing")
+trace_logger = logging.getLogger("valtrilabs.trace")
+# spans are machine-readable records, not console messages
+trace_logger.propagate = False
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("valtrilabs_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class span:
+    """Context manager (and decorator factory via `traced`) for one timed operation."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        self._span = Span(self.name, _current.get(), self.attributes)
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        s = self._span
+        s.duration_ms = round((time.perf_counter() - s._t0) * 1000, 3)
+        if exc is not None:
+            s.status = "error"
+            s.error = f"{exc_type.__name__}: {exc}"[:300]
+        _current.reset(self._token)
+        _emit(s)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator: run the function inside a span named `name` (default: module.qualname)."""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**attributes: Any) -> None:
+    """Add attributes to the current span (no-op outside a span)."""
+    s = _current.get()
+    if s is not None:
+        s.set(**attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    s = _current.get()
+    return s.trace_id if s else None
+
+
+def bind(fn: Callable) -> Callable:
+    """Carry the caller's span into another thread (executor.submit(bind(fn), ...))."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def _emit(s: Span) -> None:
+    record = s.to_dict()
+    if trace_logger.isEnabledFor(logging.INFO):
+        trace_logger.info("%s %.1fms", s.name, s.duration_ms, extra={"span": record})
+    exporter = _get_exporter()
+    if exporter is not None:
+        exporter.add(record)
+
+
+class OTLPExporter:
+    """Batches spans to an OTLP/HTTP collector (JSON encoding) from a daemon thread."""
+
+    def __init__(self, endpoint: str, service_name: str = "valtrilabs", interval: float = 2.0, max_batch: int = 256):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name="otlp-export", daemon=True).start()
+        atexit.register(self.flush)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._queue) < self.max_batch * 20:  # drop rather than grow without bound
+                self._queue.append(record)
+            full = len(self._queue) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    @staticmethod
+    def _value(v: Any) -> Dict[str, Any]:
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    def _otlp_span(self, r: Dict[str, Any]) -> Dict[str, Any]:
+        start_ns = int(r["start"] * 1e9)
+        out = {
+            "traceId": r["trace_id"],
+            "spanId": r["span_id"],
+            "name": r["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int((r["duration_ms"] or 0) * 1e6)),
+            "attributes": [{"key": k, "value": self._value(v)} for k, v in r["attributes"].items()],
+            "status": {"code": 2, "message": r["error"] or ""} if r["status"] == "error" else {"code": 1},
+        }
+        if r["parent_id"]:
+            out["parentSpanId"] = r["parent_id"]
+        return out
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._queue = self._queue, []
+        if not batch:
+            return
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "valtrilabs.tracing"}, "spans": [self._otlp_span(r) for r in batch]}],
+        }]}
+        try:
+            import requests
+            requests.post(self.url, json=payload, timeout=5).raise_for_status()
+        except Exception as e:
+            # tracing must never break the pipeline; the JSON-lines log still has the spans
+            logger.warning("OTLP export of %d spans to %s failed: %s", len(batch), self.url, e)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+
+_exporter: Optional[OTLPExporter] = None
+_exporter_checked = False
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> Optional[OTLPExporter]:
+    """Created on the first finished span, after .env has been loaded."""
+    global _exporter, _exporter_checked
+    if not _exporter_checked:
+        with _exporter_lock:
+            if not _exporter_checked:
+                endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+                if endpoint:
+                    _exporter = OTLPExporter(endpoint, os.getenv("OTEL_SERVICE_NAME", "valtrilabs"))
+                _exporter_checked = True
+    return _exporter
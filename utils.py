@@ -1,7 +1,18 @@
 """Utility helpers: logging setup and simple helpers."""
+import os
+import json
 import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from typing import List, Optional
+
+
+class SpanFormatter(logging.Formatter):
+    """One JSON object per finished tracing span."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        span = getattr(record, "span", None)
+        return json.dumps(span if span is not None else {"message": record.getMessage()}, default=str)
 
 
 def setup_logging(log_path: str = "valtrilabs.log") -> logging.Logger:
@@ -17,6 +28,16 @@ def setup_logging(log_path: str = "valtrilabs.log") -> logging.Logger:
         ch.setFormatter(fmt)
         logger.addHandler(fh)
         logger.addHandler(ch)
+        # tracing spans as JSON lines in their own file (see tracing.py); TRACING=false disables
+        trace_logger = logging.getLogger("valtrilabs.trace")
+        if os.getenv("TRACING", "true").lower() in ("1", "true", "yes"):
+            th = RotatingFileHandler(os.getenv("TRACE_LOG_PATH", "valtrilabs.traces.jsonl"), maxBytes=20_000_000, backupCount=3)
+            th.setFormatter(SpanFormatter())
+            trace_logger.addHandler(th)
+            trace_logger.setLevel(logging.INFO)
+        else:
+            trace_logger.setLevel(logging.CRITICAL)
+        trace_logger.propagate = False
     return logger
 
 
@@ -24,3 +45,20 @@ def ensure_data_dirs(base: str = "data") -> None:
     Path(base).mkdir(exist_ok=True)
     Path(f"{base}/pdfs").mkdir(parents=True, exist_ok=True)
     Path(f"{base}/chroma_db").mkdir(parents=True, exist_ok=True)
+
+
+def profile_env(profile: Optional[str], name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read `<PROFILE>_<NAME>` (e.g. ARAB_GLOBAL_CRYPTO_LINKEDIN_ACCESS_TOKEN), falling back to `<NAME>`."""
+    if profile:
+        value = os.getenv(f"{profile.upper()}_{name}")
+        if value:
+            return value
+    return os.getenv(name, default)
+
+
+def active_profiles() -> List[str]:
+    """Profiles served by this process: ACTIVE_PROFILES="a,b", else just CONTENT_PROFILE."""
+    import config
+    raw = os.getenv("ACTIVE_PROFILES") or os.getenv("CONTENT_PROFILE", config.DEFAULT_PROFILE)
+    profiles = [p.strip() for p in raw.split(",") if p.strip() in config.PROFILES]
+    return profiles or [config.DEFAULT_PROFILE]